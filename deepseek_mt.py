@@ -1,5 +1,5 @@
 # deepseek_mt.py - FIXED VERSION dengan error handling yang benar
-import re, json, asyncio, random
+import re, json, asyncio, random, time
 from pathlib import Path
 from typing import List, Tuple, Callable, Optional
 
@@ -10,51 +10,25 @@ except ImportError:
     DRAMA_CONFIG_LOADED = False
     DRAMA_CHINA_CONFIG = {}
     DRAMA_GLOSSARY = {}
-SRT_BLOCK_RE = re.compile(r"(\d+)\s+([\d:.,]+)\s-->\s([\d:.,]+)\s+(.*?)(?:\n{2,}|\Z)", re.S)
+try:
+    from translation_memory import get_translation_memory, prompt_fingerprint
+except ImportError:
+    get_translation_memory = None
+import http_client
+from srt_model import load_srt
+from translate_control import get_translate_controller, is_timeout
+from token_budget import TokenPacker
+from translate_repair import REPAIR_ROUNDS, is_failed, neighbours, repair_groups
+from translate_dedup import DedupPlan
+from llm_stream import STREAM_ENABLED, LineStream, aiter_deltas
+
+DS_MODEL = "deepseek-chat"
+DS_PROMPT_VERSION = "lines_v2"  # naikkan kalau aturan prompt di _ds_call_api_async diubah
 
 def parse_srt(path: Path) -> List[Tuple[int,str,str,str]]:
-    raw = path.read_text(encoding="utf-8-sig", errors="ignore")
-    out = []
-
-    m1 = list(SRT_BLOCK_RE.finditer(raw))
-    if m1:
-        for m in m1:
-            idx, start, end, text = m.groups()
-            out.append((int(idx), start.strip(), end.strip(), text.strip()))
-        out.sort(key=lambda x: x[0])
-        return out
-
-    VTT_RE = re.compile(r"([\d:.,]+)\s*-->\s*([\d:.,]+)\s*\n(.*?)(?:\n{2,}|\Z)", re.S)
-    m2 = list(VTT_RE.finditer(raw))
-    if m2:
-        idx = 1
-        for m in m2:
-            start, end, text = m.groups()
-            out.append((idx, start.strip(), end.strip(), text.strip()))
-            idx += 1
-        return out
-
-    BRACKET_RE = re.compile(r"\[\s*([\d:.,]+)\s*-->\s*([\d:.,]+)\s*\]\s*(.+)")
-    m3 = list(BRACKET_RE.finditer(raw))
-    if m3:
-        idx = 1
-        for m in m3:
-            start, end, text = m.groups()
-            out.append((idx, start.strip(), end.strip(), text.strip()))
-            idx += 1
-        return out
-
-    SIMPLE_LINE = re.compile(r"([\d:.,]{7,})\s*-->\s*([\d:.,]{7,})\s*(.*)")
-    lines = raw.splitlines()
-    idx = 1
-    for ln in lines:
-        mm = SIMPLE_LINE.match(ln.strip())
-        if mm:
-            start, end, text = mm.groups()
-            out.append((idx, start.strip(), end.strip(), (text or '').strip()))
-            idx += 1
-
-    return out
+    """(index, start, end, text) urut index. SRT/VTT/format satu baris → srt_model (cache per file)."""
+    sub = load_srt(path)
+    return [(sub.index[i], sub.start_ts(i), sub.end_ts(i), sub.texts[i]) for i in sub.order_by_index()]
 
 def write_srt(entries: List[Tuple[int,str,str,str]], path: Path):
     with path.open("w", encoding="utf-8") as f:
@@ -183,7 +157,112 @@ def _contains_chinese(text: str) -> bool:
     """Cek apakah teks masih mengandung karakter Chinese"""
     return bool(re.search(r'[\u4e00-\u9fff]', text))
 
-async def _ds_call_async(client, api_key: str, lines: List[str], timeout: int) -> List[str]:
+def _validate_line(original: str, translated: str) -> str:
+    """Post-process + validasi ketat satu baris hasil DeepSeek; "" = gagal (masuk tahap repair)."""
+    processed = _postprocess_indonesian(translated)
+    # Jangan terima terjemahan yang sama dengan original / masih Chinese / terlalu pendek
+    if (not processed.strip() or
+        _normalize_for_compare(processed) == _normalize_for_compare(original) or
+        _contains_chinese(processed) or _contains_chinese(translated) or
+        len(processed.strip()) < 2):
+        return ""
+    return processed
+
+def _split_numbered(line: str) -> Tuple[Optional[int], str]:
+    """Satu baris respons → (nomor atau None, teks); teks "" = baris diabaikan."""
+    line = line.strip()
+    if not line or line.startswith('```'):
+        return None, ""
+    m = re.match(r'^(\d+)[\.\)]\s*', line)
+    line = line[m.end():] if m else line
+    # Hapus quote marks
+    line = re.sub(r'^["\']|["\']$', '', line)
+    return (int(m.group(1)) if m else None), line
+
+async def _ds_stream_async(client, headers: dict, payload: dict, timeout: int,
+                           on_text_line: Callable[[str], None]) -> Tuple[int, str]:
+    """POST "stream": true; tiap baris teks yang sudah lengkap → on_text_line.
+    Return (status, isi respons lengkap / body error)."""
+    async with client.stream(
+        "POST", "https://api.deepseek.com/chat/completions",
+        headers=headers, json=dict(payload, stream=True), timeout=timeout
+    ) as r:
+        if r.status_code != 200:
+            await r.aread()
+            return r.status_code, r.text
+        ls = LineStream()
+        async for delta in aiter_deltas(r.aiter_lines()):
+            for line in ls.feed(delta):
+                on_text_line(line)
+        for line in ls.close():
+            on_text_line(line)
+        return 200, ls.text
+
+def _tm_context() -> dict:
+    """Key konteks TM untuk jalur deepseek_mt (prompt baris bernomor + glosarium 15 entri)."""
+    glossary = list(DRAMA_GLOSSARY.items())[:15] if DRAMA_CONFIG_LOADED else []
+    return {
+        "style": "dubbing_lines",
+        "target_lang": "id",
+        "model": DS_MODEL,
+        "prompt_version": f"{DS_PROMPT_VERSION}:{prompt_fingerprint(glossary)}",
+    }
+
+def _tm_lookup(lines: List[str]) -> List[Optional[str]]:
+    """Lookup massal TM untuk baris sumber (sudah lewat _preprocess_chinese_text)."""
+    tm = get_translation_memory() if get_translation_memory else None
+    if not tm:
+        return [None] * len(lines)
+    try:
+        return tm.lookup_many([_preprocess_chinese_text(x) for x in lines], **_tm_context())
+    except Exception as e:
+        print(f"TM lookup error: {e}")
+        return [None] * len(lines)
+
+def _tm_store(lines: List[str], translated: List[str]):
+    tm = get_translation_memory() if get_translation_memory else None
+    if not tm:
+        return
+    try:
+        tm.store_many(
+            [(_preprocess_chinese_text(x), t) for x, t in zip(lines, translated) if t],
+            **_tm_context()
+        )
+    except Exception as e:
+        print(f"TM store error: {e}")
+
+async def _ds_call_async(client, api_key: str, lines: List[str], timeout: int,
+                         context: Optional[Tuple[list, list]] = None,
+                         on_line: Optional[Callable[[int, str], None]] = None,
+                         tm_lookup: bool = True) -> List[str]:
+    """
+    Terjemahkan `lines` (urutan & jumlah sama). Cek translation memory dulu;
+    hanya baris miss yang dikirim ke API, hasil valid disimpan ke TM.
+    context: (before, after) baris tetangga [(sumber, terjemahan)] — dipakai tahap repair.
+    on_line: (posisi di lines, terjemahan) begitu satu baris valid selesai (respons streaming).
+    tm_lookup=False: TM sudah dicek massal oleh pemanggil (translate_lines_realtime).
+    """
+    out = _tm_lookup(lines) if tm_lookup else [None] * len(lines)
+    miss = [i for i, t in enumerate(out) if t is None and _preprocess_chinese_text(lines[i])]
+    if on_line:
+        for i, t in enumerate(out):
+            if t:
+                on_line(i, t)
+    if miss:
+        api_out = await _ds_call_api_async(
+            client, api_key, [lines[i] for i in miss], timeout, context,
+            on_line=(lambda j, t: on_line(miss[j], t)) if on_line else None
+        )
+        for i, t in zip(miss, api_out):
+            out[i] = t
+        _tm_store([lines[i] for i in miss], api_out)
+    if len(miss) < len(lines):
+        print(f"TM: {len(lines) - len(miss)}/{len(lines)} baris dari translation memory")
+    return [t or "" for t in out]
+
+async def _ds_call_api_async(client, api_key: str, lines: List[str], timeout: int,
+                             context: Optional[Tuple[list, list]] = None,
+                             on_line: Optional[Callable[[int, str], None]] = None) -> List[str]:
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
     
     # GUNAKAN CONFIG JIKA ADA, ELSE DEFAULT
@@ -200,6 +279,15 @@ async def _ds_call_async(client, api_key: str, lines: List[str], timeout: int) -
     
     # BUILD PROMPT DENGAN GLOSARIUM
     glossary_context = "\n".join([f"{k} = {v}" for k, v in list(glossary.items())[:15]])
+
+    # Konteks baris tetangga (tahap repair): hanya referensi, tidak ikut diterjemahkan
+    context_block = ""
+    if context and (context[0] or context[1]):
+        fmt = lambda rows: "\n".join(f"- {_preprocess_chinese_text(a)} → {b or '(belum ada)'}" for a, b in rows) or "—"
+        context_block = (
+            "KONTEKS (JANGAN diterjemahkan, hanya referensi alur dialog):\n"
+            "Sebelumnya:\n" + fmt(context[0]) + "\nSesudahnya:\n" + fmt(context[1]) + "\n\n"
+        )
     
     user_payload = {
         "role": "user",
@@ -210,15 +298,17 @@ async def _ds_call_async(client, api_key: str, lines: List[str], timeout: int) -
             "3) Tanpa koma dan tanda kurung. Boleh pakai ? ! … Titik opsional.\n"
             "4) Nama/brand pertahankan atau pakai ejaan yang konsisten.\n"
             "5) Output HARUS persis " + str(len(cleaned_lines)) + " baris.\n"
-            "6) Output TANPA nomor dan TANPA teks lain.\n"
+            "6) Setiap baris output diawali nomor yang sama dengan baris sumbernya: 'N) terjemahan'. "
+            "TANPA teks lain.\n"
             "7) Gaya lisan natural (bukan bahasa tulisan). Default pakai 'tidak'.\n"
             "\n"
             "GLOSARIUM:\n" + (glossary_context or "—") + "\n\n"
+            + context_block +
             "FORMAT INPUT:\n"
-            "Baris sumber di bawah ini diberi nomor hanya untuk referensi. "
-            "Output harus sejumlah baris yang sama TANPA nomor.\n\n"
+            "Baris sumber di bawah ini diberi nomor. "
+            "Output harus sejumlah baris yang sama, masing-masing dengan nomor yang sama.\n\n"
             "TERJEMAHKAN BARIS BERIKUT KE BAHASA INDONESIA LISAN UNTUK DUBBING:\n" +
-            "\n".join([f"{i+1}) {line}" for i, line in enumerate(cleaned_lines, start=1)])
+            "\n".join([f"{i}) {line}" for i, line in enumerate(cleaned_lines, start=1)])
         )
     }
     
@@ -232,7 +322,7 @@ async def _ds_call_async(client, api_key: str, lines: List[str], timeout: int) -
     }
     
     payload = {
-        "model": "deepseek-chat",
+        "model": DS_MODEL,
         "messages": [system_payload, user_payload],
         "temperature": config["translation"]["temperature"],
         "max_tokens": config["translation"]["max_tokens"],
@@ -240,79 +330,106 @@ async def _ds_call_async(client, api_key: str, lines: List[str], timeout: int) -
         "stream": False
     }
     
+    # Streaming (SSE): baris bernomor yang sudah lengkap langsung divalidasi & dikirim ke on_line,
+    # tanpa menunggu baris terakhir batch selesai digenerate
+    stream = bool(on_line) and STREAM_ENABLED
+    streamed = {}   # nomor baris → hasil validasi baris yang sudah ter-stream (lintas attempt)
+
+    def emit(raw: str):
+        num, text = _split_numbered(raw)
+        if num is None or not text or not 1 <= num <= len(cleaned_lines) or num in streamed:
+            return
+        streamed[num] = _validate_line(cleaned_lines[num - 1], text)
+        if streamed[num]:
+            on_line(num - 1, streamed[num])
+
+    def fallback() -> List[str]:
+        # gagal total / posisi tidak bisa dipercaya: baris bernomor yang sudah ter-stream tetap dipakai
+        return [streamed.get(i, "") for i in range(1, len(cleaned_lines) + 1)]
+
+    ctl = get_translate_controller()
     for attempt in range(3):  # Retry mechanism
         try:
-            r = await client.post(
-                "https://api.deepseek.com/chat/completions",
-                headers=headers, json=payload, timeout=timeout
-            )
+            t0 = time.perf_counter()
+            if stream:
+                status, body = await _ds_stream_async(client, headers, payload, timeout, emit)
+            else:
+                r = await client.post(
+                    "https://api.deepseek.com/chat/completions",
+                    headers=headers, json=payload, timeout=timeout
+                )
+                status, body = r.status_code, r.text
             
-            if r.status_code != 200:
-                error_detail = r.text
-                print(f"DeepSeek API Error {r.status_code}: {error_detail}")
+            if status != 200:
+                error_detail = body
+                print(f"DeepSeek API Error {status}: {error_detail}")
+                if status == 429:
+                    ctl.on_overload("rate_limited")
+                else:
+                    ctl.on_error()
                 
                 # JANGAN return teks asli untuk error 4xx/5xx
-                if r.status_code >= 400:
+                if status >= 400:
                     if attempt == 2:  # Final attempt
-                        return [""] * len(cleaned_lines)  # Return empty instead of original
+                        return fallback()  # Return empty instead of original
+                    if status == 429:
+                        await asyncio.sleep(2 ** attempt + random.random())
                     continue
                 
-                r.raise_for_status()
+                raise RuntimeError(f"DeepSeek HTTP {status}")
                 
-            data = r.json()
-            txt = data["choices"][0]["message"]["content"]
+            txt = body if stream else json.loads(body)["choices"][0]["message"]["content"]
             
             # Debug: print raw response untuk troubleshooting
             print(f"Raw DeepSeek response: {txt[:200]}...")
             
-            # Bersihkan respons: hapus nomor baris (1., 2., etc.)
-            lines_out = []
+            # Bersihkan respons: pisahkan nomor baris ("N) " / "N. ") dari teks
+            lines_out, by_num = [], {}
             for line in txt.split('\n'):
-                line = line.strip()
-                # Hapus numbering pattern: "1. ", "2. ", etc.
-                line = re.sub(r'^\d+\.\s*', '', line)
-                # Hapus quote marks
-                line = re.sub(r'^["\']|["\']$', '', line)
-                if line and not line.startswith('```'):
-                    lines_out.append(line)
-            
+                num, line = _split_numbered(line)
+                if not line:
+                    continue
+                lines_out.append(line)
+                if num is not None:
+                    by_num.setdefault(num, line)
+
+            if by_num and len(by_num) == len(lines_out):
+                # Semua baris bernomor → selaraskan per nomor; nomor yang hilang = baris gagal
+                got = sum(1 for k in by_num if 1 <= k <= len(cleaned_lines))
+                lines_out = [by_num.get(i, "") for i in range(1, len(cleaned_lines) + 1)]
+            else:
+                got = len(lines_out)
+            ctl.on_response(time.perf_counter() - t0, len(cleaned_lines), got)
             # Jika jumlah line tidak match, log warning
-            if len(lines_out) != len(cleaned_lines):
-                print(f"Warning: DeepSeek returned {len(lines_out)} lines, expected {len(cleaned_lines)}")
-                # Pad atau truncate untuk match jumlah line
-                if len(lines_out) < len(cleaned_lines):
-                    lines_out.extend([''] * (len(cleaned_lines) - len(lines_out)))
-                else:
-                    lines_out = lines_out[:len(cleaned_lines)]
+            if got != len(cleaned_lines):
+                print(f"Warning: DeepSeek returned {got} lines, expected {len(cleaned_lines)}")
+                if len(lines_out) != len(cleaned_lines):
+                    # tanpa nomor posisi baris tidak bisa dipercaya → semua masuk tahap repair
+                    lines_out = [''] * len(cleaned_lines)
             
             # Post-process setiap terjemahan
             final_lines = []
             for i, (original, translated) in enumerate(zip(cleaned_lines, lines_out)):
-                processed = _postprocess_indonesian(translated)
-                
                 # VALIDASI KETAT: Jangan terima terjemahan yang sama dengan original
-                orig_norm = _normalize_for_compare(original)
-                trans_norm = _normalize_for_compare(processed)
-                
-                if (not processed.strip() or 
-                    trans_norm == orig_norm or 
-                    _contains_chinese(processed) or
-                    len(processed.strip()) < 2):
+                processed = _validate_line(original, translated)
+                if not processed:
                     # Tandai sebagai gagal - return EMPTY string
-                    final_lines.append("")
-                    print(f"Translation validation failed for line {i}: '{original}' -> '{processed}'")
-                else:
-                    final_lines.append(processed)
+                    print(f"Translation validation failed for line {i}: '{original}' -> '{translated}'")
+                final_lines.append(processed)
             
-            return final_lines
+            return [t or f for t, f in zip(final_lines, fallback())]
             
         except Exception as e:
             print(f"DeepSeek API exception (attempt {attempt+1}/3): {e}")
+            if is_timeout(e):
+                ctl.on_overload("timeout")
+            else:
+                ctl.on_error()
             if attempt == 2:  # Final attempt
-                return [""] * len(cleaned_lines)  # Return empty on failure
+                return fallback()  # Return empty on failure
             await asyncio.sleep(2 ** attempt)  # Exponential backoff
     
-    return [""] * len(cleaned_lines)  # Final fallback to empty
+    return fallback()  # Final fallback to empty
 
 def translate_lines_realtime(
     lines: List[str],
@@ -323,7 +440,18 @@ def translate_lines_realtime(
     cache_file: Optional[Path] = None,
     on_progress: Optional[Callable[[int,int,int], None]] = None,
     on_chunk_done: Optional[Callable[[List[Tuple[int,str]]], None]] = None,
+    translated: Optional[List[str]] = None,
+    repair_only: bool = False,
 ) -> List[str]:
+    """
+    Pass utama (batch dinamis) lalu tahap repair: baris yang gagal di semua batch dikirim
+    ulang dalam batch kecil + konteks tetangga (translate_repair), hasilnya masuk cache & on_chunk_done.
+    translated : terjemahan yang sudah ada (mis. isi editor GUI), menggantikan isi cache_file
+    repair_only: lewati pass utama, hanya repair baris kosong/gagal
+    Baris sumber yang identik (translate_dedup) hanya dikirim sekali; hasilnya disebar ke semua index.
+    Dengan on_chunk_done, respons pass utama dibaca streaming (llm_stream): tiap baris yang selesai
+    langsung dikirim sebagai pair tunggal, lalu batch lengkap dikirim lagi setelah respons selesai.
+    """
     try:
         import httpx
     except ImportError as e:
@@ -339,37 +467,104 @@ def translate_lines_realtime(
         except Exception as e:
             print(f"Cache load error: {e}")
             cache = {}
+    if translated is not None:
+        cache = {k: t for k, t in enumerate(translated[:n]) if t}
+
+    def save_cache():
+        if cache_file:
+            cache_file.write_text(
+                json.dumps({str(k): v for k, v in cache.items()}, ensure_ascii=False, indent=0),
+                encoding="utf-8"
+            )
+
+    # Translation memory: isi baris yang sudah pernah diterjemahkan (lintas episode) sebelum batching
+    todo = [k for k in range(n) if k not in cache or cache[k] == ""]
+    if todo:
+        tm_hits = [(k, t) for k, t in zip(todo, _tm_lookup([lines[k] for k in todo])) if t]
+        for k, t in tm_hits:
+            cache[k] = t
+        if tm_hits:
+            print(f"[translate] translation memory: {len(tm_hits)} baris tanpa API call")
+            if cache_file:
+                cache_file.write_text(
+                    json.dumps({str(k): v for k, v in cache.items()}, ensure_ascii=False, indent=0),
+                    encoding="utf-8"
+                )
+            if on_chunk_done:
+                on_chunk_done(tm_hits)
+
+    # Dedup per episode: string unik dikirim sekali (kemunculan pertama), duplikat ikut hasilnya;
+    # key yang sudah punya terjemahan bagus langsung dipakai ulang
+    dd = DedupPlan(
+        lines, [k for k in range(n) if k not in cache or cache[k] == ""],
+        {k: t for k, t in cache.items() if 0 <= k < n and not is_failed(lines[k], t)},
+    )
+    follower = {d for ds in dd.dups.values() for d in ds}
+    if dd.reused:
+        for k, t in dd.reused:
+            cache[k] = t
+        save_cache()
+        if on_chunk_done:
+            on_chunk_done(dd.reused)
+    if dd.saved:
+        print(f"[translate] dedup: {dd.saved} baris duplikat tanpa API call "
+              f"({len(dd.reps)} unik dari {len(dd.todo)})")
 
-    plan = []
-    i = 0
-    while i < n:
-        j = min(n, i + max(1, int(batch)))
-        # Hanya proses baris yang belum ada di cache atau yang kosong di cache
-        if not all(k in cache and cache[k] != "" for k in range(i, j)):
-            plan.append((i, j))
-        i = j
+    # Batch diambil dinamis dari antrean: jumlah request paralel & batas baris per batch
+    # mengikuti controller AIMD (knob batch = batas atas, workers = titik awal);
+    # isi batch dipotong lagi oleh budget token (max_tokens) supaya respons tidak terpotong
+    ctl = get_translate_controller().job(batch, workers)
+    max_tokens = (DRAMA_CHINA_CONFIG.get("translation") or {}).get("max_tokens", 4000) if DRAMA_CONFIG_LOADED else 4000
+    packer = TokenPacker(max_tokens, "lines")
+    plan = [] if repair_only else list(dd.reps)
 
     done = sum(1 for k in cache if 0 <= k < n and cache[k] != "")
     last_print = -1
 
+    def report_progress():
+        nonlocal last_print
+        pct = int(done * 100 / n) if n else 100
+        if pct != last_print:
+            print(f"[translate] {pct:3d}% ({done}/{n})")
+            last_print = pct
+            if on_progress:
+                on_progress(done, n, pct)
+
+    def failed_lines() -> List[int]:
+        # duplikat tidak di-repair sendiri: ikut hasil representative-nya
+        return [k for k in range(n)
+                if k not in follower
+                and _preprocess_chinese_text(lines[k]).strip() and is_failed(lines[k], cache.get(k, ""))]
+
     async def worker(pl):
         nonlocal done, last_print
-        import httpx
-        async with httpx.AsyncClient(http2=True, timeout=httpx.Timeout(timeout)) as client:
-            while pl:
-                start, end = pl.pop(0)
-                # Hanya ambil baris yang belum ada di cache atau yang kosong
-                sub_idx = [k for k in range(start, end) if k not in cache or cache[k] == ""]
+        client = http_client.get_async_client()  # satu pool untuk semua worker
+        while pl:
+            async with ctl.aslot():
+                window = pl[:ctl.batch_size()]
+                sub_idx = window[:packer.take([lines[k] for k in window], len(window))]
+                del pl[:len(sub_idx)]
                 if not sub_idx:
-                    continue
-                    
+                    break
+
                 payload_lines = [lines[k] for k in sub_idx]
+                start, end = sub_idx[0], sub_idx[-1] + 1
                 print(f"Translating lines {start}-{end}: {len(payload_lines)} lines")
-                
+
+                def stream_line(i, t, sub_idx=sub_idx):
+                    # baris yang selesai di tengah respons streaming langsung ke editor
+                    pairs = dd.expand([(sub_idx[i], t)])
+                    for k, tt in pairs:
+                        cache[k] = tt
+                    on_chunk_done(pairs)
+
                 for attempt in range(1, 4):
                     try:
-                        out = await _ds_call_async(client, api_key, payload_lines, timeout)
-                        
+                        # TM sudah dicek massal di atas
+                        out = await _ds_call_async(client, api_key, payload_lines, timeout,
+                                                   on_line=stream_line if on_chunk_done else None,
+                                                   tm_lookup=False)
+
                         if len(out) != len(payload_lines):
                             print(f"Warning: DeepSeek returned {len(out)} lines, expected {len(payload_lines)}")
                             # Pad dengan string kosong jika perlu
@@ -377,16 +572,17 @@ def translate_lines_realtime(
                                 out.extend([''] * (len(payload_lines) - len(out)))
                             else:
                                 out = out[:len(payload_lines)]
-                        
-                        # Validasi dan simpan hasil - HANYA simpan jika valid
-                        for t, k in zip(out, sub_idx):
+
+                        # Validasi dan simpan hasil - HANYA simpan jika valid (duplikat ikut rep-nya)
+                        chunk = dd.expand(zip(sub_idx, out))
+                        for k, t in chunk:
                             # Jika terjemahan kosong, biarkan cache[k] tetap kosong
                             if t and t.strip():
                                 cache[k] = t
                                 done += 1
                             else:
                                 cache[k] = ""  # Pastikan kosong jika gagal
-                        
+
                         # Save cache every chunk
                         if cache_file:
                             cache_file.write_text(
@@ -394,42 +590,90 @@ def translate_lines_realtime(
                                          ensure_ascii=False, indent=0), 
                                 encoding="utf-8"
                             )
-                        
+
                         # Call chunk done callback
                         if on_chunk_done:
-                            on_chunk_done([(k, cache[k]) for k in sub_idx])
-                            
+                            on_chunk_done([(k, cache[k]) for k, _ in chunk])
+
                         break
-                        
+
                     except Exception as e:
                         print(f"DeepSeek chunk {start}-{end} failed (attempt {attempt}): {e}")
                         if attempt == 3:
                             # Final fallback: kosongkan semua terjemahan di chunk ini
-                            for k in sub_idx:
+                            chunk = dd.expand((k, "") for k in sub_idx)
+                            for k, _ in chunk:
                                 cache[k] = ""
                             if on_chunk_done:
-                                on_chunk_done([(k, "") for k in sub_idx])
+                                on_chunk_done(chunk)
                             break
-                            
+
                         wait = 2**attempt + random.random()
                         print(f"Retry in {wait:.1f}s ...")
                         await asyncio.sleep(wait)
-                
+
                 # Progress update
-                pct = int(done * 100 / n) if n else 100
-                if pct != last_print:
-                    print(f"[translate] {pct:3d}% ({done}/{n})")
-                    last_print = pct
-                    if on_progress:
-                        on_progress(done, n, pct)
-
-    if plan:
+                report_progress()
+
+    async def repair_worker(groups):
+        nonlocal done
+        client = http_client.get_async_client()
+        while groups:
+            async with ctl.aslot():
+                if not groups:
+                    break
+                grp = groups.pop(0)
+                ctx = neighbours(grp, n, lambda k: (lines[k], cache.get(k, "")))
+                try:
+                    out = await _ds_call_async(client, api_key, [lines[k] for k in grp], timeout, ctx,
+                                               tm_lookup=False)
+                except Exception as e:
+                    print(f"DeepSeek repair {grp[0]}-{grp[-1]} failed: {e}")
+                    continue
+                fixed = []
+                for k, t in dd.expand(zip(grp, out)):
+                    if not is_failed(lines[k], t):
+                        done += 0 if cache.get(k) else 1
+                        cache[k] = t
+                        fixed.append((k, t))
+                if fixed:
+                    save_cache()
+                    if on_chunk_done:
+                        on_chunk_done(fixed)
+                report_progress()
+
+    async def repair_async():
+        # Tahap repair: hanya index yang gagal (dari semua batch), batch kecil + konteks tetangga
+        for rnd in range(1, REPAIR_ROUNDS + 1):
+            failed = failed_lines()
+            if not failed:
+                return
+            groups = repair_groups(failed)
+            print(f"[translate] repair {rnd}/{REPAIR_ROUNDS}: {len(failed)} baris dalam {len(groups)} request")
+            await asyncio.gather(*[repair_worker(groups) for _ in range(min(ctl.max_workers, len(groups)))])
+        left = failed_lines()
+        if left:
+            print(f"[translate] {len(left)} baris tetap gagal setelah repair")
+
+    if plan or failed_lines():
         async def main_async():
-            shards = [[] for _ in range(max(1, int(workers)))]
-            for t, job in enumerate(plan):
-                shards[t % len(shards)].append(job)
-            await asyncio.gather(*[worker(sh) for sh in shards])
+            # worker sebanyak batas atas; yang benar-benar jalan dibatasi slot controller
+            try:
+                if plan:
+                    await asyncio.gather(*[worker(plan) for _ in range(min(ctl.max_workers, len(plan)))])
+                await repair_async()
+            finally:
+                await http_client.aclose_async_client()
         asyncio.run(main_async())
+        st = ctl.snapshot()
+        print(f"[translate] controller: concurrency {st['concurrency']} batch {st['batch_size']} "
+              f"(429 {st['counts']['rate_limited']}, timeout {st['counts']['timeout']}, "
+              f"mismatch {st['counts']['mismatch']})")
+        ps = packer.stats()
+        print(f"[translate] packing: {ps['requests']} request, {ps['avg_lines']} baris/request, "
+              f"isi budget output {ps['fill']:.0%} dari {ps['budget_tokens']} token")
+        if dd.saved:
+            print(f"[translate] dedup: hemat {dd.saved} baris API ({len(dd.reps)} unik dari {len(dd.todo)})")
     else:
         print("[translate] nothing to do (all cached)")
         if on_progress:
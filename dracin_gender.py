@@ -16,10 +16,12 @@ import torch.nn.functional as F
 import torchaudio
 import numpy as np
 
-from pyannote.audio import Pipeline
-from speechbrain.inference.speaker import EncoderClassifier
 from torch.serialization import add_safe_globals
 
+from model_registry import get_diarization_pipeline, get_ecapa, ECAPA_REPO
+from ecapa_batch import embed_batch
+from embedding_cache import get_embedding_cache, audio_hash, span_ms, WHOLE_FILE
+
 # Allowlist classes used in pyannote checkpoints
 import omegaconf
 add_safe_globals([omegaconf.listconfig.ListConfig, torch.torch_version.TorchVersion])
@@ -66,12 +68,8 @@ class ECAPAEmbedder:
     def __init__(self, device: torch.device, min_sec: float = 1.2, sr: int = 16000):
         self.device = device
         self.min_samples = int(min_sec * sr)
-        # Load encoder
-        # Catatan: SpeechBrain 1.0 memindah modul ke `speechbrain.inference.*`
-        self.enc = EncoderClassifier.from_hparams(
-            source="speechbrain/spkrec-ecapa-voxceleb",
-            run_opts={"device": str(device)}
-        )
+        # Encoder dari registry (dimuat sekali per proses, cache offline)
+        self.enc = get_ecapa(device)
         self.sr = sr
 
     @torch.inference_mode()
@@ -92,8 +90,30 @@ class ECAPAEmbedder:
         emb = self.enc.encode_batch(x).squeeze(0).squeeze(0)  # [D]
         return emb.detach().cpu().numpy()
 
+    def embed_many(self, wavs) -> np.ndarray:
+        """Banyak segmen sekaligus (mini-batch per panjang) → [N, D], urutan input."""
+        return embed_batch(self.enc, wavs, self.device, min_samples=self.min_samples, pad_mode="center")
+
+    def model_id(self) -> str:
+        return f"{ECAPA_REPO}|pad=center:{self.min_samples}"
+
+    def embed_spans(self, cache, audio_path, wav, spans) -> np.ndarray:
+        """Span (detik) dari audio_path lewat cache di disk; hanya yang belum ada yang di-encode."""
+        keys = [span_ms(a, b) for a, b in spans]
+        return cache.get_or_compute(
+            audio_hash(audio_path), self.model_id(), keys,
+            lambda idx: self.embed_many([slice_wav(wav, self.sr, *spans[i]) for i in idx]),
+        )
 
-def main():
+    def embed_file(self, cache, path) -> np.ndarray:
+        """Satu file utuh (referensi male/female) lewat cache di disk."""
+        return cache.get_or_compute(
+            audio_hash(path), self.model_id(), [WHOLE_FILE],
+            lambda idx: [self(load_wav(Path(path), target_sr=self.sr, mono=True)[0].to(self.device))],
+        )[0]
+
+
+def main(argv=None):
     ap = argparse.ArgumentParser()
     ap.add_argument("--audio", required=True, help="Path WAV 16k mono (atau akan di-resample dulu)")
     ap.add_argument("--male_ref", required=True, help="Contoh suara Male (wav)")
@@ -102,7 +122,7 @@ def main():
     ap.add_argument("--top_n", type=int, default=3, help="Ambil N segmen terpanjang per speaker")
     ap.add_argument("--hf_token", default=os.getenv("HF_TOKEN") or os.getenv("HUGGINGFACE_TOKEN") or os.getenv("HF_API_TOKEN"))
     ap.add_argument("--use_gpu", action="store_true", help="Pakai CUDA kalau tersedia")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
 
     outdir = Path(args.outdir); outdir.mkdir(parents=True, exist_ok=True)
 
@@ -118,12 +138,7 @@ def main():
         raise RuntimeError("HuggingFace token diperlukan (--hf_token) untuk pyannote/speaker-diarization-3.1")
 
     print("Loading diarization pipeline...")
-    pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1", use_auth_token=args.hf_token)
-    try:
-        pipeline.to(device)
-    except Exception:
-        # beberapa build tidak mendukung .to(device); tetap jalan di CPU
-        pass
+    pipeline = get_diarization_pipeline(args.hf_token, device)
 
     print("Running diarization…")
     diar = pipeline({"audio": str(args.audio)})
@@ -137,10 +152,10 @@ def main():
     # ---- Embedding engine (SpeechBrain ECAPA) ----
     embedder = ECAPAEmbedder(device=device, min_sec=1.2, sr=16000)
 
-    mref_wav, _ = load_wav(Path(args.male_ref), target_sr=16000, mono=True)
-    fref_wav, _ = load_wav(Path(args.female_ref), target_sr=16000, mono=True)
-    mref_emb = embedder(mref_wav.to(device))
-    fref_emb = embedder(fref_wav.to(device))
+    # cache embedding di outdir (embeddings.sqlite): run ulang tidak encode ulang
+    emb_cache = get_embedding_cache(outdir)
+    mref_emb = embedder.embed_file(emb_cache, args.male_ref)
+    fref_emb = embedder.embed_file(emb_cache, args.female_ref)
 
     # ---- Agregasi per speaker (top-N segmen terpanjang) ----
     from collections import defaultdict
@@ -150,13 +165,16 @@ def main():
     for spk in by_spk:
         by_spk[spk].sort(key=lambda x: (x["end"] - x["start"]), reverse=True)
 
+    # semua segmen top-N dari semua speaker → satu panggilan batch
+    picks = [(spk, s) for spk, lst in by_spk.items() for s in lst[: max(1, args.top_n)]]
+    pick_embs = embedder.embed_spans(emb_cache, args.audio, wav, [(s["start"], s["end"]) for _, s in picks])
+    embs_by = defaultdict(list)
+    for (spk, _), e in zip(picks, pick_embs):
+        embs_by[spk].append(e)
+
     speakers = {}
-    for spk, lst in by_spk.items():
-        picks = lst[: max(1, args.top_n)]
-        embs = []
-        for s in picks:
-            ch = slice_wav(wav, 16000, s["start"], s["end"])
-            embs.append(embedder(ch.to(device)))
+    for spk in by_spk:
+        embs = embs_by[spk]
         spk_emb = embs[0] if len(embs) == 1 else np.mean(np.stack(embs, 0), 0)
         
         # === GANTI BAGIAN INI ===
@@ -3,8 +3,9 @@
 # All-in-one CLI: SRT -> diarize+gender -> MT (DeepSeek) -> TTS (Edge) -> mix -> mux
 # ------------------------------------------------------------
 
-import argparse, os, re, json, subprocess, tempfile, shutil, math, time, asyncio, sys
+import argparse, os, re, json, subprocess, tempfile, shutil, math, time, asyncio, sys, threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import ctypes
 import random
@@ -12,6 +13,9 @@ from typing import List, Dict, Tuple, Optional
 import torch
 import shlex
 from deepseek_mt import translate_lines_realtime
+from tts_cache import get_tts_cache, tts_key
+from speaker_index import load_speaker_index
+from srt_model import load_srt, ms_to_s
 
 try:
     from config_drama_china import DRAMA_CHINA_CONFIG
@@ -34,11 +38,6 @@ def clear_gpu_memory():
         torch.cuda.empty_cache()
         torch.cuda.synchronize()
 
-SRT_BLOCK_RE = re.compile(
-    r"(\d+)\s+([\d:,]+)\s-->\s([\d:,]+)\s+(.*?)(?:\n{2,}|\Z)",
-    re.S
-)
-
 def shortpath(p: Path) -> str:
     """Convert Windows path to 8.3 short form to avoid WinError 206 on long commands."""
     s = str(p)
@@ -184,10 +183,31 @@ def load_elevenlabs_api_keys(api_keys_text: str = None, api_keys_file: Path = No
     # Remove duplicates
     return list(dict.fromkeys(keys))
 
+_EL_VOICES: Dict[Tuple[str, str], str] = {}
+_EL_VOICES_LOCK = threading.Lock()
+
+def _elevenlabs_voice(voice: str, api_key: str):
+    """
+    Nama voice ("Josh") → voice_id untuk api_key ini. voices() di SDK selalu memakai key global,
+    jadi set_api_key + lookup dijalankan di bawah lock dan hasilnya di-cache per (key, nama);
+    generate() sendiri menerima api_key per request → aman dipanggil paralel dari pool TTS.
+    """
+    from elevenlabs import is_voice_id, set_api_key, voices
+    if is_voice_id(voice):
+        return voice
+    with _EL_VOICES_LOCK:
+        if (api_key, voice) not in _EL_VOICES:
+            set_api_key(api_key)
+            match = next((v for v in voices() if v.name == voice), None)
+            if match is None:
+                raise ValueError(f"voice_not_found: {voice}")
+            _EL_VOICES[(api_key, voice)] = match.voice_id
+        return _EL_VOICES[(api_key, voice)]
+
 def elevenlabs_synth(text, voice_id, out_mp3: Path, api_keys: list, retries=3):
     """Generate MP3 via ElevenLabs dengan fallback multiple API keys"""
     try:
-        from elevenlabs import generate, set_api_key
+        from elevenlabs import generate
     except ImportError:
         print("ERROR: elevenlabs belum terpasang. pip install elevenlabs")
         return False
@@ -196,12 +216,12 @@ def elevenlabs_synth(text, voice_id, out_mp3: Path, api_keys: list, retries=3):
     for api_key_index, api_key in enumerate(api_keys):
         for attempt in range(1, retries+1):
             try:
-                set_api_key(api_key)
                 print(f"ElevenLabs> Voice {voice_id} -> {out_mp3.name} (key {api_key_index+1}/{len(api_keys)}, try {attempt}/{retries})")
                 
                 audio = generate(
                     text=text,
-                    voice=voice_id,
+                    api_key=api_key,
+                    voice=_elevenlabs_voice(voice_id, api_key),
                     model="eleven_multilingual_v2"
                 )
                 
@@ -259,16 +279,21 @@ def tts_line_elevenlabs(text: str, gender: str, base_path: Path,
     mp3 = base_path.parent / (base_path.name + "_raw.mp3")
     wav = base_path.parent / (base_path.name + "_raw.wav")
 
-    ok = elevenlabs_synth(text, voice_id, mp3, api_keys)
-    if not ok:
-        # fallback: buat silence
-        run(["ffmpeg", "-y", "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=48000",
-             "-t", "0.2", shortpath(wav)])
+    # Cache global: teks+voice sama → tanpa API call
+    cache = get_tts_cache()
+    key = tts_key("elevenlabs", voice_id, text, model="eleven_multilingual_v2")
+    if cache.get(key, wav):
         return wav
+
+    # retry ditangani tts_segments_pool; di sini cukup failover antar API key
+    ok = elevenlabs_synth(text, voice_id, mp3, api_keys, retries=1)
+    if not ok:
+        return None   # pool retry, gagal final → silence sepanjang segmen
     
     # Konversi MP3 ke WAV dengan kualitas yang baik
     mp3_to_wav(mp3, wav)
     mp3.unlink(missing_ok=True)
+    cache.put(key, wav)
     return wav
 
 def mp3_to_wav(mp3_path: Path, wav_path: Path):
@@ -383,7 +408,7 @@ def adjust_to_duration(in_wav: Path, target_dur: float, out_wav: Path,
          shortpath(out_wav)])
 
 def build_entries_with_speakers(srt_path: Path, segjson: Path, spkjson: Path):
-    segs = json.loads(segjson.read_text(encoding="utf-8"))["segments"]
+    spk_index = load_speaker_index(segjson)  # interval index, di-cache per file segments
     spkmap = json.loads(spkjson.read_text(encoding="utf-8"))["speakers"]
     # === NEW: per-index gender overrides (persisten) ===
     try:
@@ -391,36 +416,21 @@ def build_entries_with_speakers(srt_path: Path, segjson: Path, spkjson: Path):
         _ov_idx = json.loads(_ov_path.read_text(encoding="utf-8")).get("by_index", {}) if _ov_path.exists() else {}
     except Exception:
         _ov_idx = {}
-    def who_speaks(t0, t1):
-        best = None; best_ol = 0.0; best_gap = 1e9
-        for seg in segs:
-            a0, a1 = t0, t1
-            b0, b1 = seg["start"], seg["end"]
-            ol = max(0.0, min(a1, b1) - max(a0, b0))
-            if ol > best_ol:
-                best_ol = ol; best = seg["speaker"]; best_gap = 0.0
-            elif ol == 0.0:
-                # fallback: pilih segmen yang paling dekat (ujung-ke-ujung)
-                gap = min(abs(a0 - b1), abs(b0 - a1))
-                if gap < best_gap:
-                    best_gap = gap; best = seg["speaker"]
-        return best
+    # overlap terbesar; tanpa overlap → segmen terdekat (ujung-ke-ujung)
+    who_speaks = spk_index.who
 
     entries = []
-    raw = srt_path.read_text(encoding="utf-8", errors="ignore")
-    for m in SRT_BLOCK_RE.finditer(raw):
-        idx, start, end, text = m.groups()
-        t0 = parse_time(start); t1 = parse_time(end)
+    for idx, s_ms, e_ms, text in load_srt(srt_path):
+        t0 = ms_to_s(s_ms); t1 = ms_to_s(e_ms)
         spk = who_speaks(t0, t1)
         gender = spkmap.get(spk, {}).get("gender", "Unknown")  # default dari speaker
 
         # NEW: override per index (jika ada)
-        ov = _ov_idx.get(str(int(idx)))
+        ov = _ov_idx.get(str(idx))
         if ov in ("Male", "Female", "Unknown"):
             gender = ov
 
-        txt = text.strip()
-        entries.append((int(idx), t0, t1, txt, spk, gender))
+        entries.append((idx, t0, t1, text, spk, gender))
     entries.sort(key=lambda x: x[0])
     return entries
 
@@ -443,6 +453,11 @@ def tts_line_edge(text: str, gender: str, base_path: Path,
     mp3 = base_path.parent / (base_path.name + "_raw.mp3")
     wav = base_path.parent / (base_path.name + "_raw.wav")
 
+    cache = get_tts_cache()
+    key = tts_key("edge", voice, text, rate=rate, volume=volume, pitch=pitch)
+    if cache.get(key, wav):
+        return wav
+
     ok = edge_tts_synth(text, voice, mp3, rate=rate, volume=volume, pitch=pitch)
     if not ok:
         # fallback: buat 0.2s silence agar pipeline tetap lanjut
@@ -453,8 +468,173 @@ def tts_line_edge(text: str, gender: str, base_path: Path,
     # Konversi MP3 ke WAV dengan kualitas yang baik
     mp3_to_wav(mp3, wav)
     mp3.unlink(missing_ok=True)
+    cache.put(key, wav)
     return wav
     
+# ================
+# TTS synthesis pool (bounded concurrency, satu event loop)
+# ================
+# Batas request TTS yang jalan bersamaan per engine (ElevenLabs lebih ketat rate-limit-nya)
+TTS_CONCURRENCY = {"edge": 6, "elevenlabs": 2}
+
+async def edge_tts_synth_async(text, voice, out_mp3: Path, rate="+0%", volume="+0%", pitch="+0Hz", retries=6):
+    """Versi async edge_tts_synth: dipanggil di event loop pool, tanpa asyncio.run per baris."""
+    try:
+        import edge_tts
+    except ImportError:
+        print("ERROR: edge-tts belum terpasang. pip install edge-tts")
+        return False
+
+    for attempt in range(1, retries+1):
+        try:
+            print(f"edge-tts> {voice} -> {out_mp3.name} (try {attempt}/{retries})")
+            comm = edge_tts.Communicate(text, voice, rate=rate, volume=volume, pitch=pitch)
+            await comm.save(str(out_mp3))
+            if out_mp3.exists() and out_mp3.stat().st_size > 1000:
+                return True
+            print(f"❌ Edge TTS output file invalid: {out_mp3}")
+        except Exception as e:
+            if attempt == retries:
+                print(f"edge-tts gagal (final): {e}")
+                return False
+            wait = 2**attempt + random.random()
+            print(f"edge-tts gagal (try {attempt}): {e}. Retry {wait:.1f}s ...")
+            await asyncio.sleep(wait)
+    return False
+
+async def tts_line_edge_async(text: str, gender: str, base_path: Path,
+                              voice_male: str, voice_female: str, voice_unknown: str,
+                              rate: str, volume: str, pitch: str) -> Path:
+    """Sama seperti tts_line_edge, tapi synth-nya async dan ffmpeg jalan di thread."""
+    if gender == "Male":
+        voice = voice_male
+    elif gender == "Female":
+        voice = voice_female
+    else:
+        voice = voice_unknown
+
+    mp3 = base_path.parent / (base_path.name + "_raw.mp3")
+    wav = base_path.parent / (base_path.name + "_raw.wav")
+
+    cache = get_tts_cache()
+    key = tts_key("edge", voice, text, rate=rate, volume=volume, pitch=pitch)
+    if await asyncio.to_thread(cache.get, key, wav):
+        return wav
+
+    # retry + backoff ditangani tts_segments_pool (satu lapis)
+    ok = await edge_tts_synth_async(text, voice, mp3, rate=rate, volume=volume, pitch=pitch, retries=1)
+    if not ok:
+        return None   # pool retry, gagal final → silence sepanjang segmen
+
+    await asyncio.to_thread(mp3_to_wav, mp3, wav)
+    mp3.unlink(missing_ok=True)
+    await asyncio.to_thread(cache.put, key, wav)
+    return wav
+
+def tts_segments_pool(entries, work: Path, synth, engine="edge", concurrency=None,
+                      retries=2, timeout=None, resume=True,
+                      max_atempo=1.8, fade=0.02, on_progress=None, log=print):
+    """
+    Scheduler TTS bersama untuk CLI, web, dan GUI.
+    - entries: list (idx, t0, t1, text, spk, gender)
+    - synth(clean_text, gender, base) -> Path raw wav / None; boleh sync (jalan di thread) atau async def
+    - Maks `concurrency` request synth in-flight (default TTS_CONCURRENCY[engine]),
+      ffmpeg adjust dibatasi jumlah CPU.
+    - Retry + backoff per item (satu-satunya lapis retry; synth cukup satu percobaan,
+      return None / raise kalau gagal); gagal final → silence sepanjang durasi.
+    - Tiap percobaan menulis ke base sendiri (seg_XXXXX.tN) lalu di-rename ke seg_XXXXX_raw.*
+      kalau sukses → thread percobaan lama yang kena timeout tidak menimpa file percobaan baru.
+    - synth sync jalan di executor sendiri berukuran `concurrency` (thread yang kena timeout
+      tidak bisa dihentikan; jumlahnya dibatasi, tidak menumpuk di default executor).
+    - Kontrak resume tetap: seg_{idx:05d}.wav yang sudah ada (size > 0) dipakai ulang.
+    - on_progress(done, total, idx) dipanggil di thread pemanggil.
+    Return segfiles [(t0, seg_wav, dur)] dengan urutan sama seperti entries.
+    """
+    total = len(entries)
+    results = [None] * total
+    limit = max(1, int(concurrency or TTS_CONCURRENCY.get(engine, 4)))
+    is_async = asyncio.iscoroutinefunction(synth)
+    executor = None if is_async else ThreadPoolExecutor(max_workers=limit, thread_name_prefix="tts")
+
+    async def _synth_once(clean, gender, base):
+        if is_async:
+            coro = synth(clean, gender, base)
+        else:
+            coro = asyncio.get_running_loop().run_in_executor(executor, synth, clean, gender, base)
+        if timeout:
+            return await asyncio.wait_for(coro, max(5, timeout))
+        return await coro
+
+    async def _one(i, entry, sem_api, sem_ff, counter):
+        idx, t0, t1, text, spk, gender = entry
+        dur = max(0.05, t1 - t0)
+        base = work / f"seg_{idx:05d}"
+        adj_wav = work / f"seg_{idx:05d}.wav"
+
+        if resume and adj_wav.exists() and adj_wav.stat().st_size > 0:
+            try:
+                seg_dur = await asyncio.to_thread(ffprobe_duration, adj_wav)
+            except Exception:
+                seg_dur = dur
+            results[i] = (t0, adj_wav, seg_dur)
+        else:
+            clean = sanitize_text_for_tts(text)
+            raw_wav, err = None, None
+            if clean:
+                async with sem_api:
+                    for attempt in range(1, retries + 2):
+                        try:
+                            raw_wav = await _synth_once(clean, gender, work / f"{base.name}.t{attempt}")
+                            err = None if raw_wav else "no output"
+                        except asyncio.TimeoutError:
+                            raw_wav, err = None, "timeout"
+                        except Exception as e:
+                            raw_wav, err = None, e
+                        if raw_wav and Path(raw_wav).exists():
+                            raw = Path(raw_wav)
+                            raw_wav = raw.replace(work / f"{base.name}_raw{raw.suffix}")
+                            break
+                        raw_wav = None
+                        if attempt <= retries:
+                            wait = 2**attempt + random.random()
+                            log(f"[TTS] seg#{idx} gagal (try {attempt}): {err}. Retry {wait:.1f}s ...")
+                            await asyncio.sleep(wait)
+
+            async with sem_ff:
+                if raw_wav is None:
+                    if clean:
+                        log(f"[WARN] TTS seg#{idx} gagal ({err}), pakai silence.")
+                    await asyncio.to_thread(run, ["ffmpeg", "-y", "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=48000",
+                                                  "-t", f"{dur:.3f}", shortpath(adj_wav)])
+                else:
+                    tmp_out = work / f"{adj_wav.stem}.tmp.wav"
+                    await asyncio.to_thread(adjust_to_duration, Path(raw_wav), dur, tmp_out,
+                                            1.2, max_atempo, fade)
+                    if adj_wav.exists():
+                        adj_wav.unlink()
+                    tmp_out.rename(adj_wav)
+            results[i] = (t0, adj_wav, dur)
+
+        counter[0] += 1
+        if on_progress:
+            try:
+                on_progress(counter[0], total, idx)
+            except Exception:
+                pass
+
+    async def _main():
+        sem_api = asyncio.Semaphore(limit)
+        sem_ff = asyncio.Semaphore(max(1, os.cpu_count() or 4))
+        counter = [0]
+        await asyncio.gather(*(_one(i, e, sem_api, sem_ff, counter) for i, e in enumerate(entries)))
+
+    try:
+        asyncio.run(_main())
+    finally:
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+    return [r for r in results if r is not None]
+
 def prevent_overlap(segfiles, work: Path):
     """Fixed version: Prevent overlap dengan gap yang reasonable"""
     if not segfiles:
@@ -602,6 +782,144 @@ def chunked_mix(work: Path, video_dur: float, segfiles: list, final_wav: Path, c
     # except Exception:
     #     pass
 
+# ---------- Mixing backend: single-pass memmap ----------
+MIX_SR = 48000
+MIX_CHANNELS = 2
+MIX_BACKENDS = ("memmap", "ffmpeg")
+
+def _read_seg_f32(path: Path, sr: int = MIX_SR, channels: int = MIX_CHANNELS):
+    """Decode satu seg wav → float32 [frames, channels]. Fast path wave (s16), fallback ffmpeg pipe."""
+    import wave
+    import numpy as np
+    try:
+        with wave.open(str(path), "rb") as w:
+            if w.getsampwidth() == 2 and w.getframerate() == sr and w.getnchannels() == channels:
+                raw = w.readframes(w.getnframes())
+                return np.frombuffer(raw, dtype="<i2").reshape(-1, channels).astype(np.float32) / 32768.0
+    except Exception:
+        pass
+    p = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", shortpath(path),
+         "-f", "f32le", "-ac", str(channels), "-ar", str(sr), "-"],
+        stdout=subprocess.PIPE, check=True
+    )
+    return np.frombuffer(p.stdout, dtype="<f4").reshape(-1, channels)
+
+def _overlay(buf, data, start: int, lo: int = 0):
+    """Tambah data ke buf mulai frame `start`; hanya sampel di posisi >= lo yang ditulis."""
+    a = max(start, lo)
+    b = min(start + len(data), len(buf))
+    if b > a:
+        buf[a:b] += data[a - start:b - start]
+
+def memmap_mix(work: Path, video_dur: float, segfiles: list, final_wav: Path,
+               checkpoint_every=50, sr: int = MIX_SR):
+    """
+    Mixing satu kali jalan: tiap seg_*.wav di-decode sekali lalu ditumpuk (sample-accurate)
+    ke timeline float32 memmap sepanjang video_dur, lalu ditulis jadi final_wav (s16) sekali.
+    Resume-aware (sama seperti chunked_mix):
+      1) Jika final_wav sudah ada → skip mixing.
+      2) Buffer di-checkpoint tiap `checkpoint_every` segmen (mix_timeline.f32 + .json).
+         Saat resume, area setelah frontier checkpoint di-nol-kan lalu segmen dilanjutkan,
+         jadi segmen yang sempat ditambah setelah checkpoint tidak terhitung dobel.
+    """
+    import wave
+    import numpy as np
+
+    try:
+        if final_wav.exists() and final_wav.stat().st_size > 0:
+            print(f"[resume] Skip mixing: {final_wav.name} sudah ada.")
+            return
+    except Exception:
+        pass
+
+    work.mkdir(parents=True, exist_ok=True)
+    ch = MIX_CHANNELS
+    frames = max(1, int(round(video_dur * sr)))
+    buf_path = work / "mix_timeline.f32"
+    ckpt_path = work / "mix_timeline.json"
+
+    # Urutkan segmen (t0, path, dur); signature untuk validasi checkpoint
+    segfiles.sort(key=lambda x: x[0])
+    starts = [int(round(max(0.0, t0) * sr)) for (t0, _, _) in segfiles]
+    sig = [[s, str(p)] for s, (_, p, _) in zip(starts, segfiles)]
+
+    done = 0
+    ends = []  # frame akhir tiap segmen yang sudah ditumpuk
+    ckpt = {}
+    if buf_path.exists() and ckpt_path.exists():
+        try:
+            ckpt = json.loads(ckpt_path.read_text(encoding="utf-8"))
+        except Exception:
+            ckpt = {}
+    resumable = (ckpt.get("frames") == frames and ckpt.get("sr") == sr
+                 and ckpt.get("channels") == ch and ckpt.get("sig") == sig
+                 and buf_path.stat().st_size == frames * ch * 4)
+
+    if resumable:
+        buf = np.memmap(buf_path, dtype=np.float32, mode="r+", shape=(frames, ch))
+        done = int(ckpt.get("done", 0))
+        ends = list(ckpt.get("ends", []))[:done]
+        frontier = starts[done] if done < len(starts) else frames
+        # Buang sisa penulisan setelah checkpoint, lalu kembalikan ekor segmen lama yang melewati frontier
+        buf[frontier:] = 0.0
+        for k in range(done):
+            if k >= len(ends) or ends[k] > frontier:
+                _overlay(buf, _read_seg_f32(segfiles[k][1], sr, ch), starts[k], lo=frontier)
+        print(f"[resume] Lanjut memmap mix dari segmen #{done+1}/{len(segfiles)}")
+    else:
+        buf = np.memmap(buf_path, dtype=np.float32, mode="w+", shape=(frames, ch))
+
+    def _checkpoint(n):
+        buf.flush()
+        tmp = ckpt_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps({"sr": sr, "channels": ch, "frames": frames,
+                                   "sig": sig, "done": n, "ends": ends[:n]}), encoding="utf-8")
+        os.replace(tmp, ckpt_path)
+
+    for k in range(done, len(segfiles)):
+        _, pth, _ = segfiles[k]
+        n = 0
+        try:
+            data = _read_seg_f32(pth, sr, ch)
+            _overlay(buf, data, starts[k])
+            n = len(data)
+        except Exception as e:
+            print(f"[WARN] Mix skip {Path(pth).name}: {e}")
+        ends.append(starts[k] + n)
+        if (k + 1) % max(1, checkpoint_every) == 0:
+            _checkpoint(k + 1)
+    _checkpoint(len(segfiles))
+
+    # Tulis final sekali jalan (blok per blok → s16), lewat file tmp supaya atomic
+    tmp_wav = final_wav.with_suffix(".tmp.wav")
+    block = sr * 30
+    with wave.open(str(tmp_wav), "wb") as w:
+        w.setnchannels(ch); w.setsampwidth(2); w.setframerate(sr)
+        for a in range(0, frames, block):
+            x = np.clip(buf[a:a + block], -1.0, 1.0)
+            w.writeframes((x * 32767.0).astype("<i2").tobytes())
+    del buf
+    os.replace(tmp_wav, final_wav)
+
+    for pth in (buf_path, ckpt_path):
+        try: pth.unlink()
+        except Exception: pass
+
+def mix_dubtrack(work: Path, video_dur: float, segfiles: list, final_wav: Path,
+                 backend="memmap", chunk_size=400):
+    """Pilih backend mixing: 'memmap' (single-pass NumPy) atau 'ffmpeg' (chunked_mix lama)."""
+    if backend == "memmap":
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            print("⚠️ numpy belum terpasang, fallback ke ffmpeg chunked mix. pip install numpy")
+            backend = "ffmpeg"
+    if backend == "memmap":
+        memmap_mix(work, video_dur, segfiles, final_wav)
+    else:
+        chunked_mix(work, video_dur, segfiles, final_wav, chunk_size=chunk_size)
+
 def mux_video(args, video: Path, dub_wav: Path, out_video: Path):
     """
     Jika --replace_audio: pakai dub audio saja.
@@ -677,10 +995,15 @@ def main():
     ap.add_argument("--edge_volume", default="+0%")
     ap.add_argument("--edge_pitch", default="+0Hz")
 
+    ap.add_argument("--tts_concurrency", type=int, default=0,
+                    help="Jumlah request TTS paralel (0 = default per engine)")
+
     # Timing/tempo
     ap.add_argument("--max_atempo", type=float, default=1.7, help="Batas percepatan max (tanpa perlambat)")
     ap.add_argument("--fade_sec", type=float, default=0.04)
     ap.add_argument("--mix_chunk", type=int, default=400, help="Jumlah seg per tahap mixing untuk hindari command kepanjangan")
+    ap.add_argument("--mix_backend", default="memmap", choices=list(MIX_BACKENDS),
+                    help="memmap = single-pass NumPy timeline; ffmpeg = chunked_mix lama")
 
     # Output video
     ap.add_argument("--replace_audio", action="store_true", help="Ganti audio asli dengan dub saja (tanpa BGM).")
@@ -745,11 +1068,10 @@ def main():
         print("⚠️ Diarization dilewati (tidak ada audio)")
 
     # ========== 2) Translate SRT (DeepSeek with IMPROVED processing) ==========
-    raw = srt_work.read_text(encoding="utf-8", errors="ignore")
+    src_sub = load_srt(srt_work)
 
     src_blocks = []
-    for m in SRT_BLOCK_RE.finditer(raw):
-        idx, start, end, text = m.groups()
+    for text in src_sub.texts:
         # Hanya bersihkan tag speaker, biarkan preprocessing ke deepseek_mt
         clean_text = text.strip()
         clean_text = re.sub(r"\[.*?\]\s*\(Speaker.*?\)\s*", "", clean_text)
@@ -781,9 +1103,8 @@ def main():
     # tulis SRT Indonesia
     srt_id = work / f"{stem}.id.srt"
     out_lines = []
-    for m, trans in zip(SRT_BLOCK_RE.finditer(raw), final_blocks):
-        idx, start, end, _ = m.groups()
-        out_lines.append(f"{idx}\n{start} --> {end}\n{trans}\n\n")
+    for i, trans in zip(range(len(src_sub)), final_blocks):
+        out_lines.append(f"{src_sub.index[i]}\n{src_sub.start_ts(i)} --> {src_sub.end_ts(i)}\n{trans}\n\n")
     srt_id.write_text("".join(out_lines), encoding="utf-8")
     print("SRT Indonesia:", srt_id)
 
@@ -793,11 +1114,8 @@ def main():
     else:
         # Jika tidak ada diarization, buat entries tanpa speaker info
         entries = []
-        raw = srt_id.read_text(encoding="utf-8", errors="ignore")
-        for m in SRT_BLOCK_RE.finditer(raw):
-            idx, start, end, text = m.groups()
-            t0 = parse_time(start); t1 = parse_time(end)
-            entries.append((int(idx), t0, t1, text.strip(), "Unknown", "Unknown"))
+        for idx, s_ms, e_ms, text in load_srt(srt_id):
+            entries.append((idx, ms_to_s(s_ms), ms_to_s(e_ms), text, "Unknown", "Unknown"))
         entries.sort(key=lambda x: x[0])
 
     # ========== 4) TTS per baris & penyesuaian durasi ==========
@@ -820,51 +1138,42 @@ def main():
             print("⚠️ Tidak ada API keys ElevenLabs yang valid, fallback ke Edge TTS")
             args.tts_engine = "edge"
 
-    for (idx, t0, t1, text, spk, gender) in entries:
-        dur = max(0.05, t1 - t0)
-        base = work / f"seg_{idx:05d}"
-        adj_wav = work / f"seg_{idx:05d}.wav"
-
-        if args.resume and adj_wav.exists():
-            segfiles.append((t0, adj_wav, ffprobe_duration(adj_wav)))
-            continue
-
-        clean = sanitize_text_for_tts(text)
-        if not clean:
-            run(["ffmpeg", "-y", "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=48000",
-                 "-t", f"{dur:.3f}", shortpath(adj_wav)])
-            segfiles.append((t0, adj_wav, dur))
-            continue
-
-        # Pilih engine TTS
-        if args.tts_engine == "elevenlabs":
-            raw_wav = tts_line_elevenlabs(
+    # Pilih engine TTS; semua baris dijalankan lewat pool (N request in-flight)
+    if args.tts_engine == "elevenlabs":
+        def synth(clean, gender, base):
+            return tts_line_elevenlabs(
                 clean, gender, base,
                 args.elevenlabs_voice_male,
                 args.elevenlabs_voice_female,
                 args.elevenlabs_voice_unknown,
                 elevenlabs_api_keys
             )
-        else:  # Edge TTS
-            raw_wav = tts_line_edge(
+    else:  # Edge TTS
+        async def synth(clean, gender, base):
+            return await tts_line_edge_async(
                 clean, gender, base,
                 args.edge_voice_male, args.edge_voice_female, args.edge_voice_unknown,
                 args.edge_rate, args.edge_volume, args.edge_pitch
             )
 
-        # Sesuaikan durasi
-        tmp_out = work / f"{adj_wav.stem}.tmp.wav"
-        adjust_to_duration(raw_wav, dur, tmp_out, min_atempo=1.2, max_atempo=args.max_atempo, fade=args.fade_sec)
-        if adj_wav.exists(): adj_wav.unlink()
-        tmp_out.rename(adj_wav)
-        segfiles.append((t0, adj_wav, dur))
+    segfiles = tts_segments_pool(
+        entries, work, synth,
+        engine=args.tts_engine, concurrency=args.tts_concurrency,
+        resume=args.resume, max_atempo=args.max_atempo, fade=args.fade_sec,
+        on_progress=lambda done, total, idx: print(f"[TTS] {done}/{total} (seg#{idx})")
+    )
+
+    st = get_tts_cache().stats()
+    print(f"[TTS cache] hit {st['hits']} / miss {st['misses']} (hit rate {st['hit_rate']:.0%}), "
+          f"{st['entries']} entri, {st['bytes']/1e6:.1f} MB")
 
     # Rapikan overlap antar segmen agar tidak saling bertabrakan
     segfiles = prevent_overlap(segfiles, work)
 
-    # ========== 5) Compose track via chunked mixing ==========
+    # ========== 5) Compose track (memmap single-pass / chunked ffmpeg) ==========
     final_wav = work / f"{stem}_dubtrack.wav"
-    chunked_mix(work, video_dur, segfiles, final_wav, chunk_size=args.mix_chunk)
+    mix_dubtrack(work, video_dur, segfiles, final_wav,
+                 backend=args.mix_backend, chunk_size=args.mix_chunk)
 
     # ========== 6) Mux ke video ==========
     out_video = Path(args.out) if args.out else video.with_name(f"{video.stem}_dub_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4")
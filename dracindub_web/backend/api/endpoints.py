@@ -8,8 +8,17 @@ from core.processor import processing_manager
 from core.session_manager import session_manager
 
 from pydantic import BaseModel
-import json, re, tempfile, zipfile, shutil, subprocess, math, os
+import json, re, tempfile, zipfile, shutil, subprocess, math, os, hashlib, threading
+from collections import OrderedDict
 from typing import List, Optional, Literal, Dict, Any
+import numpy as np
+
+from core.editing_index import SegmentIndex, pick_segments, nearest_bound
+from core.edit_journal import get_edit_journal, JOURNAL_NAME
+from core.artifacts import get_artifacts
+from core.jobs import job_scheduler, Job, JobCancelled, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BATCH
+from core.model_workers import model_workers
+from srt_model import Subtitles, load_srt, srt_from_text, ts_to_ms, ms_to_s
 
 from fastapi import Request
 from starlette.responses import StreamingResponse, Response
@@ -83,6 +92,14 @@ async def extract_audio(
     prefer: str = Form("demucs"),
     pm = Depends(get_processing_manager),
 ):
+    """Antrikan job extract audio (pool ffmpeg). Hasil/progress: GET /api/jobs/{job_id} atau WS 'job_update'."""
+    if not pm.get_session(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    job = job_scheduler.submit("extract_audio", session_id,
+                               {"session_id": session_id, "vocal_only": vocal_only, "prefer": prefer})
+    return JSONResponse({"job_id": job["id"], "status": job["status"]}, status_code=202)
+
+def _extract_audio_job(job: Job, session_id: str, vocal_only: str = "true", prefer: str = "demucs"):
     """
     Demucs-only extractor.
 
@@ -99,7 +116,7 @@ async def extract_audio(
         return shutil.which(cmd) is not None
 
     def _run(cmd: list) -> tuple[int, str, str]:
-        p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        p = job.run(cmd)   # bisa dibatalkan (cancel job → proses di-kill)
         return p.returncode, p.stdout, p.stderr
 
     def _to_16k_mono(inp: Path, outp: Path, gain_db: float = 3.0) -> None:
@@ -115,6 +132,7 @@ async def extract_audio(
         if rc != 0:
             raise HTTPException(status_code=500, detail=f"ffmpeg resample failed:\n{err}")
 
+    pm = get_processing_manager()
     try:
         sess = pm.get_session(session_id)
         if not sess:
@@ -140,6 +158,7 @@ async def extract_audio(
             raise HTTPException(status_code=500, detail="Demucs not installed or not on PATH")
 
         # === 1) Jalankan Demucs langsung dari file video (hemat disk) ===
+        job.progress(5, "Demucs: separating vocals")
         outdir = ws / "_sep_demucs"
         outdir.mkdir(exist_ok=True)
         rc, _, err = _run(demucs_cmd + ["--two-stems=vocals", "-o", str(outdir), str(vid)])
@@ -151,9 +170,13 @@ async def extract_audio(
         #    - no_vocals.wav    -> instrument.wav
         vocals_path = None
         inst_path = None
-        # pilih kandidat terbaru jika lebih dari satu (misal multiple runs)
-        cands_voc = sorted(list(outdir.rglob("vocals.wav")), key=lambda p: p.stat().st_mtime, reverse=True)
-        cands_no  = sorted(list(outdir.rglob("no_vocals.wav")), key=lambda p: p.stat().st_mtime, reverse=True)
+        # layout demucs: <outdir>/<model>/<stem video>/{vocals,no_vocals}.wav
+        # pilih kandidat terbaru jika lebih dari satu (misal beberapa model/run)
+        stem_dirs = [m / vid.stem for m in outdir.iterdir() if (m / vid.stem).is_dir()]
+        cands_voc = sorted([d / "vocals.wav" for d in stem_dirs if (d / "vocals.wav").exists()],
+                           key=lambda p: p.stat().st_mtime, reverse=True)
+        cands_no  = sorted([d / "no_vocals.wav" for d in stem_dirs if (d / "no_vocals.wav").exists()],
+                           key=lambda p: p.stat().st_mtime, reverse=True)
         if cands_voc:
             vocals_path = cands_voc[0]
         if cands_no:
@@ -162,6 +185,7 @@ async def extract_audio(
             raise HTTPException(status_code=500, detail="Demucs output not found: vocals.wav / no_vocals.wav")
 
         # === 3) Tulis final minimal ===
+        job.progress(80, "Resample 16 kHz mono")
         out_16k = ws / "source_video_16k.wav"
         out_bgm = ws / "instrument.wav"
 
@@ -171,6 +195,10 @@ async def extract_audio(
             try: out_bgm.unlink()
             except: pass
         shutil.move(str(inst_path), str(out_bgm))
+        arts = get_artifacts(ws)
+        stems = {"separator": "demucs", "model_dir": vocals_path.parent.parent.name}
+        arts.record(out_16k, "demucs", stems)
+        arts.record(out_bgm, "demucs", stems)
 
         # >>>> TAMBAHKAN INI <<<<
         pm.session_manager.update_session(
@@ -180,22 +208,22 @@ async def extract_audio(
             progress=40,
             current_step='Audio extracted (Demucs)'
         )
-        await pm._notify_session_update(session_id)
+        job.run_async(pm._notify_session_update(session_id))
         # <<<< SAMPAI SINI <<<<
 
         # (opsional) bersihkan folder demucs untuk hemat disk:
         # import shutil as _sh; _sh.rmtree(outdir, ignore_errors=True)
 
-        return JSONResponse({
+        return {
             "status": "audio_extracted",
             "vocal_isolation": "demucs",
             "paths": {
                 "vocals_16k": str(out_16k),
                 "instrument": str(out_bgm),
             }
-        })
+        }
 
-    except HTTPException:
+    except (HTTPException, JobCancelled):
         raise
     except Exception as e:
         import traceback
@@ -221,10 +249,14 @@ async def run_diarization(
 
     pm = Depends(get_processing_manager),
 ):
-    try:
-        result = await pm.run_diarization(
-            session_id,
-            {
+    """Antrikan job diarization (pool model). Hasil/progress: GET /api/jobs/{job_id} atau WS 'job_update'."""
+    if not pm.get_session(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    job = job_scheduler.submit(
+        "diarize", session_id,
+        {
+            "session_id": session_id,
+            "cfg": {
                 "male_ref": male_ref,
                 "female_ref": female_ref,
                 "hf_token": hf_token,
@@ -239,15 +271,22 @@ async def run_diarization(
                 "max_speakers": max_speakers,
                 "min_sample_dur": float(min_sample_dur),
             },
-        )
+        },
+    )
+    return JSONResponse({"job_id": job["id"], "status": job["status"]}, status_code=202)
 
-        return JSONResponse(
-            {
-                "status": "diarization_completed",
-                "segments_path": str(result["segments_path"]),
-                "speakers_path": str(result["speakers_path"]),
-            }
-        )
+def _diarization_job(job: Job, session_id: str, cfg: dict):
+    pm = get_processing_manager()
+    try:
+        job.progress(5, "Diarization")
+        result = job.run_async(pm.run_diarization(session_id, cfg))
+        return {
+            "status": "diarization_completed",
+            "segments_path": str(result["segments_path"]),
+            "speakers_path": str(result["speakers_path"]),
+        }
+    except (HTTPException, JobCancelled):
+        raise
     except Exception as e:
         import traceback
 
@@ -394,6 +433,7 @@ def get_session_srt(
         raise HTTPException(404, "Session not found")
 
     workdir = Path(session.workdir).resolve()
+    get_edit_journal(workdir).flush()
     if not workdir.exists():
         raise HTTPException(404, "Workspace not found")
 
@@ -404,14 +444,8 @@ def get_session_srt(
         except Exception:
             return False
 
-    def latest(patterns):
-        cands = []
-        for pat in patterns:
-            cands += list(workdir.glob(pat))
-            cands += list(workdir.glob(f"**/{pat}"))
-        uniq = {str(p.resolve()): p for p in cands}.values()
-        sorted_cands = sorted(uniq, key=lambda p: p.stat().st_mtime, reverse=True)
-        return sorted_cands[0] if sorted_cands else None
+    def latest(kind):
+        return get_artifacts(workdir).latest(kind)
 
     prefer = (prefer or "auto").lower().strip()
     srt_path: Optional[Path] = None
@@ -424,12 +458,12 @@ def get_session_srt(
             srt_path = None
 
     elif prefer == "gender":
-        srt_path = latest(["*_gender_*.srt"])
+        srt_path = latest("gender_srt")
 
     elif prefer == "translated":
         srt_path = workdir / "translated_latest.srt"
         if not srt_path.exists():
-            srt_path = latest(["translated_*.srt"])
+            srt_path = latest("translated_srt")
 
     else:  # auto
         hint = getattr(session, "srtpath", None)
@@ -439,7 +473,7 @@ def get_session_srt(
                 srt_path = p
 
         if not srt_path:
-            srt_path = latest(["*_gender_*.srt"])
+            srt_path = latest("gender_srt")
 
         if not srt_path:
             p = workdir / "source_subtitles.srt"
@@ -494,6 +528,85 @@ async def translate_session(
     data = await pm.run_translate(session_id, cfg)
     return JSONResponse(data)
 
+async def _translate_ndjson_events(
+    eng, items_to_process, *, all_items, api_key, mode, target_lang,
+    temperature, top_p, batch, workers, timeout, typing_delay_ms,
+    on_result=None, on_batch_done=None,
+):
+    """
+    NDJSON stream bersama untuk /translate/stream (session & manual).
+    Batch jalan paralel (workers in-flight) lewat eng.stream_translate; event `result`
+    dikirim begitu satu baris selesai di respons streaming DeepSeek, sisanya saat batch selesai
+    (bisa tidak urut index). Baris yang diperbaiki tahap repair dikirim lagi sebagai `result`
+    dengan index yang sama (client menimpa per index). on_batch_done (autosave) maksimal sekali
+    per detik + sekali di akhir. Generator ini hanya lanjut saat client membaca, jadi antrean
+    terbatas di stream_translate memberi backpressure.
+    """
+    total = len(items_to_process)
+    try:
+        yield (json.dumps({"type": "begin", "total": total}) + "\n").encode()
+
+        # G = ukuran chunk dari GUI; batasi biar aman (mis. ≤ 50), dibagi ke W worker
+        G = max(1, min(int(batch or 10), 50))
+        W = max(1, int(workers))
+        internal_bs = max(1, (G + W - 1) // W)
+        delay_s = max(0.0, min(float(typing_delay_ms), 200.0) / 1000.0)
+        seen = set()   # index yang sudah dikirim (tahap repair bisa mengirim index yang sama lagi)
+        last_save = time.monotonic()
+        unsaved = False
+
+        stream = eng.stream_translate(
+            items=items_to_process,
+            all_items=all_items,
+            api_key=api_key,
+            style=mode,
+            target_lang=target_lang,
+            temperature=float(temperature),
+            top_p=float(top_p),
+            batch_size=int(internal_bs),
+            workers=W,
+            timeout=int(timeout),
+        )
+        try:
+            async for chunk, results in stream:
+                for item, t in zip(chunk, results):
+                    if on_result:
+                        on_result(item, t)
+                    yield (json.dumps({
+                        "type": "result",
+                        "index": item["index"],
+                        "timestamp": f'{item["start"]} --> {item["end"]}',
+                        "original_text": item["text"],
+                        "translation": t or ""
+                    }) + "\n").encode()
+
+                    seen.add(item["index"])
+                    yield (json.dumps({
+                        "type": "progress",
+                        "done": len(seen),
+                        "total": total
+                    }) + "\n").encode()
+
+                    # delay kosmetik antar item (efek "mengetik")
+                    if delay_s > 0.0:
+                        await asyncio.sleep(delay_s)
+
+                unsaved = True
+                if on_batch_done and time.monotonic() - last_save >= 1.0:
+                    await on_batch_done()
+                    last_save, unsaved = time.monotonic(), False
+        finally:
+            await stream.aclose()
+        if on_batch_done and unsaved:
+            await on_batch_done()
+
+        yield (json.dumps({"type": "end"}) + "\n").encode()
+    except asyncio.CancelledError:
+        return
+    except Exception as e:
+        yield (json.dumps({"type": "error", "error": str(e)}) + "\n").encode()
+
+
 # === Tambahkan di bawah endpoint /api/session/{id}/translate (atau berdampingan) ===
 @router.post("/api/session/{session_id}/translate/stream")
 async def translate_stream(
@@ -518,8 +631,8 @@ async def translate_stream(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    from core.translate import TranslateEngine
-    eng = TranslateEngine()
+    from core.translate import get_translate_engine
+    eng = get_translate_engine()
 
     # Ambil SRT dari workspace (atau dari srt_text jika dikirim)
     text, workdir = eng._resolve_input_srt(session, {"prefer": prefer, "srt_text": srt_text})
@@ -539,82 +652,34 @@ async def translate_stream(
     trans_buf = [""] * len(items)
     idx_pos = {it["index"]: i for i, it in enumerate(items)}
 
-    async def eventgen():
+    async def _autosave():
+        # autosave tiap batch selesai; tulis file di thread agar loop tidak ke-block
+        if autosave.lower() != "true":
+            return
         try:
-            yield (json.dumps({"type": "begin", "total": len(items_to_process)}) + "\n").encode()
-
-            # === STREAM PER CHUNK (bukan per item) ==========================
-            # G = ukuran chunk dari GUI; batasi biar aman (mis. ≤ 50)
-            G = max(1, min(int(batch or 10), 50))
-            W = max(1, int(workers))
-            done = 0
-
-            for off in range(0, len(items_to_process), G):
-                chunk = items_to_process[off:off + G]
-
-                # bagi ke sub-batch paralel sesuai workers
-                internal_bs = max(1, (len(chunk) + W - 1) // W)
-
-                results = eng._translate_items_with_deepseek(
-                    items=chunk,
-                    api_key=api_key,
-                    style=mode,
-                    target_lang=target_lang,
-                    temperature=float(temperature),
-                    top_p=float(top_p),
-                    batch_size=int(internal_bs),
-                    workers=W,
-                    timeout=int(timeout),
-                )
-
-                # --- pindahkan delay ke level ITEM (bukan setelah chunk) ---
-                delay_s = max(0.0, min(float(typing_delay_ms), 200.0) / 1000.0)
-
-                for item, t in zip(chunk, results):
-                    # simpan ke buffer (autosave)
-                    pos = idx_pos.get(item["index"])
-                    if pos is not None:
-                        trans_buf[pos] = t or ""
-
-                    # kirim satu hasil (NDJSON)
-                    yield (json.dumps({
-                        "type": "result",
-                        "index": item["index"],
-                        "timestamp": f'{item["start"]} --> {item["end"]}',
-                        "original_text": item["text"],
-                        "translation": t or ""
-                    }) + "\n").encode()
-
-                    done += 1
-                    # progress per item
-                    yield (json.dumps({
-                        "type": "progress",
-                        "done": done,
-                        "total": len(items_to_process)
-                    }) + "\n").encode()
-
-                    # delay kosmetik antar item (efek "mengetik")
-                    if delay_s > 0.0:
-                        await asyncio.sleep(delay_s)
-
-                # autosave tiap selesai satu chunk (aman & jarang I/O)
-                if autosave.lower() == "true":
-                    try:
-                        srt_out = eng._build_srt_with_trans(items, trans_buf)
-                        (workdir / "translated_latest.srt").write_text(srt_out, encoding="utf-8")
-                    except Exception:
-                        pass
-
-                # beri napas event loop (tanpa delay kosmetik lagi di level chunk)
-                await asyncio.sleep(0)
-            # =================================================================
+            srt_out = eng._build_srt_with_trans(items, trans_buf)
+            out_p = workdir / "translated_latest.srt"
+            await asyncio.to_thread(out_p.write_text, srt_out, encoding="utf-8")
+            await asyncio.to_thread(get_artifacts(workdir).record, out_p, "translate_stream",
+                                    {"target_lang": target_lang, "mode": mode})
+        except Exception:
+            pass
 
-            yield (json.dumps({"type": "end"}) + "\n").encode()
-        except asyncio.CancelledError:
-            return
+    def _collect(item, t):
+        pos = idx_pos.get(item["index"])
+        if pos is not None:
+            trans_buf[pos] = t or ""
+
+    eventgen = _translate_ndjson_events(
+        eng, items_to_process, all_items=items,
+        api_key=api_key, mode=mode, target_lang=target_lang,
+        temperature=temperature, top_p=top_p, batch=batch, workers=workers,
+        timeout=timeout, typing_delay_ms=typing_delay_ms,
+        on_result=_collect, on_batch_done=_autosave,
+    )
 
     return StreamingResponse(
-        eventgen(),
+        eventgen,
         media_type="application/x-ndjson; charset=utf-8",
         headers={
             "Cache-Control": "no-cache, no-transform",
@@ -640,8 +705,8 @@ async def translate_stream_manual(
     typing_delay_ms: int = Form(20),
     only_indices: str = Form(""),
 ):
-    from core.translate import TranslateEngine
-    eng = TranslateEngine()
+    from core.translate import get_translate_engine
+    eng = get_translate_engine()
 
     # Parse SRT dari text
     items = eng._parse_srt(srt_text)
@@ -656,59 +721,15 @@ async def translate_stream_manual(
                 only.add(int(x))
     items_to_process = [it for it in items if not only or it["index"] in only]
 
-    async def eventgen():
-        try:
-            yield (json.dumps({"type": "begin", "total": len(items_to_process)}) + "\n").encode()
-
-            # === STREAM PER CHUNK (bukan per item) ==========================
-            G = max(1, min(int(batch or 10), 50))
-            W = max(1, int(workers))
-            done = 0
-
-            for off in range(0, len(items_to_process), G):
-                chunk = items_to_process[off:off + G]
-                internal_bs = max(1, (len(chunk) + W - 1) // W)
-
-                results = eng._translate_items_with_deepseek(
-                    items=chunk,
-                    api_key=api_key,
-                    style=mode,
-                    target_lang=target_lang,
-                    temperature=float(temperature),
-                    top_p=float(top_p),
-                    batch_size=int(internal_bs),
-                    workers=W,
-                    timeout=int(timeout),
-                )
-
-                delay_s = max(0.0, min(float(typing_delay_ms), 200.0) / 1000.0)
-
-                for item, t in zip(chunk, results):
-                    yield (json.dumps({
-                        "type": "result",
-                        "index": item["index"],
-                        "timestamp": f'{item["start"]} --> {item["end"]}',
-                        "original_text": item["text"],
-                        "translation": t or ""
-                    }) + "\n").encode()
-
-                    done += 1
-                    yield (json.dumps({
-                        "type": "progress",
-                        "done": done,
-                        "total": len(items_to_process)
-                    }) + "\n").encode()
-
-                    if delay_s > 0.0:
-                        await asyncio.sleep(delay_s)
-            # =================================================================
-
-            yield (json.dumps({"type": "end"}) + "\n").encode()
-        except asyncio.CancelledError:
-            return
+    eventgen = _translate_ndjson_events(
+        eng, items_to_process, all_items=items,
+        api_key=api_key, mode=mode, target_lang=target_lang,
+        temperature=temperature, top_p=top_p, batch=batch, workers=workers,
+        timeout=timeout, typing_delay_ms=typing_delay_ms,
+    )
 
     return StreamingResponse(
-        eventgen(),
+        eventgen,
         media_type="application/x-ndjson; charset=utf-8",
         headers={
             "Cache-Control": "no-cache, no-transform",
@@ -767,6 +788,7 @@ async def save_translated_srt(
 
     out_path = workdir / filename
     out_path.write_text(srt_text, encoding="utf-8")
+    get_artifacts(workdir).record(out_path, "save_srt")
 
     pm.session_manager.update_session(session_id, srtpath=str(out_path))
     return JSONResponse({"ok": True, "path": str(out_path)})
@@ -779,94 +801,25 @@ async def save_translated_srt(
 def _read_text(p: Path) -> str:
     return p.read_text(encoding="utf-8", errors="ignore") if p and p.exists() else ""
 
-# ==== SRT utilities (replace the existing ones) ==============================
-_TIME_RE = re.compile(r"(\d{2}:\d{2}:\d{2})[,.](\d{3})")
-_TIME_LINE_RE = re.compile(
-    r"(?P<s>\d{2}:\d{2}:\d{2}[,\.]\d{3})\s*-->\s*(?P<e>\d{2}:\d{2}:\d{2}[,\.]\d{3})"
-)
-
-def _norm_ts(ts: str) -> str:
-    # pastikan milidetik pakai koma
-    return ts.replace(".", ",")
-
-def _clean_srt_text(s: str) -> str:
-    if not s:
-        return ""
-    s = s.lstrip("\ufeff")                # BOM
-    s = s.replace("\r\n", "\n").replace("\r", "\n")
-    # buang header WEBVTT jika ada
-    lines = s.split("\n")
-    if lines and lines[0].strip().upper().startswith("WEBVTT"):
-        lines = lines[1:]
-    return "\n".join(lines)
-
-def _t2s(ts: str) -> float:
-    ts = _norm_ts(ts)
-    m = re.match(r"(?P<h>\d\d):(?P<m>\d\d):(?P<s>\d\d),(?P<ms>\d{3})", ts.strip())
-    if not m:
-        return 0.0
-    h, m_, s, ms = int(m["h"]), int(m["m"]), int(m["s"]), int(m["ms"])
-    return h * 3600 + m_ * 60 + s + ms / 1000.0
-
-def _parse_srt(srt_text: str) -> List[dict]:
-    """
-    Parser yang toleran: menerima blok tanpa indeks, '.' atau ',' untuk ms,
-    dan mengabaikan header WEBVTT/BOM.
-    """
-    s = _clean_srt_text(srt_text)
-    if not s.strip():
-        return []
-
-    blocks, cur = [], []
-    for line in s.split("\n"):
-        if line.strip():
-            cur.append(line)
-        else:
-            if cur:
-                blocks.append(cur)
-                cur = []
-    if cur:
-        blocks.append(cur)
-
-    out, autono = [], 1
-    for b in blocks:
-        if not b:
-            continue
-
-        # Jika baris pertama angka, itu index; kalau tidak, kita auto-number
-        k = 0
-        try:
-            idx = int(b[0].strip())
-            k = 1
-        except Exception:
-            idx = autono
-
-        # Cari baris timecode di dalam blok mulai dari k
-        tline = None
-        for i in range(k, len(b)):
-            m = _TIME_LINE_RE.search(b[i])
-            if m:
-                tline = (i, m.group("s"), m.group("e"))
-                break
-        if not tline:
-            autono += 1
-            continue
+# ==== SRT utilities =========================================================
+# Parse lewat srt_model (toleran: tanpa indeks, '.'/',' ms, WEBVTT/BOM),
+# di-cache per file (mtime/size) dan per isi teks → satu parse per perubahan.
 
-        i, s0, e0 = tline
-        s1, e1 = _norm_ts(s0), _norm_ts(e0)
-        text = "\n".join(b[i + 1 :]).strip()
+def _srt_rows(sub: Subtitles) -> List[dict]:
+    return [{
+        "index": sub.index[i],
+        "start": sub.start_ts(i),
+        "end": sub.end_ts(i),
+        "text": sub.texts[i],
+        "start_s": ms_to_s(sub.start_ms[i]),
+        "end_s": ms_to_s(sub.end_ms[i]),
+    } for i in range(len(sub))]
 
-        out.append({
-            "index": idx,
-            "start": s1,
-            "end": e1,
-            "text": text,
-            "start_s": _t2s(s1),
-            "end_s": _t2s(e1),
-        })
-        autono += 1
+def _parse_srt(srt_text: str) -> List[dict]:
+    return _srt_rows(srt_from_text(srt_text))
 
-    return out
+def _load_srt_rows(p: Optional[Path]) -> List[dict]:
+    return _srt_rows(load_srt(p)) if p else []
 
 def _pick_translation_file(workdir: Path) -> Optional[Path]:
     """
@@ -874,38 +827,25 @@ def _pick_translation_file(workdir: Path) -> Optional[Path]:
       1) edited_translated.srt
       2) translated_latest.srt
       3) translated.srt   (nama lama)
-      4) translated_*.srt (terbaru, termasuk subfolder)
+      4) translated_*.srt (terbaru menurut manifest artefak)
     """
     for name in ["edited_translated.srt", "translated_latest.srt", "translated.srt"]:
         p = workdir / name
         if p.exists():
             return p
-    cands = list(workdir.glob("translated_*.srt"))
-    cands += list(workdir.glob("**/translated_*.srt"))
-    if cands:
-        return sorted(set(cands), key=lambda x: x.stat().st_mtime, reverse=True)[0]
-    return None
+    return get_artifacts(workdir).latest("translated_srt")
 
 def _load_diarization_segments(workdir: Path) -> List[dict]:
     """
     Cari *_gender_*_segments.json (punya fields: start, end, speaker, gender).
     Jika ada speakers.json, pakai sebagai fallback gender per speaker.
     """
-    seg_json = None
-    for p in sorted(workdir.glob("*_gender_*_segments.json"), key=lambda x: x.stat().st_mtime, reverse=True):
-        seg_json = p; break
-    if not seg_json:
-        for p in sorted(workdir.glob("**/*_gender_*_segments.json"), key=lambda x: x.stat().st_mtime, reverse=True):
-            seg_json = p; break
+    arts = get_artifacts(workdir)
+    seg_json = arts.latest("gender_segments")
     segments = []
     speaker_gender = {}
 
-    sp_json = None
-    for p in sorted(workdir.glob("*_gender_*_speakers.json"), key=lambda x: x.stat().st_mtime, reverse=True):
-        sp_json = p; break
-    if not sp_json:
-        for p in sorted(workdir.glob("**/*_gender_*_speakers.json"), key=lambda x: x.stat().st_mtime, reverse=True):
-            sp_json = p; break
+    sp_json = arts.latest("gender_speakers")
 
     if sp_json:
         try:
@@ -932,15 +872,6 @@ def _load_diarization_segments(workdir: Path) -> List[dict]:
             })
     return segments
 
-def _best_overlap(seg_list: List[dict], a0: float, a1: float) -> Optional[dict]:
-    best, best_ov = None, 0.0
-    for s in seg_list:
-        b0, b1 = s["start_s"], s["end_s"]
-        ov = max(0.0, min(a1, b1) - max(a0, b0))
-        if ov > best_ov:
-            best_ov, best = ov, s
-    return best
-
 # ==== Assignment policy & helpers (baru) =====================================
 
 # Cara memilih speaker untuk 1 baris SRT:
@@ -956,66 +887,6 @@ SNAP_MS = 120            # jepit start/end baris ke boundary diarization terdeka
 MICRO_MS = 450
 LONG_MS  = 2500
 
-def _pick_segment(seg_list, a0: float, a1: float):
-    """Pilih segmen untuk interval [a0,a1] pakai ASSIGN_POLICY & MAJORITY."""
-    if not seg_list:
-        return None
-    a0 = float(a0); a1 = float(a1)
-    dur = max(1e-6, a1 - a0)
-    mode = (ASSIGN_POLICY or "overlap").lower().strip()
-
-    # kandidat overlap maksimum
-    best, best_ov = None, 0.0
-    for s in seg_list:
-        b0, b1 = float(s["start_s"]), float(s["end_s"])
-        ov = max(0.0, min(a1, b1) - max(a0, b0))
-        if ov > best_ov:
-            best, best_ov = s, ov
-
-    # policy sederhana
-    if mode == "overlap":
-        return best
-    if mode in ("start", "end", "midpoint"):
-        x = a0 if mode=="start" else (a1 if mode=="end" else (a0+a1)/2.0)
-        for s in seg_list:
-            if float(s["start_s"]) <= x <= float(s["end_s"]):
-                return s
-        return best
-    if mode == "majority_then_start":
-        if best and best_ov/dur >= float(MAJORITY): return best
-        for s in seg_list:
-            if float(s["start_s"]) <= a0 <= float(s["end_s"]): return s
-        return best
-    if mode == "majority_then_midpoint":
-        if best and best_ov/dur >= float(MAJORITY): return best
-        x = (a0+a1)/2.0
-        for s in seg_list:
-            if float(s["start_s"]) <= x <= float(s["end_s"]): return s
-        return best
-
-    # adaptive
-    if mode == "adaptive":
-        dur_ms = (a1 - a0) * 1000.0
-        if dur_ms <= MICRO_MS:
-            x = (a0+a1)/2.0
-            for s in seg_list:
-                if float(s["start_s"]) <= x <= float(s["end_s"]): return s
-            return best
-        if dur_ms >= LONG_MS:
-            if best and best_ov/dur >= float(MAJORITY): return best
-            for s in seg_list:
-                if float(s["start_s"]) <= a0 <= float(s["end_s"]): return s
-            return best
-        # medium
-        if best and best_ov/dur >= float(MAJORITY): return best
-        x = (a0+a1)/2.0
-        for s in seg_list:
-            if float(s["start_s"]) <= x <= float(s["end_s"]): return s
-        return best
-
-    # fallback
-    return best
-
 def _collect_boundaries(seg_list):
     """Kumpulkan semua batas (start & end) segmen diarization sebagai list float terurut unik."""
     b = []
@@ -1052,9 +923,46 @@ def _snap_pair(a0: float, a1: float, boundaries: list, snap_ms: int = SNAP_MS):
     return x0, x1
 
 # endpoints.py  — TAB 3
+# ---- Memo payload Editing (ETag/304) ----------------------------------------
+# Payload hasil hitung disimpan per session, key = fingerprint file input
+# (path + mtime + size) + parameter query. GET ulang tanpa perubahan → tanpa
+# parse/hitung ulang; klien yang kirim If-None-Match cocok dapat 304.
+_EDITING_MEMO: "OrderedDict[str, tuple]" = OrderedDict()   # session_id -> (etag, body bytes)
+_EDITING_MEMO_MAX = 32
+_editing_memo_lock = threading.Lock()
+
+def _editing_inputs(d: Path) -> List[Optional[Path]]:
+    """File yang dibaca get_editing (resolusi sama dengan loader-nya)."""
+    return [
+        d / "editing_cache.json",
+        d / JOURNAL_NAME,
+        _pick_translation_file(d),
+        d / "source_video.srt",
+        _latest(d, "speakers_json"),
+        _latest(d, "segments_json"),
+        _latest(d, "gender_segments"),
+        _latest(d, "gender_speakers"),
+    ]
+
+def _editing_etag(d: Path, params: tuple) -> str:
+    fp = []
+    for p in _editing_inputs(d):
+        try:
+            st = p.stat() if p else None
+            fp.append([str(p), st.st_mtime_ns, st.st_size] if st else None)
+        except OSError:
+            fp.append(None)
+    raw = json.dumps([fp, list(params)], ensure_ascii=False)
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+def _invalidate_editing_memo(session_id: str):
+    with _editing_memo_lock:
+        _EDITING_MEMO.pop(session_id, None)
+
 @router.get("/api/session/{session_id}/editing")
 def get_editing(
     session_id: str,
+    request: Request,
     assign_policy: str = Query("adaptive"),
     majority: float = Query(0.60),
     snap_ms: int = Query(120),
@@ -1066,6 +974,37 @@ def get_editing(
     very_short_ms: int = Query(300),    # baris ≤ 300ms dianggap mikro (rawan)
     gender_mode: str   = Query("segment_only"),  # eksplisit (hanya untuk kejelasan; tidak mengubah logika)
 ):
+    d = Path("workspaces") / session_id
+    if not d.exists():
+        raise HTTPException(404, "Session not found")
+
+    params = (assign_policy, majority, snap_ms, min_ovl_spk, min_ovl_gen, ok_frac, very_short_ms, gender_mode)
+    etag = _editing_etag(d, params)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    inm = request.headers.get("if-none-match") or ""
+    if etag in [t.strip() for t in inm.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    with _editing_memo_lock:
+        hit = _EDITING_MEMO.get(session_id)
+        if hit and hit[0] == etag:
+            _EDITING_MEMO.move_to_end(session_id)
+            return Response(content=hit[1], media_type="application/json", headers=headers)
+
+    payload = _build_editing_payload(session_id, d, *params)
+    body = json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    with _editing_memo_lock:
+        _EDITING_MEMO[session_id] = (etag, body)
+        _EDITING_MEMO.move_to_end(session_id)
+        while len(_EDITING_MEMO) > _EDITING_MEMO_MAX:
+            _EDITING_MEMO.popitem(last=False)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _build_editing_payload(session_id: str, d: Path, assign_policy: str, majority: float, snap_ms: int,
+                           min_ovl_spk: float, min_ovl_gen: float, ok_frac: float,
+                           very_short_ms: int, gender_mode: str) -> dict:
     # override konstanta untuk request ini
     global ASSIGN_POLICY, MAJORITY, SNAP_MS
     ASSIGN_POLICY = (assign_policy or "adaptive").strip()
@@ -1087,22 +1026,11 @@ def get_editing(
       - Snapping & policy dipakai untuk memilih segmen, bukan mengubah waktu SRT.
       - Warning dihitung per baris (tidak mengubah keputusan), supaya user bisa review manual.
     """
-    d = Path("workspaces") / session_id
-    if not d.exists():
-        raise HTTPException(404, "Session not found")
-
-    cache_p = d / "editing_cache.json"
-
     # ------------------------------------------------------------------ #
     # 0) (Optional) baca cache (nanti dipakai untuk merge user edits)
     # ------------------------------------------------------------------ #
-    cache_rows = []
-    if cache_p.exists():
-        try:
-            payload = json.loads(cache_p.read_text(encoding="utf-8"))
-            cache_rows = payload.get("rows", []) or []
-        except Exception:
-            cache_rows = []
+    # snapshot editing_cache.json + journal PATCH (belum di-compact)
+    cache_rows = get_edit_journal(d).merged_rows() or []
 
     # ------------------------------------------------------------------ #
     # 1) PARSE SRT TERJEMAHAN (edited_translated / translated_latest / dst)
@@ -1111,7 +1039,7 @@ def get_editing(
     tp = _pick_translation_file(d)
     if tp:
         try:
-            tran_rows = _parse_srt(_read_text(tp))
+            tran_rows = _load_srt_rows(tp)
         except Exception:
             tran_rows = []
 
@@ -1119,7 +1047,7 @@ def get_editing(
     # 2) Fallback: pakai timing dari source_video.srt jika tidak ada terjemahan
     # ------------------------------------------------------------------ #
     if not tran_rows:
-        orig = _parse_srt(_read_text(d / "source_video.srt"))
+        orig = _load_srt_rows(d / "source_video.srt")
         rows = [{
             "index": o["index"],
             "start": o["start"],
@@ -1137,11 +1065,11 @@ def get_editing(
             "near_end_ms": None,
             "dur_ms": None,
         } for o in orig]
-        return JSONResponse({
+        return {
             "video": f"/api/session/{session_id}/video",
             "rows": rows,
             "speakers": []
-        })
+        }
 
     # ------------------------------------------------------------------ #
     # 3) Map diarization SECARA TERPISAH: speaker vs gender
@@ -1181,7 +1109,7 @@ def get_editing(
                 pass
         gen_segs_raw = tmp
 
-    # 3b) NORMALISASI: pastikan semua pakai start_s/end_s (AMAN utk _collect_boundaries/_pick_segment lama)
+    # 3b) NORMALISASI: pastikan semua pakai start_s/end_s (AMAN utk _collect_boundaries / SegmentIndex)
     spk_segs = _norm_seg_list(spk_segs_raw, keep=["speaker"])
     gen_segs = _norm_seg_list(gen_segs_raw, keep=["gender"])
 
@@ -1189,19 +1117,23 @@ def get_editing(
     spk_bound = _collect_boundaries(spk_segs) if spk_segs else []
     gen_bound = _collect_boundaries(gen_segs) if gen_segs else []
 
-    rows = []
-    for t in tran_rows:
-        a0 = float(t.get("start_s", 0.0))
-        a1 = float(t.get("end_s", 0.0))
-        dur_s = max(1e-6, a1 - a0)
+    # index NumPy sekali per request → pick segmen untuk semua baris sekaligus
+    spk_index = SegmentIndex(spk_segs, "speaker")
+    gen_index = SegmentIndex(gen_segs, "gender")
 
-        # SNAP terpisah
-        a0_spk, a1_spk = _snap_pair(a0, a1, spk_bound, SNAP_MS) if spk_segs else (a0, a1)
-        a0_gen, a1_gen = _snap_pair(a0, a1, gen_bound, SNAP_MS) if gen_segs else (a0, a1)
+    A = [(float(t.get("start_s", 0.0)), float(t.get("end_s", 0.0))) for t in tran_rows]
+    # SNAP terpisah
+    snap_spk = [_snap_pair(a0, a1, spk_bound, SNAP_MS) if spk_segs else (a0, a1) for a0, a1 in A]
+    snap_gen = [_snap_pair(a0, a1, gen_bound, SNAP_MS) if gen_segs else (a0, a1) for a0, a1 in A]
+    # PICK segmen terpisah (policy berlaku untuk keduanya)
+    pick_spk = pick_segments(spk_index, [x[0] for x in snap_spk], [x[1] for x in snap_spk],
+                             ASSIGN_POLICY, MAJORITY, MICRO_MS, LONG_MS)
+    pick_gen = pick_segments(gen_index, [x[0] for x in snap_gen], [x[1] for x in snap_gen],
+                             ASSIGN_POLICY, MAJORITY, MICRO_MS, LONG_MS)
 
-        # PICK segmen terpisah (policy berlaku untuk keduanya)
-        s_spk = _pick_segment(spk_segs, a0_spk, a1_spk) if spk_segs else None
-        s_gen = _pick_segment(gen_segs, a0_gen, a1_gen) if gen_segs else None
+    rows = []
+    for t, (a0, a1), s_spk, s_gen in zip(tran_rows, A, pick_spk, pick_gen):
+        dur_s = max(1e-6, a1 - a0)
 
         speaker = (s_spk.get("speaker") if s_spk else None)
 
@@ -1279,46 +1211,34 @@ def get_editing(
         ss, ms = rest.replace(".", ",").split(",")
         return (int(hh)*3600 + int(mm)*60 + int(ss)) + (int(ms)/1000.0)
 
-    def _ovl(a0: float, a1: float, b0: float, b1: float) -> float:
-        x = min(a1, b1) - max(a0, b0)
-        return x if x > 0 else 0.0
-
-    # gabung semua boundary untuk metrik "mepet"
-    all_bounds = []
-    for ss in spk_segs or []:
-        all_bounds.append(float(ss["start_s"])); all_bounds.append(float(ss["end_s"]))
-    for gg in gen_segs or []:
-        all_bounds.append(float(gg["start_s"])); all_bounds.append(float(gg["end_s"]))
-
+    # parse waktu SRT semua baris (baris yang gagal di-parse dilewati, placeholder tetap)
+    valid, A0, A1 = [], [], []
     for r in rows:
-        # parse waktu SRT baris
         try:
             a0 = _hms_to_s(r["start"]); a1 = _hms_to_s(r["end"])
         except Exception:
             continue
-        dur = max(1e-6, a1 - a0)
-
-        # overlap SPEAKER berdasarkan speaker final di row
-        frac_spk = 0.0
-        if r.get("speaker") and spk_segs:
-            ov = 0.0
-            for ss in spk_segs:
-                if ss.get("speaker") == r["speaker"]:
-                    ov += _ovl(a0, a1, float(ss["start_s"]), float(ss["end_s"]))
-            frac_spk = ov / dur
-
-        # overlap GENDER berdasarkan gender final di row
-        frac_gen = 0.0
-        if r.get("gender") and gen_segs:
-            ov = 0.0
-            for gg in gen_segs:
-                if gg.get("gender") == r["gender"]:
-                    ov += _ovl(a0, a1, float(gg["start_s"]), float(gg["end_s"]))
-            frac_gen = ov / dur
-
-        # dekat boundary? (mepet ≤ SNAP_MS)
-        near_start = min((abs(b - a0) for b in all_bounds), default=None)
-        near_end   = min((abs(b - a1) for b in all_bounds), default=None)
+        valid.append(r); A0.append(a0); A1.append(a1)
+    A0 = np.array(A0, dtype=np.float64); A1 = np.array(A1, dtype=np.float64)
+    dur_v = np.maximum(1e-6, A1 - A0)
+
+    # overlap SPEAKER / GENDER berdasarkan label final di row (overlap dijumlah per label)
+    spk_lab = [r["speaker"] if (r.get("speaker") and spk_segs) else None for r in valid]
+    gen_lab = [r["gender"] if (r.get("gender") and gen_segs) else None for r in valid]
+    frac_spk_v = spk_index.label_overlap(spk_lab, A0, A1) / dur_v
+    frac_gen_v = gen_index.label_overlap(gen_lab, A0, A1) / dur_v
+
+    # dekat boundary? (mepet ≤ SNAP_MS) — gabung semua boundary speaker + gender
+    all_bounds = np.unique(np.concatenate([spk_index.start, spk_index.end, gen_index.start, gen_index.end]))
+    near_start_v = nearest_bound(all_bounds, A0)
+    near_end_v = nearest_bound(all_bounds, A1)
+
+    for i, r in enumerate(valid):
+        dur = float(dur_v[i])
+        frac_spk = float(frac_spk_v[i])
+        frac_gen = float(frac_gen_v[i])
+        near_start = None if not len(all_bounds) else float(near_start_v[i])
+        near_end   = None if not len(all_bounds) else float(near_end_v[i])
 
         warn_codes = []
 
@@ -1363,11 +1283,11 @@ def get_editing(
     # 6) Final
     # ------------------------------------------------------------------ #
     speakers = sorted({(r.get("speaker") or "").strip() for r in rows if r.get("speaker")})
-    return JSONResponse({
+    return {
         "video": f"/api/session/{session_id}/video",
         "rows": rows,
         "speakers": speakers
-    })
+    }
 
 
 class Row(BaseModel):
@@ -1390,27 +1310,50 @@ def post_editing(session_id: str, data: EditSave):
     d = Path("workspaces") / session_id
     d.mkdir(parents=True, exist_ok=True)
 
-    # simpan cache editor
-    (d / "editing_cache.json").write_text(
-        json.dumps({"rows": [r.dict() for r in data.rows]}, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    _invalidate_editing_memo(session_id)
 
-    # generate SRT versi edited
-    srt_lines, n = [], 1
-    for r in data.rows:
-        srt_lines.append(str(n))
-        srt_lines.append(f"{r.start} --> {r.end}")
-        srt_lines.append((r.translation or "").strip())
-        srt_lines.append("")
-        n += 1
-    txt = "\n".join(srt_lines).rstrip() + "\n"
-    (d / "edited_translated.srt").write_text(txt, encoding="utf-8")
-    # opsional: jaga kompatibilitas
-    (d / "translated_latest.srt").write_text(txt, encoding="utf-8")
+    # save penuh: snapshot editing_cache.json + edited_translated.srt + translated_latest.srt,
+    # journal PATCH lama dibuang
+    get_edit_journal(d).save_full([r.dict() for r in data.rows])
 
     return {"status": "ok"}
 
+
+class RowPatch(BaseModel):
+    index: int
+    start: Optional[str] = None
+    end: Optional[str] = None
+    original: Optional[str] = None
+    translation: Optional[str] = None
+    speaker: Optional[str] = None
+    gender: Optional[str] = None
+    notes: Optional[str] = None
+
+
+class EditPatch(BaseModel):
+    rows: list[RowPatch] = []
+    deleted: list[int] = []
+
+
+@router.patch("/api/session/{session_id}/editing")
+def patch_editing(session_id: str, data: EditPatch):
+    """
+    Save inkremental: hanya baris yang berubah (field yang dikirim saja) + index yang dihapus.
+    Ditambahkan ke journal; snapshot/SRT ditulis ulang saat compaction (lazy).
+    409 kalau belum ada snapshot → klien kirim save penuh (POST) dulu.
+    """
+    d = Path("workspaces") / session_id
+    if not d.exists():
+        raise HTTPException(404, "Session not found")
+    journal = get_edit_journal(d)
+    if not journal.has_snapshot():
+        raise HTTPException(409, "Belum ada snapshot editing; kirim save penuh (POST) dulu")
+
+    rows = [r.dict(exclude_unset=True) for r in data.rows]
+    compacted = journal.append(rows, data.deleted)
+    _invalidate_editing_memo(session_id)
+    return {"status": "ok", "rows": len(rows), "deleted": len(data.deleted), "compacted": compacted}
+
 class ExportReq(BaseModel):
     # mode lama: male|female|unknown|all ; mode baru: speaker|speaker_zip
     mode: Literal['male','female','unknown','all','speaker','speaker_zip','full'] = 'male'
@@ -1438,13 +1381,10 @@ def _safe_name(text: str) -> str:
 @router.post("/api/session/{session_id}/editing/export")
 def export_editing(session_id: str, req: ExportReq):
     d = Path("workspaces") / session_id
-    cache_p = d / "editing_cache.json"
-    if not cache_p.exists():
+    rows = get_edit_journal(d).merged_rows()
+    if rows is None:
         raise HTTPException(400, "No editing data")
 
-    payload = json.loads(cache_p.read_text(encoding="utf-8"))
-    rows = payload.get("rows", [])
-
     def sel_gender(g: str):
         g = (g or "unknown").lower()
         return [r for r in rows if (r.get("gender", "unknown").lower() == g)]
@@ -1537,17 +1477,28 @@ async def run_tts_export(
     bg_mode: str = Form("center_cut"),
     pm = Depends(get_processing_manager),
 ):
+    """Antrikan job TTS export (pool api). Hasil/progress: GET /api/jobs/{job_id} atau WS 'job_update'."""
+    if not pm.get_session(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    config = {
+        "tts_engine": tts_engine,
+        "voice_male": voice_male,
+        "voice_female": voice_female,
+        "voice_unknown": voice_unknown,
+        "replace_audio": replace_audio,
+        "bg_mode": bg_mode,
+    }
+    job = job_scheduler.submit("tts_export", session_id, {"session_id": session_id, "config": config})
+    return JSONResponse({"job_id": job["id"], "status": job["status"]}, status_code=202)
+
+def _tts_export_job(job: Job, session_id: str, config: dict):
+    pm = get_processing_manager()
     try:
-        config = {
-            "tts_engine": tts_engine,
-            "voice_male": voice_male,
-            "voice_female": voice_female,
-            "voice_unknown": voice_unknown,
-            "replace_audio": replace_audio,
-            "bg_mode": bg_mode,
-        }
-        await pm.run_tts_export(session_id, config)
-        return JSONResponse({"status": "tts_export_started"})
+        job.progress(1, "TTS export")
+        job.run_async(pm.run_tts_export(session_id, config))
+        return {"status": "tts_export_completed"}
+    except (HTTPException, JobCancelled):
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1590,23 +1541,20 @@ def wsfile(session_id: str, rel: str = Query(...), pm=Depends(get_processing_man
     return FileResponse(str(p))
 
 # ---------- SRT cache -> rows (index,start_ms,end_ms,text,gender) ----------
-def _hms_to_ms(h: str) -> int:
-    hh, mm, rest = h.split(":")
-    ss, ms = rest.replace(".", ",").split(",")
-    return (int(hh)*3600 + int(mm)*60 + int(ss))*1000 + int(ms)
-
 def _load_rows(ws: Path) -> List[dict]:
-    ec = ws / "editing_cache.json"
-    if not ec.exists():
+    merged = get_edit_journal(ws).merged_rows()  # snapshot + journal PATCH
+    if merged is None:
         raise HTTPException(404, "editing_cache.json tidak ada (Load Session dulu di tab Editing)")
-    data = json.loads(ec.read_text(encoding="utf-8", errors="ignore"))
     rows = []
-    for r in (data.get("rows") or []):
+    for r in merged:
+        s_ms, e_ms = ts_to_ms(r.get("start")), ts_to_ms(r.get("end"))
+        if s_ms is None or e_ms is None:
+            continue
         try:
             rows.append({
                 "index": int(r["index"]),
-                "start_ms": _hms_to_ms(r["start"]),
-                "end_ms": _hms_to_ms(r["end"]),
+                "start_ms": s_ms,
+                "end_ms": e_ms,
                 "text": r.get("translation") or r.get("text") or "",
                 "gender": (r.get("gender") or "").lower()
             })
@@ -1615,6 +1563,61 @@ def _load_rows(ws: Path) -> List[dict]:
     rows.sort(key=lambda x: x["index"])
     return rows
 
+def _srt_times_fallback(ws: Path) -> Dict[int, tuple]:
+    """index -> (start_ms, end_ms) dari SRT workspace pertama yang berisi (srt_model, di-cache)."""
+    for name in ["source_video.srt", "translated_latest.srt", "translated.srt"]:
+        times = {idx: (s_ms, e_ms) for idx, s_ms, e_ms, _ in load_srt(ws / name) if e_ms >= s_ms}
+        if times:
+            return times
+    return {}
+
+def _load_times_dict(ws: Path) -> Dict[int, tuple]:
+    """
+    index -> (start_ms, end_ms) untuk export & preview audio:
+    1) capcut/capcut_map_all.json → 2) editing_cache.json → 3) SRT workspace (_srt_times_fallback).
+    """
+    times = {}
+    man = ws / "capcut" / "capcut_map_all.json"
+    if man.exists():
+        try:
+            data = json.loads(man.read_text(encoding="utf-8"))
+            for it in data.get("items", []):
+                idx = it.get("row_index", it.get("index", None))
+                if idx is None:
+                    continue
+                s = it.get("start_ms")
+                e = it.get("end_ms")
+                if s is None and it.get("start"): s = ts_to_ms(it["start"]) or 0
+                if e is None and it.get("end"):   e = ts_to_ms(it["end"]) or 0
+                if s is not None and e is not None:
+                    times[int(idx)] = (int(s), int(e))
+        except Exception:
+            pass
+    if times:
+        return times
+
+    for cand in [ws / "editing_cache.json", ws / "capcut" / "editing_cache.json"]:
+        if not cand.exists():
+            continue
+        try:
+            obj = json.loads(cand.read_text(encoding="utf-8"))
+            arr = obj.get("rows") if isinstance(obj, dict) else obj
+            for r in (arr or []):
+                try:
+                    idx = int(r.get("index", 0))
+                except Exception:
+                    continue
+                s = ts_to_ms(r.get("start", "")) or 0
+                e = ts_to_ms(r.get("end", "")) or 0
+                if idx and e >= s:
+                    times[idx] = (s, e)
+            if times:
+                return times
+        except Exception:
+            pass
+
+    return _srt_times_fallback(ws)  # bisa kosong
+
 # ---------- parser CapCut Project (textReading) ----------
 def _normalize_project_dir(p: Path) -> Path:
     p = p.resolve()
@@ -1720,45 +1723,20 @@ class CapcutImportBody(BaseModel):
     max_speed:  float = 3.0    # (disimpan saja untuk tahap export/build timeline)
 
 def _capcut__pick_srt_for_rows(workdir: Path) -> Optional[Path]:
+    get_edit_journal(workdir).flush()
     # pilih SRT yang jadi dasar rows (urut prioritas)
     for name in ["edited_translated.srt", "translated_latest.srt",
                  "translated.srt", "source_subtitles.srt", "source_video.srt"]:
         p = workdir / name
         if p.exists():
             return p
-    # fallback cari translated_*.srt
-    cands = list(workdir.glob("translated_*.srt")) + list(workdir.glob("**/translated_*.srt"))
-    if cands:
-        cands = sorted(cands, key=lambda x: x.stat().st_mtime, reverse=True)
-        return cands[0]
-    return None
+    # fallback translated_*.srt terbaru
+    return get_artifacts(workdir).latest("translated_srt")
 
-def _capcut__parse_srt_to_rows(srt_text: str) -> List[Dict[str, Any]]:
-    # parse SRT sederhana → rows: [{index,start,end,text}], sorted by start
-    text = srt_text.replace("\r", "")
-    blocks = [b for b in re.split(r"\n\s*\n", text) if b.strip()]
-    out = []
-    def _ms(hms, ms):
-        h, m, s = map(int, hms.split(":"))
-        return h*3600000 + m*60000 + s*1000 + int(ms)
-    for blk in blocks:
-        lines = [x for x in blk.split("\n") if x.strip() != ""]
-        if len(lines) < 2: continue
-        # index opsional
-        try:
-            idx = int(lines[0].strip())
-            tline = lines[1]; pos = 2
-        except Exception:
-            idx = None
-            tline = lines[0]; pos = 1
-        m = re.search(r"(\d\d:\d\d:\d\d)[,\.](\d{3})\s*-->\s*(\d\d:\d\d:\d\d)[,\.](\d{3})", tline)
-        if not m: continue
-        s_ms = _ms(m.group(1), m.group(2))
-        e_ms = _ms(m.group(3), m.group(4))
-        txt  = "\n".join(lines[pos:]).strip()
-        if idx is None:
-            idx = (out[-1]["index"]+1) if out else 1
-        out.append({"index": idx, "start": s_ms, "end": e_ms, "text": txt})
+def _capcut__parse_srt_to_rows(srt_path: Path) -> List[Dict[str, Any]]:
+    # SRT (srt_model, di-cache per file) → rows: [{index,start,end,text}] (ms), sorted by start
+    sub = load_srt(srt_path)
+    out = [{"index": idx, "start": s_ms, "end": e_ms, "text": txt} for idx, s_ms, e_ms, txt in sub]
     out.sort(key=lambda r: (r["start"], r["end"], r["index"]))
     return out
 
@@ -1889,6 +1867,13 @@ def capcut_import(
     body: CapcutImportBody,
     pm = Depends(get_processing_manager),
 ):
+    """Antrikan job import CapCut (pool ffmpeg). Hasil/progress: GET /api/jobs/{job_id} atau WS 'job_update'."""
+    if not pm.get_session(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    job = job_scheduler.submit("capcut_import", session_id, {"session_id": session_id, "body": body.dict()})
+    return JSONResponse({"job_id": job["id"], "status": job["status"]}, status_code=202)
+
+def _capcut_import_job(job: Job, session_id: str, body: dict):
     """
     Import WAV TTS dari CapCut Project:
       - baca SRT session → rows
@@ -1897,6 +1882,8 @@ def capcut_import(
       - SELALU tulis WAV ke workspace: workspaces/<sid>/capcut/trim/00001.wav dst
       - simpan manifest capcut_map_all.json (dipakai review/preview)
     """
+    pm = get_processing_manager()
+    body = CapcutImportBody(**body)
     session = pm.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -1912,7 +1899,7 @@ def capcut_import(
     srt_path = _capcut__pick_srt_for_rows(workdir)
     if not srt_path or not srt_path.exists():
         raise HTTPException(status_code=404, detail="SRT for this session not found")
-    rows = _capcut__parse_srt_to_rows(srt_path.read_text(encoding="utf-8"))
+    rows = _capcut__parse_srt_to_rows(srt_path)
     if not rows:
         raise HTTPException(status_code=400, detail="Parsed SRT is empty")
 
@@ -1937,7 +1924,8 @@ def capcut_import(
     # buat index → row untuk durasi (untuk trimming)
     idx2row = {r["index"]: r for r in rows}
 
-    for row_idx, it in mapping:
+    for n, (row_idx, it) in enumerate(mapping):
+        job.progress(100.0 * n / max(1, len(mapping)), f"WAV {n}/{len(mapping)}")
         if it is None:
             continue
         src = Path(it["path"]).resolve()
@@ -1967,7 +1955,7 @@ def capcut_import(
                 "-c:a","pcm_s16le",
                 str(out_wav)
             ]
-            _run(cmd)
+            job.run(cmd)
         else:
             shutil.copy2(src, out_wav)
 
@@ -1997,13 +1985,13 @@ def capcut_import(
         },
     )
 
-    return JSONResponse({
+    return {
         "ok": True,
         "mapped": len(manifest_items),
         "total_rows": len(rows),
         "total_items": len(items),
         "copied": copied,
-    })
+    }
 
     
 # ---------- Tahap-2: Review (rows + tts_path) ----------
@@ -2023,7 +2011,7 @@ def review_rows(session_id: str, pm = Depends(get_processing_manager)):
     srt_path = _capcut__pick_srt_for_rows(workdir)
     if not srt_path or not srt_path.exists():
         return JSONResponse({"rows": []})
-    rows = _capcut__parse_srt_to_rows(srt_path.read_text(encoding="utf-8"))
+    rows = _capcut__parse_srt_to_rows(srt_path)
 
     # --- baca manifest capcut
     capcut_dir = workdir / "capcut"
@@ -2322,6 +2310,13 @@ def export_build(
     body: dict = Body(...),
     pm = Depends(get_processing_manager),
 ):
+    """Antrikan job export MP4 (pool ffmpeg, prioritas batch)."""
+    if not pm.get_session(session_id):
+        raise HTTPException(404, "Session not found")
+    job = job_scheduler.submit("export_build", session_id, {"session_id": session_id, "body": body})
+    return JSONResponse({"job_id": job["id"], "status": job["status"]}, status_code=202)
+
+def _export_build_job(job: Job, session_id: str, body: dict):
     """
     Export MP4 dengan timing:
       - Basis timing: capcut_map_all.json → editing_cache.json → SRT → tanpa timing
@@ -2342,87 +2337,12 @@ def export_build(
         except Exception:
             return Path("workspaces") / sid
 
-    def _parse_srt_time_to_ms(s: str) -> int:
-        m = re.match(r"(\d{1,2}):(\d{2}):(\d{2})[,\.](\d{1,3})", str(s).strip())
-        if not m: return 0
-        h, m_, s_, ms = map(int, m.groups())
-        return ((h*3600 + m_*60 + s_) * 1000) + ms
-
-    def _load_times_dict(ws: Path) -> dict:
-        """index -> (start_ms, end_ms) dari beberapa sumber."""
-        times = {}
-
-        # 1) capcut_map_all.json
-        man = ws / "capcut" / "capcut_map_all.json"
-        if man.exists():
-            try:
-                data = json.loads(man.read_text(encoding="utf-8"))
-                for it in data.get("items", []):
-                    idx = it.get("row_index", it.get("index", None))
-                    if idx is None:
-                        continue
-                    s = it.get("start_ms")
-                    e = it.get("end_ms")
-                    if s is None and it.get("start"): s = _parse_srt_time_to_ms(it["start"])
-                    if e is None and it.get("end"):   e = _parse_srt_time_to_ms(it["end"])
-                    if s is not None and e is not None:
-                        times[int(idx)] = (int(s), int(e))
-            except Exception:
-                pass
-        if times:
-            return times
-
-        # 2) editing_cache.json
-        for cand in [ws / "editing_cache.json", ws / "capcut" / "editing_cache.json"]:
-            if not cand.exists():
-                continue
-            try:
-                obj = json.loads(cand.read_text(encoding="utf-8"))
-                arr = obj.get("rows") if isinstance(obj, dict) else obj
-                for r in (arr or []):
-                    try:
-                        idx = int(r.get("index", 0))
-                    except Exception:
-                        continue
-                    s = _parse_srt_time_to_ms(r.get("start", ""))
-                    e = _parse_srt_time_to_ms(r.get("end", ""))
-                    if idx and e >= s:
-                        times[idx] = (s, e)
-                if times:
-                    return times
-            except Exception:
-                pass
-
-        # 3) SRT fallback
-        for name in ["source_video.srt", "translated_latest.srt", "translated.srt"]:
-            f = ws / name
-            if not f.exists():
-                continue
-            content = f.read_text(encoding="utf-8", errors="ignore")
-            blocks = re.split(r"\r?\n\r?\n+", content.strip())
-            for b in blocks:
-                lines = [ln for ln in b.splitlines() if ln.strip()]
-                if len(lines) < 2:
-                    continue
-                try:
-                    idx = int(lines[0].strip())
-                except Exception:
-                    continue
-                tl = lines[1]
-                m = re.match(r".*?(\d{1,2}:\d{2}:\d{2}[,\.]\d{1,3}).*?(\d{1,2}:\d{2}:\d{2}[,\.]\d{1,3})", tl)
-                if not m:
-                    continue
-                s = _parse_srt_time_to_ms(m.group(1))
-                e = _parse_srt_time_to_ms(m.group(2))
-                if e >= s:
-                    times[idx] = (s, e)
-            if times:
-                return times
-
-        return times  # bisa kosong
     # ---------------------------------
 
+    pm = get_processing_manager()
+    job.progress(0, "Menyiapkan timeline")
     ws = _ws_local(pm, session_id)
+    get_edit_journal(ws).flush()  # edit PATCH yang belum di-compact → tulis ke snapshot/SRT dulu
     if not ws.exists():
         raise HTTPException(404, f"Workspace not found: {session_id}")
 
@@ -2683,7 +2603,8 @@ def export_build(
 
     (ws / "_last_ffmpeg.txt").write_text(" ".join(cmd_full) + "\n\n# filter_complex:\n" + fc_text,
                                          encoding="utf-8", errors="ignore")
-    p = subprocess.run(cmd_full, capture_output=True, text=True)
+    job.progress(20, "ffmpeg: mix + mux")
+    p = job.run(cmd_full)
     if p.returncode != 0:
         (ws / "_ffmpeg_err.txt").write_text(p.stderr or "", encoding="utf-8", errors="ignore")
         raise HTTPException(500, "ffmpeg gagal. Cek _ffmpeg_err.txt di workspace.")
@@ -2829,9 +2750,8 @@ def capcut_nudge_all(session_id: str, body: Dict[str, Any], pm=Depends(get_proce
 #Helper Segment tab Editing speaker dan gender pisah masing-masing
 # === helpers: load speaker-vs-gender secara TERPISAH ===
 
-def _latest(ws: Path, pattern: str) -> Optional[Path]:
-    cands = sorted(ws.glob(pattern), key=lambda p: p.stat().st_mtime, reverse=True)
-    return cands[0] if cands else None
+def _latest(ws: Path, kind: str) -> Optional[Path]:
+    return get_artifacts(ws).latest(kind)
 
 def _load_json_safely(p: Optional[Path]):
     if not p or not p.exists():
@@ -2846,7 +2766,7 @@ def _load_speaker_segments(ws: Path):
     Prefer file *_speakers.json (ringkasan per-segmen dari jalur SPEAKER).
     Format keluaran: [{start: float(sec), end: float(sec), speaker: 'SPK_01'}, ...]
     """
-    p = _latest(ws, "*_speakers.json")
+    p = _latest(ws, "speakers_json")
     arr = _load_json_safely(p)
     out = []
     for it in arr or []:
@@ -2865,7 +2785,7 @@ def _load_gender_segments(ws: Path):
     Prefer file *_segments.json (per-segmen dari jalur GENDER).
     Format keluaran: [{start: float(sec), end: float(sec), gender: 'male|female|unknown'}, ...]
     """
-    p = _latest(ws, "*_segments.json")
+    p = _latest(ws, "segments_json")
     arr = _load_json_safely(p)
     out = []
     for it in arr or []:
@@ -2907,6 +2827,13 @@ def _norm_seg_list(seg_list, keep=None):
     
 @router.post("/api/session/{session_id}/export/preview-audio")
 def export_preview_audio(session_id: str, body: dict = Body(...), pm = Depends(get_processing_manager)):
+    """Antrikan job preview audio (pool ffmpeg, prioritas interaktif → didahulukan dari export)."""
+    if not pm.get_session(session_id):
+        raise HTTPException(404, "Session not found")
+    job = job_scheduler.submit("export_preview_audio", session_id, {"session_id": session_id, "body": body})
+    return JSONResponse({"job_id": job["id"], "status": job["status"]}, status_code=202)
+
+def _export_preview_audio_job(job: Job, session_id: str, body: dict):
     """
     Bangun audio preview (tanpa chipmunk):
       - TTS di-atempo adaptif (>= base_tempo, <= max_atempo)
@@ -2926,62 +2853,6 @@ def export_preview_audio(session_id: str, body: dict = Body(...), pm = Depends(g
         except Exception:
             return Path("workspaces") / sid
 
-    def _parse_srt_time_to_ms(s: str) -> int:
-        m = _re.match(r"(\d{1,2}):(\d{2}):(\d{2})[,\.](\d{1,3})", str(s).strip())
-        if not m: return 0
-        h, m_, s_, ms = map(int, m.groups())
-        return ((h*3600 + m_*60 + s_) * 1000) + ms
-
-    def _load_times_dict(ws: Path) -> dict:
-        # 1) capcut_map_all.json → 2) editing_cache.json → 3) SRT fallback
-        times = {}
-        man = ws / "capcut" / "capcut_map_all.json"
-        if man.exists():
-            try:
-                data = json.loads(man.read_text(encoding="utf-8"))
-                for it in data.get("items", []):
-                    idx = it.get("row_index", it.get("index", None))
-                    if idx is None: continue
-                    s = it.get("start_ms"); e = it.get("end_ms")
-                    if s is None and it.get("start"): s = _parse_srt_time_to_ms(it["start"])
-                    if e is None and it.get("end"):   e = _parse_srt_time_to_ms(it["end"])
-                    if s is not None and e is not None:
-                        times[int(idx)] = (int(s), int(e))
-            except Exception: pass
-        if times: return times
-
-        for cand in [ws/"editing_cache.json", ws/"capcut"/"editing_cache.json"]:
-            if not cand.exists(): continue
-            try:
-                obj = json.loads(cand.read_text(encoding="utf-8"))
-                arr = obj.get("rows") if isinstance(obj, dict) else obj
-                for r in (arr or []):
-                    try: idx = int(r.get("index", 0))
-                    except Exception: continue
-                    s = _parse_srt_time_to_ms(r.get("start",""))
-                    e = _parse_srt_time_to_ms(r.get("end",""))
-                    if idx and e >= s: times[idx] = (s, e)
-                if times: return times
-            except Exception: pass
-
-        for name in ["source_video.srt", "translated_latest.srt", "translated.srt"]:
-            f = ws / name
-            if not f.exists(): continue
-            content = f.read_text(encoding="utf-8", errors="ignore")
-            blocks = _re.split(r"\r?\n\r?\n+", content.strip())
-            for b in blocks:
-                lines = [ln for ln in b.splitlines() if ln.strip()]
-                if len(lines) < 2: continue
-                try: idx = int(lines[0].strip())
-                except Exception: continue
-                tl = lines[1]
-                m = _re.search(r"(\d{1,2}:\d{2}:\d{2}[,\.]\d{1,3}).*?(\d{1,2}:\d{2}:\d{2}[,\.]\d{1,3})", tl)
-                if not m: continue
-                s = _parse_srt_time_to_ms(m.group(1)); e = _parse_srt_time_to_ms(m.group(2))
-                if e >= s: times[idx] = (s, e)
-            if times: return times
-        return times
-
     def _ffprobe_duration_ms(path: Path) -> int:
         try:
             p = subprocess.run(
@@ -2995,7 +2866,9 @@ def export_preview_audio(session_id: str, body: dict = Body(...), pm = Depends(g
             return 0
 
     # ----- input & opsi -----
+    pm = get_processing_manager()
     ws = _ws_local(pm, session_id); ws.mkdir(parents=True, exist_ok=True)
+    get_edit_journal(ws).flush()  # edit PATCH yang belum di-compact → tulis ke snapshot/SRT dulu
     src_video = next((p for p in [ws/"video.mp4", ws/"video.mkv", ws/"video.mov"] if p.exists()), None)
 
     base_tempo   = float(body.get("base_tempo", 1.4))
@@ -3081,6 +2954,7 @@ def export_preview_audio(session_id: str, body: dict = Body(...), pm = Depends(g
             "max_atempo": max_atempo, "guard_ms": guard_ms, "safety_ms": safety_ms, "timeline_ms": timeline_ms}
 
     for k, f in enumerate(tts_files):
+        job.progress(80.0 * k / len(tts_files), f"Segmen {k}/{len(tts_files)}")
         inputs.append(str(f))
         in_idx = base_in + k
         in_label  = f"[{in_idx}:a]"
@@ -3122,8 +2996,8 @@ def export_preview_audio(session_id: str, body: dict = Body(...), pm = Depends(g
         # file segmen mandiri (untuk Play Segment)
         seg_out = seg_dir / f"row_{row_idx}.m4a"
         seg_ops = f"aformat=channel_layouts=stereo:sample_rates=48000,{(tempo_ops+',') if tempo_ops else ''}volume={tts_vol:.3f},apad,atrim=0:{dur_s:.6f},asetpts=PTS-STARTPTS"
-        subprocess.run(["ffmpeg","-y","-hide_banner","-loglevel","error","-i", str(f),
-                        "-af", seg_ops, "-vn","-c:a","aac","-b:a", audio_br,"-movflags","+faststart", str(seg_out)], check=False)
+        job.run(["ffmpeg","-y","-hide_banner","-loglevel","error","-i", str(f),
+                 "-af", seg_ops, "-vn","-c:a","aac","-b:a", audio_br,"-movflags","+faststart", str(seg_out)])
 
         tempo_map[str(row_idx)] = {
             "url": f"/api/session/{quote(session_id)}/wsfile?rel={quote(str(seg_out.relative_to(ws).as_posix()))}",
@@ -3150,7 +3024,8 @@ def export_preview_audio(session_id: str, body: dict = Body(...), pm = Depends(g
     cmd += ["-filter_complex_script", str(fc_path), "-map","[aout]","-vn","-c:a","aac","-b:a", audio_br,"-movflags","+faststart", str(out_path)]
     (ws/"_last_ffmpeg_preview.txt").write_text(" ".join(cmd) + "\n\n# filter_complex:\n" + fc_text, encoding="utf-8", errors="ignore")
 
-    p = subprocess.run(cmd, capture_output=True, text=True)
+    job.progress(80, "ffmpeg: mix preview")
+    p = job.run(cmd)
     if p.returncode != 0:
         (ws/"_ffmpeg_preview_err.txt").write_text(p.stderr or "", encoding="utf-8", errors="ignore")
         raise HTTPException(500, "ffmpeg preview gagal. Cek _ffmpeg_preview_err.txt.")
@@ -3172,3 +3047,46 @@ def export_preview_audio(session_id: str, body: dict = Body(...), pm = Depends(g
         "file": f"/api/session/{quote(session_id)}/wsfile?rel={quote(out_path.relative_to(ws).as_posix())}",
         "tempo_map": f"/api/session/{quote(session_id)}/wsfile?rel={quote(tm_path.relative_to(ws).as_posix())}",
     }
+
+
+# ---------- Jobs ----------
+job_scheduler.register("extract_audio", _extract_audio_job, pool="ffmpeg", priority=PRIORITY_NORMAL)
+job_scheduler.register("diarize", _diarization_job, pool="model", priority=PRIORITY_NORMAL)
+job_scheduler.register("tts_export", _tts_export_job, pool="api", priority=PRIORITY_BATCH)
+job_scheduler.register("capcut_import", _capcut_import_job, pool="ffmpeg", priority=PRIORITY_NORMAL)
+job_scheduler.register("export_build", _export_build_job, pool="ffmpeg", priority=PRIORITY_BATCH)
+job_scheduler.register("export_preview_audio", _export_preview_audio_job, pool="ffmpeg", priority=PRIORITY_INTERACTIVE)
+
+@router.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_scheduler.get(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
+
+@router.post("/api/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = job_scheduler.cancel(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
+
+@router.get("/api/session/{session_id}/jobs")
+def list_session_jobs(session_id: str):
+    return {"jobs": job_scheduler.list(session_id)}
+
+
+# ---------- Translate controller ----------
+@router.get("/api/translate/controller")
+async def translate_controller_state():
+    """State live controller AIMD DeepSeek (concurrency, batch size, 429/timeout/mismatch)."""
+    from translate_control import get_translate_controller
+    return get_translate_controller().snapshot()
+
+
+# ---------- Model registry ----------
+@router.get("/api/models/stats")
+async def models_stats():
+    """Waktu load model (model_registry) per model worker, dari response terakhir tiap worker.
+    Tidak menunggu worker idle (worker yang sedang diarization tetap dilaporkan, busy=true)."""
+    return model_workers.stats()
@@ -36,7 +36,9 @@ class TTSConfig(BaseModel):
     max_atempo: float = 1.8
     fade_sec: float = 0.02
     mix_chunk: int = 400
+    mix_backend: str = "memmap"  # memmap | ffmpeg
     tts_timeout: int = 25
+    tts_concurrency: int = 0  # 0 = default per engine
     
     # ElevenLabs specific
     el_api_key: Optional[str] = None
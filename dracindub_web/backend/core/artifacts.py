@@ -0,0 +1,190 @@
+# backend/core/artifacts.py
+"""
+Manifest artefak per workspace (artifacts.json): setiap tahap yang menghasilkan
+file mencatatnya di sini, jadi endpoint cukup lookup per 'kind' (O(1)) — tidak
+perlu glob/rglob workspace lalu sort mtime (lambat kalau ada ribuan seg_*.wav,
+preview_segments/*.m4a, stem Demucs, dst).
+
+- Entry: {path (relatif ws), hash, size, mtime_ns, created_at, producer, params}
+- Kind ditentukan dari nama file (ARTIFACT_KINDS: pola + rekursif/tidak),
+  satu file bisa masuk beberapa kind (mis. *_gender_*_segments.json juga *_segments.json)
+- latest(kind) = entry tercatat terbaru yang filenya masih ada
+- Workspace lama: backfill satu kali (satu walk) untuk kind yang belum pernah di-scan;
+  daftar kind yang sudah di-backfill disimpan di manifest
+- Manifest di-reload kalau file berubah dari proses lain (cek mtime/size)
+"""
+import fnmatch, hashlib, json, os, time, threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+MANIFEST_NAME = "artifacts.json"
+HISTORY_MAX = 20          # entry per kind yang disimpan
+
+# kind -> (pola nama file, boleh di subfolder?)  — sama dengan glob lama di endpoint
+ARTIFACT_KINDS = {
+    "translated_srt":  ("translated_*.srt", True),
+    "gender_srt":      ("*_gender_*.srt", True),
+    "gender_segments": ("*_gender_*_segments.json", True),
+    "gender_speakers": ("*_gender_*_speakers.json", True),
+    "segments_json":   ("*_segments.json", False),
+    "speakers_json":   ("*_speakers.json", False),
+    "vocals_16k":      ("source_video_16k.wav", False),
+    "instrument":      ("instrument.wav", False),
+}
+
+# folder berisi ribuan file hasil antara — tidak pernah berisi artefak ber-kind
+_SKIP_DIRS = {"_sep_demucs", "preview_segments", "capcut", "__pycache__"}
+
+
+def kinds_for(rel: str) -> List[str]:
+    name = rel.rsplit("/", 1)[-1]
+    nested = "/" in rel
+    return [k for k, (pat, rec) in ARTIFACT_KINDS.items()
+            if fnmatch.fnmatchcase(name, pat) and (rec or not nested)]
+
+
+def file_hash(p: Path) -> Optional[str]:
+    try:
+        h = hashlib.blake2b(digest_size=16)
+        with p.open("rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+    except OSError:
+        return None
+
+
+class ArtifactManifest:
+    def __init__(self, ws: Path):
+        self.ws = Path(ws)
+        self.path = self.ws / MANIFEST_NAME
+        self.lock = threading.RLock()
+        self._data: Optional[dict] = None
+        self._stamp = None
+
+    # ---------- load / save ----------
+    def _file_stamp(self):
+        try:
+            st = self.path.stat()
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _load(self) -> dict:
+        stamp = self._file_stamp()
+        if self._data is not None and stamp == self._stamp:
+            return self._data
+        data = None
+        if stamp:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except Exception:
+                data = None
+        if not isinstance(data, dict):
+            data = {}
+        data.setdefault("kinds", {})
+        data.setdefault("backfilled", [])
+        self._data, self._stamp = data, stamp
+        missing = [k for k in ARTIFACT_KINDS if k not in data["backfilled"]]
+        if missing and self.ws.exists():
+            self._backfill(missing)
+        return self._data
+
+    def _save(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self._data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._stamp = self._file_stamp()
+
+    def _backfill(self, kinds: List[str]):
+        """Satu kali per workspace (per kind baru): satu walk, catat file lama urut mtime."""
+        found = []
+        for root, dirs, files in os.walk(self.ws):
+            dirs[:] = [d for d in dirs if d not in _SKIP_DIRS]
+            base = Path(root)
+            for name in files:
+                rel = (base / name).relative_to(self.ws).as_posix()
+                ks = [k for k in kinds_for(rel) if k in kinds]
+                if ks:
+                    found.append((rel, ks))
+        stats = []
+        for rel, ks in found:
+            try:
+                stats.append(((self.ws / rel).stat().st_mtime_ns, rel, ks))
+            except OSError:
+                pass
+        for _, rel, ks in sorted(stats):
+            self._add(rel, ks, producer="backfill", params=None)
+        self._data["backfilled"] = sorted(set(self._data["backfilled"]) | set(kinds))
+        self._save()
+
+    # ---------- tulis ----------
+    def _add(self, rel: str, kinds: List[str], producer: Optional[str], params: Optional[dict],
+             created_at: Optional[float] = None):
+        p = self.ws / rel
+        try:
+            st = p.stat()
+        except OSError:
+            return
+        entry = {
+            "path": rel,
+            "hash": file_hash(p) if p.is_file() else None,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "created_at": created_at if created_at is not None else time.time(),
+            "producer": producer,
+            "params": params or {},
+        }
+        for k in kinds:
+            lst = [e for e in self._data["kinds"].get(k, []) if e.get("path") != rel]
+            lst.append(entry)
+            self._data["kinds"][k] = lst[-HISTORY_MAX:]
+
+    def record(self, path, producer: str, params: Optional[dict] = None,
+               kinds: Optional[List[str]] = None) -> List[str]:
+        """Catat file hasil tahap `producer`. Kind otomatis dari nama file kalau tidak diberikan."""
+        p = Path(path)
+        try:
+            rel = p.resolve().relative_to(self.ws.resolve()).as_posix()
+        except (OSError, ValueError):
+            return []   # di luar workspace
+        with self.lock:
+            self._load()
+            ks = kinds or kinds_for(rel)
+            if ks:
+                self._add(rel, ks, producer, params)
+                self._save()
+            return ks
+
+    # ---------- baca ----------
+    def latest(self, kind: str) -> Optional[Path]:
+        """File terbaru untuk kind ini (yang masih ada di disk), atau None."""
+        with self.lock:
+            lst = self._load()["kinds"].get(kind) or []
+            for e in reversed(lst):
+                p = self.ws / e["path"]
+                if p.exists():
+                    return p
+            return None
+
+    def entry(self, kind: str) -> Optional[dict]:
+        """Metadata entry terbaru (hash, producer, params, ...) untuk kind ini."""
+        with self.lock:
+            lst = self._load()["kinds"].get(kind) or []
+            for e in reversed(lst):
+                if (self.ws / e["path"]).exists():
+                    return dict(e)
+            return None
+
+
+_manifests: Dict[str, ArtifactManifest] = {}
+_manifests_lock = threading.Lock()
+
+def get_artifacts(ws: Path) -> ArtifactManifest:
+    """Satu ArtifactManifest (dan lock-nya) per workspace."""
+    key = str(Path(ws).resolve())
+    with _manifests_lock:
+        m = _manifests.get(key)
+        if m is None:
+            m = _manifests[key] = ArtifactManifest(Path(ws))
+        return m
@@ -0,0 +1,191 @@
+# backend/core/edit_journal.py
+"""
+Journal edit Tab 3 (Editing): PATCH baris → append ke editing_journal.jsonl,
+snapshot (editing_cache.json + edited_translated.srt + translated_latest.srt)
+baru ditulis ulang saat compaction.
+
+- Satu baris JSONL per PATCH: {"ts", "rows": [...], "deleted": [...]}
+  (baris terakhir yang terpotong karena crash diabaikan saat replay)
+- merged_rows() = snapshot + replay journal → view konsisten untuk pembaca
+  (get_editing, _load_rows, export) tanpa menunggu compaction
+- Compaction otomatis kalau journal > COMPACT_OPS baris-edit / COMPACT_BYTES,
+  ada baris yang dihapus, atau dipanggil pembaca yang butuh file SRT (flush sebelum baca)
+- Semua operasi per workspace diserialisasi dengan lock (endpoint sync jalan di threadpool)
+"""
+import json, os, time, threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.artifacts import get_artifacts
+
+JOURNAL_NAME = "editing_journal.jsonl"
+SNAPSHOT_NAME = "editing_cache.json"
+COMPACT_OPS = 500
+COMPACT_BYTES = 256 * 1024
+
+ROW_FIELDS = ("start", "end", "original", "translation", "speaker", "gender", "notes")
+
+
+def rows_to_srt(rows: List[dict]) -> str:
+    """SRT 'edited' (nomor urut ulang), format sama dengan save penuh."""
+    srt_lines, n = [], 1
+    for r in rows:
+        srt_lines.append(str(n))
+        srt_lines.append(f"{r.get('start') or ''} --> {r.get('end') or ''}")
+        srt_lines.append((r.get("translation") or "").strip())
+        srt_lines.append("")
+        n += 1
+    return "\n".join(srt_lines).rstrip() + "\n"
+
+
+def _write_atomic(p: Path, text: str):
+    tmp = p.with_name(p.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, p)
+
+
+class EditJournal:
+    def __init__(self, ws: Path):
+        self.ws = Path(ws)
+        self.snapshot_p = self.ws / SNAPSHOT_NAME
+        self.journal_p = self.ws / JOURNAL_NAME
+        self.lock = threading.RLock()
+
+    # ---------- baca ----------
+    def has_snapshot(self) -> bool:
+        return self.snapshot_p.exists()
+
+    def _read_snapshot(self) -> List[dict]:
+        if not self.snapshot_p.exists():
+            return []
+        try:
+            payload = json.loads(self.snapshot_p.read_text(encoding="utf-8", errors="ignore"))
+        except Exception:
+            return []
+        rows = payload.get("rows") if isinstance(payload, dict) else payload
+        return [dict(r) for r in (rows or []) if isinstance(r, dict)]
+
+    def _read_journal(self) -> List[dict]:
+        if not self.journal_p.exists():
+            return []
+        ops = []
+        with self.journal_p.open("r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    ops.append(json.loads(line))
+                except Exception:
+                    pass  # baris terpotong (crash saat append)
+        return ops
+
+    def merged_rows(self) -> Optional[List[dict]]:
+        """Snapshot + journal. None kalau belum pernah ada save sama sekali."""
+        with self.lock:
+            if not self.snapshot_p.exists() and not self.journal_p.exists():
+                return None
+            return self._merge(self._read_snapshot(), self._read_journal())
+
+    @staticmethod
+    def _merge(rows: List[dict], ops: List[dict]) -> List[dict]:
+        if not ops:
+            return rows
+        by_idx: Dict[int, dict] = {}
+        order = []
+        for r in rows:
+            try:
+                k = int(r.get("index"))
+            except Exception:
+                continue
+            if k not in by_idx:
+                order.append(k)
+            by_idx[k] = r
+        for op in ops:
+            for k in op.get("deleted") or []:
+                by_idx.pop(int(k), None)
+            for p in op.get("rows") or []:
+                k = int(p["index"])
+                cur = by_idx.get(k)
+                if cur is None:
+                    cur = by_idx[k] = {"index": k}
+                    order.append(k)
+                for f in ROW_FIELDS:
+                    if f in p:
+                        cur[f] = p[f]
+        out = [by_idx[k] for k in dict.fromkeys(order) if k in by_idx]
+        out.sort(key=lambda r: int(r["index"]))
+        return out
+
+    # ---------- tulis ----------
+    def append(self, rows: List[dict], deleted: Optional[List[int]] = None) -> bool:
+        """Tambah 1 entry journal. Return True kalau journal sudah di-compact."""
+        entry = {"ts": time.time(), "rows": rows, "deleted": [int(k) for k in (deleted or [])]}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self.lock:
+            with self.journal_p.open("a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            # hapus baris → compact langsung: SRT snapshot dipakai get_editing sebagai basis baris,
+            # baris yang dihapus hanya hilang dari view setelah SRT ditulis ulang
+            if entry["deleted"] or self._needs_compact():
+                self.compact()
+                return True
+        return False
+
+    def _needs_compact(self) -> bool:
+        try:
+            if self.journal_p.stat().st_size > COMPACT_BYTES:
+                return True
+        except OSError:
+            return False
+        n = sum(len(op.get("rows") or []) + len(op.get("deleted") or []) for op in self._read_journal())
+        return n > COMPACT_OPS
+
+    def save_full(self, rows: List[dict]):
+        """Save penuh (POST): tulis snapshot baru & buang journal."""
+        with self.lock:
+            self._write_snapshot(rows)
+            try:
+                self.journal_p.unlink()
+            except FileNotFoundError:
+                pass
+
+    def compact(self):
+        """Gabung journal ke snapshot + SRT, lalu kosongkan journal."""
+        with self.lock:
+            ops = self._read_journal()
+            if not ops:
+                return
+            self._write_snapshot(self._merge(self._read_snapshot(), ops))
+            try:
+                self.journal_p.unlink()
+            except FileNotFoundError:
+                pass
+
+    def flush(self):
+        """Dipanggil pembaca yang butuh file SRT/snapshot fisik."""
+        if self.journal_p.exists():
+            self.compact()
+
+    def _write_snapshot(self, rows: List[dict]):
+        _write_atomic(self.snapshot_p, json.dumps({"rows": rows}, ensure_ascii=False, indent=2))
+        txt = rows_to_srt(rows)
+        _write_atomic(self.ws / "edited_translated.srt", txt)
+        # opsional: jaga kompatibilitas
+        _write_atomic(self.ws / "translated_latest.srt", txt)
+        get_artifacts(self.ws).record(self.ws / "translated_latest.srt", "editing")
+
+
+_journals: Dict[str, EditJournal] = {}
+_journals_lock = threading.Lock()
+
+def get_edit_journal(ws: Path) -> EditJournal:
+    """Satu EditJournal (dan lock-nya) per workspace."""
+    key = str(Path(ws).resolve())
+    with _journals_lock:
+        j = _journals.get(key)
+        if j is None:
+            j = _journals[key] = EditJournal(Path(ws))
+        return j
@@ -0,0 +1,258 @@
+# backend/core/editing_index.py
+"""
+Index NumPy untuk Tab 3 (Editing): pemilihan segmen & metrik warning
+untuk SEMUA baris sekaligus, hasil identik dengan loop per-baris lama.
+
+- Kandidat overlap: segmen urut start + prefix-max end → `searchsorted`
+  memberi rentang [lo, hi) per baris, lalu pasangan (baris, segmen) di-expand.
+- Overlap per speaker/gender dijumlah per baris (bincount) dalam urutan
+  segmen asli → penjumlahan float sama persis dengan `ov += ...` lama.
+  (Integral coverage kumulatif tidak dipakai: selisih dua prefix besar
+  menggeser hasil beberapa ulp dan bisa membalik ambang OK/WEAK/BAD.)
+- Jarak ke boundary terdekat: `searchsorted` di boundary terurut.
+
+Benchmark: python -m core.editing_index [rows...]   (dari folder backend)
+"""
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+class _Sorted:
+    """Subset segmen diurut by start, dengan prefix-max end untuk batas bawah kandidat."""
+
+    def __init__(self, start: np.ndarray, end: np.ndarray, idx: np.ndarray):
+        order = np.argsort(start[idx], kind="stable")
+        self.idx = idx[order]
+        self.start = start[self.idx]
+        self.end = end[self.idx]
+        self.maxend = np.maximum.accumulate(self.end) if len(self.end) else self.end
+
+    def overlap_pairs(self, A0: np.ndarray, A1: np.ndarray):
+        """Pasangan (baris, segmen) dengan overlap > 0 → (rows, seg_idx, ov), urut (baris, seg_idx)."""
+        hi = np.searchsorted(self.start, A1, side="left")     # start < a1
+        lo = np.searchsorted(self.maxend, A0, side="right")   # end > a0 mungkin mulai di sini
+        rows, pos = _expand(lo, hi)
+        ov = np.minimum(A1[rows], self.end[pos]) - np.maximum(A0[rows], self.start[pos])
+        keep = ov > 0
+        rows, idx, ov = rows[keep], self.idx[pos[keep]], ov[keep]
+        k = np.lexsort((idx, rows))
+        return rows[k], idx[k], ov[k]
+
+    def first_cover(self, X: np.ndarray) -> np.ndarray:
+        """Index segmen PERTAMA (urutan asli) dengan start <= x <= end; -1 kalau tidak ada."""
+        n_seg = len(self.idx)
+        hi = np.searchsorted(self.start, X, side="right")     # start <= x
+        lo = np.searchsorted(self.maxend, X, side="left")     # end >= x mungkin mulai di sini
+        rows, pos = _expand(lo, hi)
+        keep = (self.start[pos] <= X[rows]) & (X[rows] <= self.end[pos])
+        out = np.full(len(X), n_seg, dtype=np.int64)
+        np.minimum.at(out, rows[keep], self.idx[pos[keep]])
+        out[out == n_seg] = -1
+        return out
+
+
+def _expand(lo: np.ndarray, hi: np.ndarray):
+    """Rentang [lo_i, hi_i) per baris → array datar (row, pos)."""
+    cnt = np.maximum(hi - lo, 0)
+    rows = np.repeat(np.arange(len(cnt)), cnt)
+    start_of_row = np.repeat(lo - (np.cumsum(cnt) - cnt), cnt)
+    pos = np.arange(int(cnt.sum()), dtype=np.int64) + start_of_row
+    return rows, pos
+
+
+class SegmentIndex:
+    """
+    Index untuk list segmen ter-normalisasi (kunci 'start_s'/'end_s', lihat _norm_seg_list).
+    label_key: 'speaker' / 'gender' untuk overlap per label.
+    """
+
+    def __init__(self, seg_list: List[dict], label_key: Optional[str] = None):
+        self.segs = seg_list or []
+        self.label_key = label_key
+        self.start = np.array([float(s["start_s"]) for s in self.segs], dtype=np.float64)
+        self.end = np.array([float(s["end_s"]) for s in self.segs], dtype=np.float64)
+        self._all = _Sorted(self.start, self.end, np.arange(len(self.segs)))
+        self._by_label = {}
+        if label_key:
+            groups = {}
+            for i, s in enumerate(self.segs):
+                groups.setdefault(s.get(label_key), []).append(i)
+            self._by_label = {
+                lab: _Sorted(self.start, self.end, np.array(ix, dtype=np.int64))
+                for lab, ix in groups.items()
+            }
+
+    def __len__(self):
+        return len(self.segs)
+
+    def best_overlap(self, A0: np.ndarray, A1: np.ndarray):
+        """Segmen overlap terbesar per baris (seri → urutan pertama). Return (idx|-1, ov)."""
+        rows, idx, ov = self._all.overlap_pairs(A0, A1)
+        best = np.full(len(A0), -1, dtype=np.int64)
+        best_ov = np.zeros(len(A0), dtype=np.float64)
+        if len(rows):
+            k = np.lexsort((idx, -ov, rows))
+            rows, idx, ov = rows[k], idx[k], ov[k]
+            first = np.ones(len(rows), dtype=bool)
+            first[1:] = rows[1:] != rows[:-1]
+            best[rows[first]] = idx[first]
+            best_ov[rows[first]] = ov[first]
+        return best, best_ov
+
+    def first_cover(self, X: np.ndarray) -> np.ndarray:
+        return self._all.first_cover(X)
+
+    def label_overlap(self, labels: Sequence, A0: np.ndarray, A1: np.ndarray) -> np.ndarray:
+        """Total overlap [a0,a1] dengan semua segmen ber-label sama dengan labels[i]."""
+        out = np.zeros(len(A0), dtype=np.float64)
+        by_lab = {}
+        for i, lab in enumerate(labels):
+            if lab is not None and lab in self._by_label:
+                by_lab.setdefault(lab, []).append(i)
+        for lab, ix in by_lab.items():
+            ix = np.array(ix, dtype=np.int64)
+            rows, _, ov = self._by_label[lab].overlap_pairs(A0[ix], A1[ix])
+            # bincount menambah berurutan (urut segmen asli) → sama dengan loop `ov += x`
+            out[ix] = np.bincount(rows, weights=ov, minlength=len(ix))
+        return out
+
+    def seg(self, i: int) -> Optional[dict]:
+        return self.segs[i] if i >= 0 else None
+
+
+def pick_segments(index: SegmentIndex, A0: Sequence[float], A1: Sequence[float],
+                  policy: str, majority: float, micro_ms: float, long_ms: float) -> List[Optional[dict]]:
+    """
+    Pilih segmen per baris [A0[i], A1[i]] sesuai policy (lihat ASSIGN_POLICY di endpoints.py):
+    overlap | start | end | midpoint | majority_then_start | majority_then_midpoint | adaptive.
+    Fallback selalu ke segmen overlap terbesar.
+    """
+    n = len(A0)
+    if not len(index) or not n:
+        return [None] * n
+    A0 = np.asarray(A0, dtype=np.float64)
+    A1 = np.asarray(A1, dtype=np.float64)
+    mode = (policy or "overlap").lower().strip()
+    majority = float(majority)
+
+    best, best_ov = index.best_overlap(A0, A1)
+    if mode == "overlap":
+        return [index.seg(int(b)) for b in best]
+
+    mid = (A0 + A1) / 2.0
+    cover = {}
+    def cov(name):
+        if name not in cover:
+            cover[name] = index.first_cover({"start": A0, "end": A1, "midpoint": mid}[name])
+        return cover[name]
+
+    out = []
+    for i in range(n):
+        a0 = float(A0[i]); a1 = float(A1[i])
+        b = int(best[i])
+        dur = max(1e-6, a1 - a0)
+        maj = b >= 0 and float(best_ov[i]) / dur >= majority
+
+        if mode in ("start", "end", "midpoint"):
+            c = int(cov(mode)[i])
+        elif mode == "majority_then_start":
+            c = b if maj else int(cov("start")[i])
+        elif mode == "majority_then_midpoint":
+            c = b if maj else int(cov("midpoint")[i])
+        elif mode == "adaptive":
+            dur_ms = (a1 - a0) * 1000.0
+            if dur_ms <= micro_ms:
+                c = int(cov("midpoint")[i])
+            elif dur_ms >= long_ms:
+                c = b if maj else int(cov("start")[i])
+            else:
+                c = b if maj else int(cov("midpoint")[i])
+        else:
+            c = b
+        out.append(index.seg(c if c >= 0 else b))
+    return out
+
+
+def nearest_bound(bounds: np.ndarray, X: np.ndarray) -> np.ndarray:
+    """min |b - x| ke boundary terurut; NaN kalau tidak ada boundary."""
+    if not len(bounds):
+        return np.full(len(X), np.nan)
+    i = np.searchsorted(bounds, X)
+    left = np.abs(bounds[np.clip(i - 1, 0, len(bounds) - 1)] - X)
+    right = np.abs(bounds[np.clip(i, 0, len(bounds) - 1)] - X)
+    return np.minimum(left, right)
+
+
+# ---------- Benchmark ----------
+def _reference(spk_segs, gen_segs, rows):
+    """Loop lama get_editing step 5 (frac_spk, frac_gen, near_*), untuk cek identik."""
+    def _ovl(a0, a1, b0, b1):
+        x = min(a1, b1) - max(a0, b0)
+        return x if x > 0 else 0.0
+    all_bounds = []
+    for ss in spk_segs + gen_segs:
+        all_bounds.append(float(ss["start_s"])); all_bounds.append(float(ss["end_s"]))
+    out = []
+    for a0, a1, spk, gen in rows:
+        dur = max(1e-6, a1 - a0)
+        ov = 0.0
+        for ss in spk_segs:
+            if ss.get("speaker") == spk:
+                ov += _ovl(a0, a1, float(ss["start_s"]), float(ss["end_s"]))
+        frac_spk = ov / dur
+        ov = 0.0
+        for gg in gen_segs:
+            if gg.get("gender") == gen:
+                ov += _ovl(a0, a1, float(gg["start_s"]), float(gg["end_s"]))
+        frac_gen = ov / dur
+        ns = min((abs(b - a0) for b in all_bounds), default=None)
+        ne = min((abs(b - a1) for b in all_bounds), default=None)
+        out.append((frac_spk, frac_gen, ns, ne))
+    return out
+
+
+def _bench(n_rows: int, seed: int = 0):
+    import random, time
+    rnd = random.Random(seed)
+    dur = n_rows * 2.0
+    n_seg = n_rows
+    spk_segs, gen_segs = [], []
+    for _ in range(n_seg):
+        a = round(rnd.uniform(0, dur), 3); b = round(a + rnd.uniform(0.1, 5.0), 3)
+        spk_segs.append({"start_s": a, "end_s": b, "speaker": f"SPEAKER_{rnd.randrange(10):02d}"})
+        gen_segs.append({"start_s": a, "end_s": b, "gender": rnd.choice(("male", "female", "unknown"))})
+    rows = []
+    for _ in range(n_rows):
+        a = round(rnd.uniform(0, dur), 3)
+        rows.append((a, round(a + rnd.uniform(0.05, 4.0), 3),
+                     f"SPEAKER_{rnd.randrange(10):02d}", rnd.choice(("male", "female", "unknown"))))
+
+    t = time.perf_counter()
+    si = SegmentIndex(spk_segs, "speaker"); gi = SegmentIndex(gen_segs, "gender")
+    A0 = np.array([r[0] for r in rows]); A1 = np.array([r[1] for r in rows])
+    dur_s = np.maximum(1e-6, A1 - A0)
+    fs = si.label_overlap([r[2] for r in rows], A0, A1) / dur_s
+    fg = gi.label_overlap([r[3] for r in rows], A0, A1) / dur_s
+    bounds = np.unique(np.concatenate([si.start, si.end, gi.start, gi.end]))
+    ns = nearest_bound(bounds, A0); ne = nearest_bound(bounds, A1)
+    t_np = time.perf_counter() - t
+
+    # loop lama O(rows × segs) → ukur di sampel lalu ekstrapolasi
+    step = max(1, n_rows // 300)
+    sample = rows[::step]
+    t = time.perf_counter()
+    ref = _reference(spk_segs, gen_segs, sample)
+    t_loop = (time.perf_counter() - t) * len(rows) / len(sample)
+
+    got = list(zip(fs.tolist(), fg.tolist(), ns.tolist(), ne.tolist()))[::step]
+    bad = sum(1 for x, y in zip(got, ref) if x != y)
+    print(f"rows={n_rows:6d} segs={n_seg:6d}  loop {t_loop:8.3f}s  numpy {t_np:6.3f}s  "
+          f"x{t_loop / max(t_np, 1e-9):.0f}  {'✅ identik' if not bad else f'❌ {bad} beda'}")
+    return bad
+
+
+if __name__ == "__main__":
+    import sys
+    sizes = [int(a) for a in sys.argv[1:]] or [2000, 10000]
+    sys.exit(1 if sum(_bench(n) for n in sizes) else 0)
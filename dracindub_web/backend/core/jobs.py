@@ -0,0 +1,346 @@
+# backend/core/jobs.py
+"""
+Job scheduler untuk tahap pipeline yang lama (extract audio, diarization, TTS export,
+export MP4, preview audio, import CapCut, ...).
+
+- Resource pool bertipe, masing-masing dengan jumlah slot:
+    model  : diarization + global link (model worker)     DRACINDUB_POOL_MODEL  (default = jumlah model worker)
+    ffmpeg : proses ffmpeg / demucs                       DRACINDUB_POOL_FFMPEG (default 2)
+    api    : panggilan API keluar (TTS, MT)               DRACINDUB_POOL_API    (default 8)
+- Prioritas: angka kecil jalan duluan (preview interaktif > export batch), seri → FIFO
+- Antrian persisten di SQLite (workspaces/jobs.db, WAL): job 'queued' tetap ada setelah
+  server restart; job 'running' milik proses yang sudah mati dikembalikan ke antrian
+- Klaim job atomik (UPDATE ... WHERE status='queued') → aman dengan beberapa worker uvicorn
+- Cancel: job antri langsung batal; job jalan dihentikan di check_cancel()/progress()
+  dan subprocess yang dijalankan lewat job.run() di-kill
+- Progress & status di-push lewat websocket_manager (type 'job_update') dan bisa dipoll
+  via GET /api/jobs/{id}
+- Semua endpoint panjang masuk antrian (slot pool diambil hanya lewat dispatcher → prioritas berlaku);
+  Job.run_async() menjalankan coroutine ProcessingManager di event loop app dari thread job
+"""
+import asyncio, json, os, socket, sqlite3, subprocess, threading, time, traceback, uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from api.websockets import websocket_manager
+from core.model_workers import MODEL_WORKERS
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BATCH = 10
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+POOLS = {
+    "model":  _env_int("DRACINDUB_POOL_MODEL", MODEL_WORKERS),
+    "ffmpeg": _env_int("DRACINDUB_POOL_FFMPEG", 2),
+    "api":    _env_int("DRACINDUB_POOL_API", 8),
+}
+PROGRESS_MIN_INTERVAL = 0.5   # detik antar tulis/push progress
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """Konteks yang diterima handler: progress, cek cancel, jalankan subprocess."""
+
+    def __init__(self, sched: "JobScheduler", row: dict):
+        self._sched = sched
+        self.id = row["id"]
+        self.kind = row["kind"]
+        self.session_id = row["session_id"]
+        self.params = row["params"]
+        self._last_check = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        if self.id in self._sched._cancel_flags:
+            return True
+        now = time.time()
+        if now - self._last_check >= 1.0:       # cancel dari proses lain (worker uvicorn lain)
+            self._last_check = now
+            row = self._sched._row(self.id)
+            if row and row["status"] == "cancelling":
+                self._sched._cancel_flags.add(self.id)
+                return True
+        return False
+
+    def check_cancel(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, pct: float, message: str = ""):
+        self.check_cancel()
+        self._sched._progress(self, pct, message)
+
+    def run(self, cmd: List[str], **kwargs) -> subprocess.CompletedProcess:
+        """subprocess.run(capture_output, text) yang bisa dibatalkan."""
+        p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **kwargs)
+        out, err = [], []
+        readers = [threading.Thread(target=lambda s=s, b=b: b.append(s.read()), daemon=True)
+                   for s, b in ((p.stdout, out), (p.stderr, err))]
+        for t in readers:
+            t.start()
+        while p.poll() is None:
+            if self.cancelled:
+                p.kill()
+                p.wait()
+                raise JobCancelled()
+            time.sleep(0.2)
+        for t in readers:
+            t.join()
+        return subprocess.CompletedProcess(cmd, p.returncode, "".join(out), "".join(err))
+
+    def run_async(self, coro):
+        """Jalankan coroutine di event loop app (notify websocket, model_workers.acall) dan tunggu hasilnya."""
+        self.check_cancel()
+        loop = self._sched._loop
+        if loop is None or loop.is_closed():
+            return asyncio.run(coro)
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+class JobScheduler:
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._local = threading.local()
+        self._handlers: Dict[str, tuple] = {}      # kind -> (fn, pool, priority)
+        self._sems = {name: threading.BoundedSemaphore(n) for name, n in POOLS.items()}
+        self._exec = ThreadPoolExecutor(max_workers=sum(POOLS.values()) + 2, thread_name_prefix="job")
+        self._cond = threading.Condition()
+        self._cancel_flags = set()
+        self._last_progress: Dict[str, float] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = False
+        self._init_db()
+
+    # ---------- SQLite ----------
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.execute("""CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY, kind TEXT, session_id TEXT, pool TEXT, priority INTEGER,
+            status TEXT, params TEXT, progress REAL, message TEXT, result TEXT,
+            error TEXT, error_code INTEGER, owner TEXT,
+            created_at REAL, started_at REAL, finished_at REAL)""")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, pool, priority, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_session ON jobs (session_id, created_at)")
+
+    def _row(self, job_id: str) -> Optional[dict]:
+        r = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not r:
+            return None
+        d = dict(r)
+        for k in ("params", "result"):
+            d[k] = json.loads(d[k]) if d.get(k) else None
+        return d
+
+    def _set(self, job_id: str, **cols):
+        self._conn().execute(
+            f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in cols)} WHERE id = ?",
+            [*cols.values(), job_id],
+        )
+
+    # ---------- API ----------
+    def register(self, kind: str, fn: Callable, pool: str, priority: int = PRIORITY_NORMAL):
+        """fn(job: Job, **params) -> dict (JSON-serializable); exception → status 'error'."""
+        if pool not in self._sems:
+            raise ValueError(f"Unknown pool: {pool}")
+        self._handlers[kind] = (fn, pool, priority)
+
+    def submit(self, kind: str, session_id: Optional[str], params: Optional[dict] = None,
+               priority: Optional[int] = None) -> dict:
+        fn, pool, default_prio = self._handlers[kind]
+        job_id = uuid.uuid4().hex[:12]
+        self._conn().execute(
+            "INSERT INTO jobs (id, kind, session_id, pool, priority, status, params, progress, message, created_at)"
+            " VALUES (?, ?, ?, ?, ?, 'queued', ?, 0, '', ?)",
+            (job_id, kind, session_id, pool, default_prio if priority is None else int(priority),
+             json.dumps(params or {}, ensure_ascii=False), time.time()),
+        )
+        self._wake()
+        self._push(job_id)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self._row(job_id)
+
+    def list(self, session_id: str, limit: int = 50) -> List[dict]:
+        rows = self._conn().execute(
+            "SELECT id FROM jobs WHERE session_id = ? ORDER BY created_at DESC LIMIT ?", (session_id, limit)
+        ).fetchall()
+        return [self._row(r["id"]) for r in rows]
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        conn = self._conn()
+        now = time.time()
+        cur = conn.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                           (now, job_id))
+        if cur.rowcount == 0:
+            cur = conn.execute("UPDATE jobs SET status = 'cancelling' WHERE id = ? AND status = 'running'", (job_id,))
+            if cur.rowcount:
+                self._cancel_flags.add(job_id)
+        self._push(job_id)
+        return self.get(job_id)
+
+    # ---------- lifecycle ----------
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        if self._thread is not None:
+            return
+        self._loop = loop
+        self._stop = False
+        self._recover()
+        self._thread = threading.Thread(target=self._dispatch, name="job-dispatch", daemon=True)
+        self._thread.start()
+        print(f"✅ Job scheduler ready (pools: {POOLS})")
+
+    def stop(self):
+        self._stop = True
+        self._wake()
+        self._exec.shutdown(wait=False, cancel_futures=True)
+
+    def _recover(self):
+        """Job 'running' milik proses yang sudah mati (restart/crash) → kembali ke antrian."""
+        host = socket.gethostname()
+        rows = self._conn().execute(
+            "SELECT id, status, owner FROM jobs WHERE status IN ('running', 'cancelling')"
+        ).fetchall()
+        for r in rows:
+            o_host, _, o_pid = (r["owner"] or "").rpartition(":")
+            if o_host == host and o_pid.isdigit() and _pid_alive(int(o_pid)) and r["owner"] != self.owner:
+                continue  # masih dikerjakan worker lain di host ini
+            if r["status"] == "cancelling":
+                self._set(r["id"], status="cancelled", finished_at=time.time())
+            else:
+                self._conn().execute(
+                    "UPDATE jobs SET status = 'queued', owner = NULL, message = 'requeued after restart'"
+                    " WHERE id = ? AND status = 'running'", (r["id"],))
+
+    # ---------- dispatch ----------
+    def _wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def _dispatch(self):
+        while not self._stop:
+            for pool, sem in self._sems.items():
+                while sem.acquire(blocking=False):
+                    row = self._claim(pool)
+                    if row is None:
+                        sem.release()
+                        break
+                    self._exec.submit(self._run_job, row, sem)
+            with self._cond:
+                # poll berkala: job dari worker uvicorn lain tidak memanggil _wake() di proses ini
+                self._cond.wait(timeout=1.0)
+
+    def _claim(self, pool: str) -> Optional[dict]:
+        kinds = [k for k, (_, p, _) in self._handlers.items() if p == pool]
+        if not kinds:
+            return None
+        conn = self._conn()
+        q = ("SELECT id FROM jobs WHERE status = 'queued' AND pool = ? AND kind IN (%s)"
+             " ORDER BY priority, created_at LIMIT 1") % ",".join("?" * len(kinds))
+        for _ in range(5):
+            r = conn.execute(q, (pool, *kinds)).fetchone()
+            if not r:
+                return None
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, started_at = ? WHERE id = ? AND status = 'queued'",
+                (self.owner, time.time(), r["id"]))
+            if cur.rowcount == 1:
+                return self._row(r["id"])
+        return None
+
+    def _run_job(self, row: dict, sem: threading.BoundedSemaphore):
+        job = Job(self, row)
+        fn = self._handlers[row["kind"]][0]
+        self._push(job.id)
+        try:
+            result = fn(job, **(row["params"] or {}))
+            self._set(job.id, status="done", progress=100, finished_at=time.time(),
+                      result=json.dumps(result, ensure_ascii=False, default=str))
+        except JobCancelled:
+            self._set(job.id, status="cancelled", finished_at=time.time())
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e) or e.__class__.__name__
+            if not hasattr(e, "status_code"):
+                traceback.print_exc()
+            self._set(job.id, status="error", finished_at=time.time(),
+                      error=detail if isinstance(detail, str) else json.dumps(detail, default=str),
+                      error_code=int(getattr(e, "status_code", 500)))
+        finally:
+            self._cancel_flags.discard(job.id)
+            self._last_progress.pop(job.id, None)
+            sem.release()
+            self._wake()
+            self._push(job.id)
+
+    # ---------- progress / push ----------
+    def _progress(self, job: Job, pct: float, message: str):
+        now = time.time()
+        if pct < 100 and now - self._last_progress.get(job.id, 0.0) < PROGRESS_MIN_INTERVAL:
+            return
+        self._last_progress[job.id] = now
+        self._set(job.id, progress=float(max(0.0, min(100.0, pct))), message=message or "")
+        self._push(job.id)
+
+    def _push(self, job_id: str):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        job = self.get(job_id)
+        if not job or not job.get("session_id"):
+            return
+        job.pop("params", None)
+        asyncio.run_coroutine_threadsafe(
+            websocket_manager.broadcast_to_session(job["session_id"], {"type": "job_update", "data": job}),
+            loop,
+        )
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill(pid, 0) di Windows = TerminateProcess → pakai OpenProcess/GetExitCodeProcess
+        import ctypes
+        k32 = ctypes.windll.kernel32
+        h = k32.OpenProcess(0x1000, False, pid)   # PROCESS_QUERY_LIMITED_INFORMATION
+        if not h:
+            return False
+        code = ctypes.c_ulong()
+        ok = k32.GetExitCodeProcess(h, ctypes.byref(code))
+        k32.CloseHandle(h)
+        return bool(ok) and code.value == 259     # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True   # ada tapi bukan milik kita
+
+
+# Global instance
+job_scheduler = JobScheduler(Path("workspaces") / "jobs.db")
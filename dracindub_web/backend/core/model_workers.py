@@ -0,0 +1,255 @@
+# backend/core/model_workers.py
+"""
+Pool proses worker untuk inference model (diarization pyannote, ECAPA global link).
+Model berjalan di proses terpisah yang hidup lama, jadi:
+  - tidak berebut GIL dengan request handling FastAPI
+  - import torch/pyannote/speechbrain dan load model (model_registry) sekali per worker (warm)
+  - beberapa session bisa diproses paralel (satu request per worker)
+
+Protokol (satu JSON per baris; stdin → worker, stdout worker → parent):
+  request : {"id": n, "op": "<nama>", "args": {...}}
+  response: {"id": n, "ok": true, "result": ...}
+            {"id": n, "ok": false, "error": "...", "trace": "..."}
+  id 0    : handshake setelah warm-up {"id": 0, "ok": true, "result": {"pid", "threads"}}
+  setiap response membawa "models": model_stats() worker → stats() di parent tanpa menunggu worker idle
+  op "exit" → worker keluar
+- print() di worker diarahkan ke stderr (stdout khusus protokol)
+- Worker mati/crash → request gagal dengan ModelWorkerError; di-spawn ulang saat dipakai lagi
+- Ukuran pool: DRACINDUB_MODEL_WORKERS (default cpu/4), thread torch per worker:
+  DRACINDUB_TORCH_THREADS (default cpu/workers)
+- GPU: hanya DRACINDUB_GPU_WORKERS worker pertama (default 1) yang melihat CUDA dan warm-up di GPU;
+  worker lain jalan dengan CUDA_VISIBLE_DEVICES="" (CPU, model di RAM). Tiap worker GPU memuat
+  pyannote 3.1 + ECAPA sendiri (kira-kira 1.5 GB VRAM saat inference) → GPU 4 GB: 1 worker GPU,
+  8 GB: 2–3. Request diambil worker GPU dulu kalau sedang idle.
+"""
+import asyncio, json, os, queue, subprocess, sys, traceback
+from typing import List, Optional
+
+_CPU = os.cpu_count() or 2
+MODEL_WORKERS = max(1, int(os.environ.get("DRACINDUB_MODEL_WORKERS") or _CPU // 4))
+TORCH_THREADS = max(1, int(os.environ.get("DRACINDUB_TORCH_THREADS") or _CPU // MODEL_WORKERS))
+GPU_WORKERS = max(0, int(os.environ.get("DRACINDUB_GPU_WORKERS") or 1))
+
+
+class ModelWorkerError(RuntimeError):
+    def __init__(self, message: str, trace: str = ""):
+        super().__init__(message)
+        self.trace = trace
+
+
+class _Worker:
+    """Satu proses worker. Dipakai oleh satu thread pada satu waktu (lewat antrian idle pool)."""
+
+    def __init__(self, idx: int, threads: int, gpu: bool = True):
+        self.idx = idx
+        self.threads = threads
+        self.gpu = gpu
+        self.proc: Optional[subprocess.Popen] = None
+        self.ready = False
+        self.busy = False
+        self.pid: Optional[int] = None
+        self.models: dict = {}          # model_stats() dari response terakhir
+        self._next_id = 0
+
+    def spawn(self):
+        if self.proc is not None and self.proc.poll() is None:
+            return
+        env = dict(os.environ)
+        for k in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            env[k] = str(self.threads)
+        env["PYTHONIOENCODING"] = "utf-8"
+        if not self.gpu:
+            env["CUDA_VISIBLE_DEVICES"] = ""   # worker CPU: tidak membuat context / memuat model di GPU
+        self.proc = subprocess.Popen(
+            [sys.executable, "-u", os.path.abspath(__file__), "--threads", str(self.threads)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=None,
+            text=True, encoding="utf-8", bufsize=1, env=env,
+        )
+        self.ready = False
+        self._next_id = 0
+
+    def _read(self) -> dict:
+        line = self.proc.stdout.readline()
+        if not line:
+            code = self.proc.wait()
+            self.proc = None
+            raise ModelWorkerError(f"model worker #{self.idx} exited (code {code})")
+        msg = json.loads(line)
+        if "models" in msg:
+            self.models = msg["models"]
+        return msg
+
+    def call(self, op: str, args: dict):
+        self.spawn()
+        if not self.ready:
+            hello = self._read()
+            self.ready = True
+            self.pid = hello["result"]["pid"]
+            print(f"✅ Model worker #{self.idx} ready (pid {hello['result']['pid']}, threads {self.threads}, "
+                  f"{hello['result'].get('device', 'cpu')})")
+        self._next_id += 1
+        rid = self._next_id
+        try:
+            self.proc.stdin.write(json.dumps({"id": rid, "op": op, "args": args}, ensure_ascii=False) + "\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.kill()
+            raise ModelWorkerError(f"model worker #{self.idx} unavailable: {e}")
+        while True:
+            msg = self._read()
+            if msg.get("id") == rid:
+                break
+        if msg.get("ok"):
+            return msg.get("result")
+        raise ModelWorkerError(msg.get("error") or "model worker error", msg.get("trace") or "")
+
+    def stop(self, timeout: float = 5.0):
+        p = self.proc
+        if p is None:
+            return
+        try:
+            p.stdin.write(json.dumps({"id": -1, "op": "exit", "args": {}}) + "\n")
+            p.stdin.flush()
+            p.wait(timeout=timeout)
+        except Exception:
+            self.kill()
+        self.proc = None
+
+    def kill(self):
+        if self.proc is not None:
+            try:
+                self.proc.kill()
+                self.proc.wait(timeout=5)
+            except Exception:
+                pass
+            self.proc = None
+
+
+class ModelWorkerPool:
+    def __init__(self, size: int = MODEL_WORKERS, threads: int = TORCH_THREADS, gpu_workers: int = GPU_WORKERS):
+        self.size = size
+        self.threads = threads
+        self._workers: List[_Worker] = [_Worker(i, threads, gpu=i < gpu_workers) for i in range(size)]
+        # (idx, worker): idx kecil duluan → worker GPU dipakai dulu kalau idle
+        self._idle: "queue.PriorityQueue[tuple]" = queue.PriorityQueue()
+        for w in self._workers:
+            self._idle.put((w.idx, w))
+
+    def start(self):
+        """Spawn semua worker sekarang supaya warm-up (import model) jalan di belakang."""
+        for w in self._workers:
+            w.spawn()
+        gpu = sum(1 for w in self._workers if w.gpu)
+        print(f"✅ Model worker pool: {self.size} x {self.threads} thread ({gpu} GPU, {self.size - gpu} CPU)")
+
+    def call(self, op: str, **args):
+        """Blocking: tunggu worker idle, kirim request, kembalikan result (atau raise ModelWorkerError)."""
+        _, w = self._idle.get()
+        w.busy = True
+        try:
+            return w.call(op, args)
+        finally:
+            w.busy = False
+            self._idle.put((w.idx, w))
+
+    async def acall(self, op: str, **args):
+        return await asyncio.to_thread(self.call, op, **args)
+
+    def stats(self) -> dict:
+        """Non-blocking: status & model_stats per worker dari response terakhir (tidak menunggu worker idle)."""
+        per_worker = [
+            {"idx": w.idx, "pid": w.pid, "gpu": w.gpu, "busy": w.busy, "ready": w.ready, "models": w.models}
+            for w in self._workers
+        ]
+        return {
+            "workers": self.size,
+            "torch_threads": self.threads,
+            "busy": sum(1 for w in self._workers if w.busy),
+            "per_worker": per_worker,
+        }
+
+    def stop(self):
+        for w in self._workers:
+            w.stop()
+
+
+model_workers = ModelWorkerPool()
+
+
+# ---------- sisi worker ----------
+def _op_global_link(**kw):
+    from core.speaker_link import global_link_speakers
+    seg, spk = global_link_speakers(**kw)
+    return [seg, spk]
+
+
+def _op_diarize(**kw):
+    from core.diarization import run_dracin_gender
+    return run_dracin_gender(**kw)
+
+
+def _models() -> dict:
+    try:
+        from model_registry import model_stats
+        return model_stats()
+    except Exception:
+        return {}
+
+
+OPS = {
+    "diarize": _op_diarize,
+    "global_link": _op_global_link,
+    "ping": lambda: {"pid": os.getpid()},
+}
+
+
+def _worker_main(threads: int):
+    # stdout asli = kanal protokol; semua print lain → stderr
+    proto = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    sys.stdin.reconfigure(encoding="utf-8")
+
+    def send(msg: dict):
+        msg["models"] = _models()
+        proto.write(json.dumps(msg, ensure_ascii=False, default=str) + "\n")
+        proto.flush()
+
+    device = "cpu"
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+        import dracin_gender  # noqa: F401  (warm: torch/pyannote/speechbrain)
+        import model_registry
+        # worker CPU tidak melihat CUDA (CUDA_VISIBLE_DEVICES="") → warm-up di RAM
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model_registry.warmup(device)
+    except Exception as e:
+        print(f"[model-worker] warm-up warn: {e}")
+    send({"id": 0, "ok": True, "result": {"pid": os.getpid(), "threads": threads, "device": device}})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        req = json.loads(line)
+        if req.get("op") == "exit":
+            break
+        try:
+            fn = OPS[req["op"]]
+            send({"id": req["id"], "ok": True, "result": fn(**(req.get("args") or {}))})
+        except BaseException as e:
+            send({"id": req["id"], "ok": False, "error": f"{e.__class__.__name__}: {e}",
+                  "trace": traceback.format_exc()})
+
+
+if __name__ == "__main__":
+    _here = os.path.dirname(os.path.abspath(__file__))
+    for _p in (os.path.abspath(os.path.join(_here, "..", "..", "..")), os.path.abspath(os.path.join(_here, ".."))):
+        if _p not in sys.path:
+            sys.path.insert(0, _p)
+    if _here in sys.path:
+        sys.path.remove(_here)   # core/*.py jangan menutupi modul top-level
+    _threads = int(sys.argv[sys.argv.index("--threads") + 1]) if "--threads" in sys.argv else TORCH_THREADS
+    _worker_main(_threads)
@@ -2,9 +2,11 @@
 import json
 import time
 import shutil
+import sqlite3
+import threading
 from pathlib import Path
 from typing import Dict, Any, List, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
 import uuid
 import re
 from datetime import datetime
@@ -26,13 +28,26 @@ class Session:
     updated_at: float = 0
     error: Optional[str] = None
 
+_PATH_FIELDS = {"workdir", "video_path", "srt_path", "wav_16k", "segjson", "spkjson", "srt_id"}
+_FIELDS = [f.name for f in fields(Session)]
+_COL_TYPES = {"progress": "INTEGER", "created_at": "REAL", "updated_at": "REAL"}
+
+
 class SessionManager:
+    """
+    Session disimpan di SQLite (workspaces/sessions.db, WAL): satu baris per session,
+    update_session hanya menulis kolom yang berubah → aman dipakai beberapa instance /
+    worker uvicorn sekaligus (tidak ada rewrite penuh yang menimpa update proses lain).
+    sessions.json lama dimigrasi sekali lalu di-rename ke sessions.json.migrated.
+    """
     def __init__(self, workdir_base: Path):
         self.workdir_base = workdir_base
         self.workdir_base.mkdir(parents=True, exist_ok=True)
-        self.sessions: Dict[str, Session] = {}
         self.session_file = workdir_base / "sessions.json"
-        self._load_sessions()
+        self.db_path = workdir_base / "sessions.db"
+        self._local = threading.local()
+        self._init_db()
+        self._migrate_json()
 
     @staticmethod
     def _slugify_filename(name: str, limit: int = 60) -> str:
@@ -57,37 +72,85 @@ class SessionManager:
         return cand
 
 
-    def _load_sessions(self):
-        """Load sessions from disk"""
-        if self.session_file.exists():
-            try:
-                data = self._read_json_safe(self.session_file, {})
-                for session_id, session_data in data.items():
-                    # Convert path strings back to Path objects
-                    for key, value in session_data.items():
-                        if isinstance(value, str) and ('path' in key or key == 'workdir'):
-                            session_data[key] = Path(value)
-                    
-                    self.sessions[session_id] = Session(**session_data)
-            except Exception as e:
-                print(f"Error loading sessions: {e}")
-    
-    def _save_sessions(self):
-        """Save sessions to disk"""
+    # ---------- SQLite ----------
+    def _conn(self) -> sqlite3.Connection:
+        """Satu koneksi per thread (endpoint sync jalan di threadpool)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        cols = ", ".join(
+            f"{name} {_COL_TYPES.get(name, 'TEXT')}" + (" PRIMARY KEY" if name == "id" else "")
+            for name in _FIELDS
+        )
+        conn = self._conn()
+        conn.execute(f"CREATE TABLE IF NOT EXISTS sessions ({cols})")
+        # kolom baru di dataclass → tambahkan ke tabel lama
+        have = {r["name"] for r in conn.execute("PRAGMA table_info(sessions)")}
+        for name in _FIELDS:
+            if name not in have:
+                conn.execute(f"ALTER TABLE sessions ADD COLUMN {name} {_COL_TYPES.get(name, 'TEXT')}")
+
+    @staticmethod
+    def _to_db(value):
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False, default=str)
+        return str(value)  # Path, dll
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> Session:
+        data = {k: row[k] for k in row.keys() if k in _FIELDS}
+        for k in _PATH_FIELDS:
+            if data.get(k) is not None:
+                data[k] = Path(data[k])
+        return Session(**data)
+
+    def _insert(self, conn: sqlite3.Connection, session: Session, or_ignore: bool = False):
+        vals = [self._to_db(getattr(session, k)) for k in _FIELDS]
+        verb = "INSERT OR IGNORE" if or_ignore else "INSERT"
+        conn.execute(
+            f"{verb} INTO sessions ({', '.join(_FIELDS)}) VALUES ({', '.join('?' * len(_FIELDS))})",
+            vals,
+        )
+
+    def _migrate_json(self):
+        """Migrasi satu kali sessions.json → SQLite (idempotent, aman kalau beberapa worker start bersamaan)."""
+        if not self.session_file.exists():
+            return
+        data = self._read_json_safe(self.session_file, {}) or {}
+        conn = self._conn()
         try:
-            sessions_data = {}
-            for session_id, session in self.sessions.items():
-                session_data = asdict(session)
-                # Convert Path objects to strings for JSON serialization
-                for key, value in session_data.items():
-                    if isinstance(value, Path):
-                        session_data[key] = str(value)
-                sessions_data[session_id] = session_data
-            
-            self._write_json_safe(self.session_file, sessions_data)
+            conn.execute("BEGIN IMMEDIATE")
+            n = 0
+            for session_id, session_data in data.items():
+                try:
+                    row = {k: v for k, v in session_data.items() if k in _FIELDS}
+                    row.setdefault("id", session_id)
+                    self._insert(conn, Session(**row), or_ignore=True)
+                    n += 1
+                except Exception as e:
+                    print(f"Error migrating session {session_id}: {e}")
+            conn.execute("COMMIT")
         except Exception as e:
-            print(f"Error saving sessions: {e}")
-    
+            conn.execute("ROLLBACK")
+            print(f"Error migrating sessions.json: {e}")
+            return
+        try:
+            self.session_file.replace(self.session_file.with_name("sessions.json.migrated"))
+        except OSError:
+            pass  # worker lain sudah rename
+        print(f"✅ sessions.json migrated to SQLite ({n} sessions)")
+
     def create_session(self, video_name: str, srt_name: str) -> Session:
         """Create new session with human-friendly id"""
         # 1) bentuk basis nama dari video_name atau srt_name
@@ -116,23 +179,22 @@ class SessionManager:
             srt_path=None,
         )
 
-        self.sessions[session_id] = session
-        self._save_sessions()
+        self._insert(self._conn(), session)
         return session
     
     def get_session(self, session_id: str) -> Optional[Session]:
         """Get session by ID"""
-        return self.sessions.get(session_id)
+        row = self._conn().execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return self._from_row(row) if row else None
     
     def update_session(self, session_id: str, **kwargs):
-        """Update session attributes"""
-        session = self.get_session(session_id)
-        if session:
-            for key, value in kwargs.items():
-                if hasattr(session, key):
-                    setattr(session, key, value)
-            session.updated_at = time.time()
-            self._save_sessions()
+        """Update session attributes (hanya kolom yang dikirim; key yang tidak dikenal diabaikan)"""
+        cols = {k: self._to_db(v) for k, v in kwargs.items() if k in _FIELDS and k != "id"}
+        cols["updated_at"] = time.time()
+        self._conn().execute(
+            f"UPDATE sessions SET {', '.join(f'{k} = ?' for k in cols)} WHERE id = ?",
+            [*cols.values(), session_id],
+        )
     
     def delete_session(self, session_id: str):
         """Delete session and its files"""
@@ -145,13 +207,13 @@ class SessionManager:
                 print(f"Error deleting workdir: {e}")
             
             # Remove from sessions
-            del self.sessions[session_id]
-            self._save_sessions()
+            self._conn().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
     
     def list_sessions(self) -> List[Dict[str, Any]]:
         """List all sessions"""
         sessions_list = []
-        for session in self.sessions.values():
+        rows = self._conn().execute("SELECT * FROM sessions ORDER BY created_at DESC").fetchall()
+        for session in map(self._from_row, rows):
             session_data = asdict(session)
             # Convert Path objects to strings
             for key, value in session_data.items():
@@ -159,17 +221,14 @@ class SessionManager:
                     session_data[key] = str(value)
             sessions_list.append(session_data)
         
-        return sorted(sessions_list, key=lambda x: x['created_at'], reverse=True)
+        return sessions_list
     
     def cleanup_old_sessions(self, max_age_hours: int = 24):
         """Clean up old sessions"""
-        current_time = time.time()
-        max_age_seconds = max_age_hours * 3600
-        
-        sessions_to_delete = []
-        for session_id, session in self.sessions.items():
-            if current_time - session.created_at > max_age_seconds:
-                sessions_to_delete.append(session_id)
+        cutoff = time.time() - max_age_hours * 3600
+        sessions_to_delete = [
+            r["id"] for r in self._conn().execute("SELECT id FROM sessions WHERE created_at < ?", (cutoff,))
+        ]
         
         for session_id in sessions_to_delete:
             self.delete_session(session_id)
@@ -184,15 +243,5 @@ class SessionManager:
             print(f"JSON read error {path}: {e}")
             return default
     
-    def _write_json_safe(self, path: Path, data: Any):
-        """Safely write JSON file"""
-        try:
-            path.parent.mkdir(parents=True, exist_ok=True)
-            path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
-            return True
-        except Exception as e:
-            print(f"JSON write error {path}: {e}")
-            return False
-
 # Create global instance
 session_manager = SessionManager(Path("workspaces"))
\ No newline at end of file
@@ -0,0 +1,169 @@
+# backend/core/speaker_link.py
+"""
+Global speaker linking: samakan label speaker lokal hasil diarization
+(SPEAKER_00, SPEAKER_01, ...) memakai centroid embedding ECAPA, lalu
+gabungkan yang mirip (>= link_threshold) dan batasi ke max_speakers.
+Centroid per speaker dari voiceprints.speaker_centroids (sama dengan index season).
+
+Dijalankan di proses worker model (core.model_workers, op "global_link"),
+bukan di proses API.
+"""
+from pathlib import Path
+from typing import List, Optional, Tuple
+import json
+
+import numpy as np
+
+from voiceprints import safe_speaker_key, speaker_centroids
+
+
+def link_centroids(cents: np.ndarray, weights, link_threshold: float,
+                   min_speakers: Optional[int] = None, max_speakers: Optional[int] = None) -> List[int]:
+    """Clustering centroid speaker lokal → index cluster global (urut dibuat: 0, 1, ...).
+
+    cents  : [n, D] centroid ternormalisasi, urut proses (durasi turun); baris NaN = tanpa embedding
+    weights: [n] durasi per speaker (bobot rata-rata)
+    1) Greedy: tiap speaker gabung ke cluster paling mirip (cos >= link_threshold) — satu matmul
+       ke matriks vektor cluster per speaker; vektor cluster = rata-rata berbobot durasi.
+       min_speakers: speaker tidak digabung kalau jumlah cluster akhir jadi < min_speakers
+    2) max_speakers: gabung pasangan cluster paling mirip berulang-ulang. Matriks similarity
+       dihitung sekali; setelah merge hanya baris/kolom cluster gabungan yang dihitung ulang.
+    Urutan & tie-break sama dengan loop lama (pasangan (i, j) pertama yang maksimum).
+    """
+    n = len(cents)
+    if n == 0:
+        return []
+    D = cents.shape[1]
+    G = np.zeros((n, D))                 # vektor cluster
+    gn = np.zeros(n)                     # norm vektor cluster
+    W = np.zeros(n)                      # total durasi per cluster
+    has = np.zeros(n, bool)              # cluster punya vektor
+    labels = [0] * n
+    min_k = min(int(min_speakers), n) if min_speakers else 0
+    k = 0
+    for t in range(n):
+        v = cents[t]
+        w = float(weights[t])
+        best = -1
+        if np.isfinite(v).all() and has[:k].any() and k + (n - t - 1) >= min_k:
+            sims = (G[:k] @ v) / (gn[:k] * float(np.linalg.norm(v)) + 1e-8)
+            sims[~has[:k]] = -np.inf
+            b = int(np.argmax(sims))
+            if sims[b] >= link_threshold:
+                best = b
+        if best >= 0:
+            new = G[best] * (W[best] + 1e-8) + v * (w + 1e-8)
+            G[best] = new / (np.linalg.norm(new) + 1e-8)
+            gn[best] = np.linalg.norm(G[best])
+            W[best] += w
+            labels[t] = best
+        else:
+            if np.isfinite(v).all():
+                G[k] = v; gn[k] = np.linalg.norm(v); has[k] = True
+            W[k] = w
+            labels[t] = k
+            k += 1
+
+    if isinstance(max_speakers, int) and k > max_speakers:
+        G, gn, W, has = G[:k], gn[:k], W[:k], has[:k]
+        alive = np.ones(k, bool)
+        upper = np.triu(np.ones((k, k), bool), 1)
+        S = (G @ G.T) / (np.outer(gn, gn) + 1e-8)
+        S[~upper | ~has[:, None] | ~has[None, :]] = -np.inf
+        parent = np.arange(k)
+        count = k
+        while count > max_speakers and count >= 2:
+            flat = int(np.argmax(S))     # baris-mayor → (i, j) pertama yang maksimum, i < j
+            i, j = divmod(flat, k)
+            if not S[i, j] > -1.0:       # tidak ada pasangan valid (sama dengan nearest_pair lama)
+                break
+            new = G[i] * (W[i] + 1e-8) + G[j] * (W[j] + 1e-8)
+            G[i] = new / (np.linalg.norm(new) + 1e-8)
+            gn[i] = np.linalg.norm(G[i])
+            W[i] += W[j]
+            parent[j] = i
+            alive[j] = False
+            count -= 1
+            # baris/kolom j mati; baris/kolom i dihitung ulang
+            S[j, :] = -np.inf; S[:, j] = -np.inf
+            row = (G @ G[i]) / (gn * gn[i] + 1e-8)
+            ok = alive & has
+            ok[i] = False
+            lo, hi = np.arange(k) < i, np.arange(k) > i
+            S[lo, i] = np.where(ok[lo], row[lo], -np.inf)
+            S[i, hi] = np.where(ok[hi], row[hi], -np.inf)
+        for c in range(k):               # ikuti rantai merge ke cluster yang masih hidup
+            r = c
+            while parent[r] != r:
+                r = parent[r]
+            parent[c] = r
+        labels = [int(parent[c]) for c in labels]
+    return labels
+
+
+def global_link_speakers(
+    seg_path: Path,
+    spk_path: Path,
+    wav16k_path: Path,
+    min_speakers: Optional[int] = None,
+    max_speakers: Optional[int] = None,
+    link_threshold: float = 0.86,
+    samples_per_spk: int = 8,
+    min_sample_dur: float = 1.0,     # NEW
+    device: str = 'auto',
+) -> Tuple[dict, dict]:
+    with open(seg_path, 'r', encoding='utf-8') as f:
+        seg = json.load(f)
+    with open(spk_path, 'r', encoding='utf-8') as f:
+        spk = json.load(f)
+
+    segments = seg.get('segments') if isinstance(seg, dict) else seg
+    if not isinstance(segments, list):
+        raise ValueError("segments json must be a list or have 'segments' list")
+
+    order, cents, dur = speaker_centroids(segments, wav16k_path, samples_per_spk=samples_per_spk,
+                                          min_dur=min_sample_dur, device=device)
+    if not order:
+        return seg, spk
+    labels = link_centroids(cents, dur, link_threshold, min_speakers=min_speakers, max_speakers=max_speakers)
+    mapping = {sp: f"SPK_{c+1:02d}" for sp, c in zip(order, labels)}
+
+    seg_key = safe_speaker_key(segments[0]) or 'speaker'
+    for s in segments:
+        sp = s.get(seg_key)
+        if isinstance(sp, list):
+            s[seg_key] = [mapping.get(x, x) for x in sp]
+        elif isinstance(sp, str):
+            s[seg_key] = mapping.get(sp, sp)
+
+    def _norm_spk_tbl(spk_obj):
+        if isinstance(spk_obj, dict) and 'speakers' in spk_obj:
+            tbl = spk_obj['speakers']
+        else:
+            tbl = spk_obj
+        if isinstance(tbl, list):
+            out = {}
+            for it in tbl:
+                spid = it.get('id') or it.get('label') or it.get('name')
+                if spid: out[spid] = {k:v for k,v in it.items() if k not in ('id','label','name')}
+            return out
+        elif isinstance(tbl, dict):
+            return tbl
+        return {}
+
+    spk_tbl = _norm_spk_tbl(spk)
+    merged, by_global = {}, {}
+    for loc,gid in mapping.items():
+        by_global.setdefault(gid, []).append(loc)
+
+    for gid, locals_ in by_global.items():
+        # ambil info non-unknown pertama
+        info = {}
+        for k in ('gender','voice','notes','age','accent'):
+            for x in locals_:
+                val = spk_tbl.get(x, {}).get(k)
+                if val not in (None,'','unknown'):
+                    info[k] = val; break
+        merged[gid] = info if info else {'gender': spk_tbl.get(locals_[0],{}).get('gender','unknown')}
+
+    return {'segments': segments}, {'speakers': merged}
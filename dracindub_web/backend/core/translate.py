@@ -1,8 +1,27 @@
 # backend/core/translate.py
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any
-import json, re, time, requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, List, Dict, Any
+import json, re, time, threading, requests
+
+try:
+    from translation_memory import get_translation_memory, prompt_fingerprint
+except ImportError:
+    get_translation_memory = None
+
+from srt_model import srt_from_text
+from translate_control import get_translate_controller, is_timeout
+from token_budget import TokenPacker, DEFAULT_MAX_TOKENS
+from translate_repair import REPAIR_ROUNDS, is_failed, neighbours, repair_groups
+from translate_dedup import DedupPlan
+from llm_stream import STREAM_ENABLED, JsonResultsStream, iter_deltas, response_lines
+from core.artifacts import get_artifacts
+
+try:
+    import http_client  # pool koneksi bersama (keep-alive / HTTP/2)
+except ImportError:
+    http_client = None
 
 DEEPSEEK_URL   = "https://api.deepseek.com/chat/completions"
 DEEPSEEK_MODEL = "deepseek-chat"
@@ -10,6 +29,7 @@ DEEPSEEK_MODEL = "deepseek-chat"
 HTTP_TIMEOUT   = 90     # detik
 RETRY_MAX      = 3
 RETRY_BACKOFF  = 2.0    # detik
+PROMPT_VERSION = "json_v1"  # naikkan kalau format payload/schema berubah (key translation memory)
 
 
 # ============== Helpers ==============
@@ -101,6 +121,41 @@ def build_system_prompt(style: str, target_lang: str) -> str:
     )
 
 
+def _tm_context(style: str, target_lang: str) -> dict:
+    """Key konteks translation memory; isi system prompt ikut di-hash."""
+    return {
+        "style": (style or "dubbing").lower(),
+        "target_lang": (target_lang or "id").lower(),
+        "model": DEEPSEEK_MODEL,
+        "prompt_version": f"{PROMPT_VERSION}:{prompt_fingerprint(build_system_prompt(style, target_lang))}",
+    }
+
+
+def _tm_lookup(texts: List[str], style: str, target_lang: str) -> List[Any]:
+    tm = get_translation_memory() if get_translation_memory else None
+    if not tm:
+        return [None] * len(texts)
+    try:
+        return tm.lookup_many(texts, **_tm_context(style, target_lang))
+    except Exception as e:
+        print(f"TM lookup error: {e}")
+        return [None] * len(texts)
+
+
+def _tm_store(texts: List[str], trans: List[str], style: str, target_lang: str):
+    tm = get_translation_memory() if get_translation_memory else None
+    if not tm:
+        return
+    pairs = [
+        (src, t) for src, t in zip(texts, trans)
+        if t and t.strip() and t.strip().lower() != (src or "").strip().lower()
+    ]
+    try:
+        tm.store_many(pairs, **_tm_context(style, target_lang))
+    except Exception as e:
+        print(f"TM store error: {e}")
+
+
 # ============== Engine ==============
 
 class TranslateEngine:
@@ -173,6 +228,8 @@ class TranslateEngine:
         # ========== SAMPAI DI SINI ==========
 
         # 3) Translate per batch
+        pack_stats: Dict[str, Any] = {}
+        dedup_stats: Dict[str, Any] = {}
         translations = self._translate_items_with_deepseek(
             # ========== GANTI items MENJADI items_to_process ==========
             items=items_to_process,
@@ -184,6 +241,8 @@ class TranslateEngine:
             batch_size=batch,
             workers=workers,
             timeout=timeout,
+            pack_stats=pack_stats,
+            dedup_stats=dedup_stats,
         )
 
         # 4) Build SRT hasil terjemahan
@@ -194,11 +253,15 @@ class TranslateEngine:
         workdir.mkdir(parents=True, exist_ok=True)
         out_path = workdir / f"translated_{ts}.srt"
         out_path.write_text(out_srt, encoding="utf-8")
+        arts = get_artifacts(workdir)
+        produced = {"model": DEEPSEEK_MODEL, "target_lang": target_lang, "style": style}
+        arts.record(out_path, "translate", produced)
 
         # pointer 'translated_latest.srt' (opsional)
         try:
             latest = workdir / "translated_latest.srt"
             latest.write_text(out_srt, encoding="utf-8")
+            arts.record(latest, "translate", produced)
         except Exception:
             pass
 
@@ -222,6 +285,8 @@ class TranslateEngine:
                 "stats": {
                     "total": len(items),
                     "translated": sum(1 for t in translations if t.strip()),
+                    "packing": pack_stats,
+                    "dedup": dedup_stats,
                 },
             },
             # ========== TAMBAHKAN DI SINI ==========
@@ -252,9 +317,7 @@ class TranslateEngine:
                 elif prefer == "translated":
                     p = workdir / "translated_latest.srt"
                     if not p.exists():
-                        cands = sorted(workdir.glob("translated_*.srt"),
-                                       key=lambda q: q.stat().st_mtime, reverse=True)
-                        p = cands[0] if cands else None
+                        p = get_artifacts(workdir).latest("translated_srt")
                     text = p.read_text(encoding="utf-8") if p and p.exists() else ""
                 else:
                     # 'auto' → sama dengan original untuk tab Translate
@@ -271,28 +334,13 @@ class TranslateEngine:
     # ---------- SRT utils ----------
     def _parse_srt(self, text: str) -> List[Dict[str, Any]]:
         """
-        Return [{index:int, start:str, end:str, text:str}]
+        Return [{index:int, start:str, end:str, text:str}] (urutan file; parse di-cache per isi via srt_model)
         """
-        text = text.replace("\r", "")
-        blocks = re.split(r"\n\s*\n", text.strip())
-        out = []
-        for b in blocks:
-            lines = [ln for ln in b.split("\n") if ln is not None]
-            if len(lines) < 2:
-                continue
-            # index
-            try:
-                idx = int(lines[0].strip())
-            except Exception:
-                continue
-            # timing
-            m = re.search(r"(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})", lines[1])
-            if not m:
-                continue
-            start, end = m.group(1), m.group(2)
-            body = "\n".join(lines[2:]).strip()
-            out.append({"index": idx, "start": start, "end": end, "text": body})
-        return out
+        sub = srt_from_text(text)
+        return [
+            {"index": sub.index[i], "start": sub.start_ts(i), "end": sub.end_ts(i), "text": sub.texts[i]}
+            for i in range(len(sub))
+        ]
 
     def _build_srt_with_trans(self, items: List[Dict[str, Any]], trans: List[str]) -> str:
         """
@@ -318,45 +366,279 @@ class TranslateEngine:
         batch_size: int,
         workers: int,
         timeout: int,
+        pack_stats: Dict[str, Any] = None,
+        dedup_stats: Dict[str, Any] = None,
     ) -> List[str]:
         if not api_key:
             raise RuntimeError("Missing API key for DeepSeek")
 
-        # === NEW: siapkan batch + tail konteks (sliding window) ===
-        K = 3  # jumlah baris konteks sebelum batch; ubah sesuai kebutuhan
-        batches_meta = []  # [(start, core_items, prev_tail)]
         n = len(items)
-        for start in range(0, n, batch_size):
-            core = items[start:start + batch_size]
-            prev_tail = items[max(0, start - K):start]
-            batches_meta.append((start, core, prev_tail))
-
         results: List[str] = [""] * n
 
-        def _do_one(batch_index: int, core_items: List[Dict[str, Any]], prev_tail: List[Dict[str, Any]]):
-            # pass prev_tail ke _deepseek_batch (signature baru)
-            outs = self._deepseek_batch(
-                core_items, api_key, style, target_lang, temperature, top_p, timeout,
-                prev_tail=prev_tail
-            )
-            return batch_index, outs
-
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
-            futs = {
-                pool.submit(_do_one, i, core, prev): i
-                for i, (start, core, prev) in enumerate(batches_meta)
-            }
-            for fut in as_completed(futs):
-                b_idx, trans_list = fut.result()
-                # start global tetap konsisten = b_idx * batch_size
-                start = b_idx * batch_size
-                for j, t in enumerate(trans_list):
-                    if start + j < len(results):
-                        results[start + j] = (t or "").strip()
+        # === Translation memory: isi hit dulu, hanya miss yang di-batch ke API ===
+        cached = _tm_lookup([it["text"] for it in items], style, target_lang)
+        for p, t in enumerate(cached):
+            if t:
+                results[p] = t
+        pending = [p for p, t in enumerate(cached) if not t]
+        if len(pending) < n:
+            print(f"[translate] translation memory: {n - len(pending)}/{n} baris tanpa API call")
+
+        # === Dedup per episode: string unik dikirim sekali, hasilnya disebar ke duplikatnya ===
+        dd = DedupPlan([it["text"] for it in items], pending, {p: t for p, t in enumerate(cached) if t})
+        for p, t in dd.reused:
+            results[p] = t
+        if dedup_stats is not None:
+            dedup_stats.update(dd.stats())
+        if dd.saved:
+            print(f"[translate] dedup: hemat {dd.saved} baris API ({len(dd.reps)} unik dari {len(pending)})")
+        pending = dd.reps
+
+        # === Batch + tail konteks (sliding window), dipotong dinamis ===
+        # jumlah request paralel & batas baris per batch mengikuti controller AIMD
+        # (batch_size = batas atas batch, workers = concurrency awal); isi batch dipotong
+        # lagi oleh budget token output (+ prev_tail dihitung sebagai input)
+        K = 3  # jumlah baris konteks sebelum batch; ubah sesuai kebutuhan
+        ctl = get_translate_controller().job(batch_size, workers)
+        packer = TokenPacker(DEFAULT_MAX_TOKENS, "json")
+        cursor = [0]
+        cursor_lock = threading.Lock()
+
+        def _take() -> List[int]:
+            with cursor_lock:
+                window = pending[cursor[0]:cursor[0] + ctl.batch_size()]
+                if not window:
+                    return window
+                prev = items[max(0, window[0] - K):window[0]]
+                pos = window[:packer.take([items[p]["text"] for p in window], len(window),
+                                          [it["text"] for it in prev])]
+                cursor[0] += len(pos)
+                return pos
+
+        errors: List[Exception] = []
+
+        def _run():
+            while True:
+                with ctl.slot():
+                    pos = _take()
+                    if not pos:
+                        return
+                    core = [items[p] for p in pos]
+                    prev_tail = items[max(0, pos[0] - K):pos[0]]
+                    # TM sudah dicek di atas; batch yang gagal total ditangani tahap repair
+                    try:
+                        outs = self._deepseek_batch(
+                            core, api_key, style, target_lang, temperature, top_p, timeout,
+                            prev_tail=prev_tail, tm_lookup=False
+                        )
+                    except Exception as e:
+                        errors.append(e)
+                        print(f"[translate] batch gagal ({core[0]['index']}..{core[-1]['index']}): {e}")
+                        continue
+                for p, t in dd.expand(zip(pos, outs)):
+                    results[p] = (t or "").strip()
+
+        if pending:
+            n_threads = min(ctl.max_workers, len(pending))
+            with ThreadPoolExecutor(max_workers=n_threads) as pool:
+                for fut in [pool.submit(_run) for _ in range(n_threads)]:
+                    fut.result()
+            ps = packer.stats()
+            print(f"[translate] packing: {ps['requests']} request, {ps['avg_lines']} baris/request, "
+                  f"isi budget output {ps['fill']:.0%}")
+            if pack_stats is not None:
+                pack_stats.update(ps)
+            if errors and not any(results[p] for p in pending):
+                # tidak ada satu batch pun yang berhasil (mis. API key salah) → jangan repair
+                raise RuntimeError(f"DeepSeek request failed: {errors[-1]}")
+
+            # === Tahap repair: hanya baris gagal dari semua batch ===
+            check_cjk = not target_lang.startswith(("zh", "ja"))
+            for rnd in range(1, REPAIR_ROUNDS + 1):
+                failed = [p for p in pending if is_failed(items[p]["text"], results[p], check_cjk)]
+                if not failed:
+                    break
+                groups = repair_groups(failed)
+                print(f"[translate] repair {rnd}/{REPAIR_ROUNDS}: {len(failed)} baris dalam {len(groups)} request")
+                with ThreadPoolExecutor(max_workers=min(ctl.max_workers, len(groups))) as pool:
+                    futs = [(g, pool.submit(self._repair_group, items, g, results.__getitem__, api_key, style,
+                                            target_lang, temperature, top_p, timeout, ctl)) for g in groups]
+                    for g, fut in futs:
+                        for p, t in dd.expand(zip(g, fut.result())):
+                            if t:
+                                results[p] = t
 
         return results
 
+    def _repair_group(self, seq: List[Dict[str, Any]], group: List[int], trans_of, api_key: str,
+                      style: str, target_lang: str, temperature: float, top_p: float,
+                      timeout: int, limits=None) -> List[str]:
+        """Kirim ulang baris gagal `group` (posisi di seq) + baris tetangga sebagai konteks.
+        Return terjemahan per posisi; "" = tetap gagal. limits: batas job (controller.job())."""
+        ctl = limits or get_translate_controller()
+        before, after = neighbours(group, len(seq), lambda p: dict(seq[p], translation=trans_of(p) or ""))
+        with ctl.slot():
+            try:
+                outs = self._deepseek_batch(
+                    [seq[p] for p in group], api_key, style, target_lang, temperature, top_p, timeout,
+                    prev_tail=before, next_tail=after, tm_lookup=False
+                )
+            except Exception as e:
+                print(f"[translate] repair gagal ({seq[group[0]]['index']}..{seq[group[-1]]['index']}): {e}")
+                return [""] * len(group)
+        check_cjk = not target_lang.startswith(("zh", "ja"))
+        return [t if not is_failed(seq[p]["text"], t, check_cjk) else "" for p, t in zip(group, outs)]
+
+    # ---------- Async streaming (dipakai endpoint NDJSON) ----------
+    async def stream_translate(
+        self,
+        *,
+        items: List[Dict[str, Any]],
+        api_key: str,
+        style: str,
+        target_lang: str,
+        temperature: float,
+        top_p: float,
+        batch_size: int,
+        workers: int,
+        timeout: int,
+        all_items: List[Dict[str, Any]] = None,
+        max_pending: int = 2,
+    ):
+        """
+        Async generator: yield (batch_items, translations) tiap batch selesai (urutan selesai,
+        bukan urutan batch). Request HTTP jalan di self.executor → event loop tidak pernah ke-block.
+        - `workers` batch in-flight sekaligus
+        - Backpressure: hasil batch yang belum dibaca dibatasi `max_pending`; kalau client lambat
+          membaca, worker menunggu slot dan tidak memulai request baru.
+        - Respons dibaca streaming (llm_stream): tiap entri results yang sudah lengkap di-yield
+          sendiri lebih dulu; yield batch hanya berisi baris yang belum/berbeda dari yang ter-stream.
+        - prev_tail diambil dari `all_items` (urutan asli SRT) bila ada.
+        """
+        import asyncio
+        if not api_key:
+            raise RuntimeError("Missing API key for DeepSeek")
+        loop = asyncio.get_running_loop()
+        seq = all_items or items
+        pos_of = {id(it): p for p, it in enumerate(seq)}
+        K = 3
+
+        # Translation memory → langsung keluar tanpa API
+        cached = await loop.run_in_executor(
+            self.executor, _tm_lookup, [it["text"] for it in items], style, target_lang
+        )
+        # Dedup: string unik dikirim sekali; duplikat (dan yang cocok dengan hit TM) ikut hasilnya
+        dd = DedupPlan([it["text"] for it in items], [i for i, t in enumerate(cached) if not t],
+                       {i: t for i, t in enumerate(cached) if t})
+        hits = [(it, t) for it, t in zip(items, cached) if t] + [(items[i], t) for i, t in dd.reused]
+        pending = [items[i] for i in dd.reps]
+        dups_of = {id(items[i]): [items[d] for d in ds] for i, ds in dd.dups.items() if ds}
+        if hits:
+            yield [it for it, _ in hits], [t for _, t in hits]
+        if dd.saved:
+            print(f"[stream] dedup: hemat {dd.saved} baris API ({len(dd.reps)} unik dari {len(dd.todo)})")
+
+        def _spread(core, outs):
+            # (batch rep, hasil) → ditambah duplikat tiap rep
+            rows = [(it, t) for it, t in zip(core, outs)]
+            rows += [(d, t) for it, t in zip(core, outs) for d in dups_of.get(id(it), ())]
+            return [it for it, _ in rows], [t for _, t in rows]
+
+        batches = []
+        packer = TokenPacker(DEFAULT_MAX_TOKENS, "json")
+        start = 0
+        while start < len(pending):
+            window = pending[start:start + max(1, batch_size)]
+            p0 = pos_of.get(id(window[0]), 0)
+            prev = seq[max(0, p0 - K):p0]
+            core = window[:packer.take([it["text"] for it in window], len(window),
+                                       [it["text"] for it in prev])]
+            batches.append((core, prev))
+            start += len(core)
+
+        # baris ter-stream masuk antrean tanpa batas (paling banyak batch x workers);
+        # backpressure dipegang slot hasil batch
+        queue: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(max(1, max_pending))
+        it_batches = iter(batches)
+        DONE = object()
+
+        async def _worker():
+            for core, prev in it_batches:
+                streamed: Dict[int, str] = {}
+
+                def _on_row(p, t, core=core, streamed=streamed):
+                    # dipanggil dari thread executor di tengah respons
+                    streamed[p] = t
+                    loop.call_soon_threadsafe(queue.put_nowait, ("row", _spread([core[p]], [t])))
+
+                try:
+                    outs = await loop.run_in_executor(
+                        self.executor,
+                        partial(self._deepseek_batch, core, api_key, style, target_lang,
+                                temperature, top_p, timeout, prev_tail=prev, tm_lookup=False,
+                                on_row=_on_row)
+                    )
+                except Exception as e:
+                    print(f"[stream] batch gagal ({core[0]['index']}..{core[-1]['index']}): {e}")
+                    outs = [""] * len(core)
+                # baris yang sudah ter-stream tetap dipakai kalau hasil akhir batch kosong
+                outs = [t or streamed.get(p, "") for p, t in enumerate(outs)]
+                rest = [p for p, t in enumerate(outs) if streamed.get(p) != t]
+                await slots.acquire()
+                await queue.put(("batch", _spread([core[p] for p in rest], [outs[p] for p in rest])))
+            await queue.put(DONE)
+
+        n_workers = max(1, min(int(workers), len(batches))) if batches else 0
+        tasks = [asyncio.create_task(_worker()) for _ in range(n_workers)]
+        trans: Dict[int, str] = {}   # posisi di seq → terjemahan (untuk repair + konteks)
+        try:
+            finished = 0
+            while finished < n_workers:
+                got = await queue.get()
+                if got is DONE:
+                    finished += 1
+                    continue
+                kind, got = got
+                if kind == "batch":
+                    slots.release()
+                    if not got[0]:
+                        continue
+                for it, t in zip(*got):
+                    trans[pos_of.get(id(it), -1)] = t or ""
+                yield got
+        finally:
+            for t in tasks:
+                t.cancel()
+
+        # Tahap repair: baris gagal dari semua batch, batch kecil + konteks tetangga;
+        # hasil yang berhasil di-yield lagi (client merge per index)
+        check_cjk = not target_lang.startswith(("zh", "ja"))
+        limits = get_translate_controller().job(batch_size, workers)
+        for rnd in range(1, REPAIR_ROUNDS + 1):
+            failed = [pos_of[id(it)] for it in pending
+                      if id(it) in pos_of and is_failed(it["text"], trans.get(pos_of[id(it)], ""), check_cjk)]
+            if not failed:
+                break
+            groups = repair_groups(failed)
+            print(f"[stream] repair {rnd}/{REPAIR_ROUNDS}: {len(failed)} baris dalam {len(groups)} request")
+
+            async def _repair(g):
+                return g, await loop.run_in_executor(
+                    self.executor,
+                    partial(self._repair_group, seq, g, lambda p: trans.get(p, ""), api_key, style,
+                            target_lang, temperature, top_p, timeout, limits)
+                )
+
+            for fut in asyncio.as_completed([_repair(g) for g in groups]):
+                g, outs = await fut
+                fixed = [(seq[p], t) for p, t in zip(g, outs) if t]
+                for p, t in zip(g, outs):
+                    if t:
+                        trans[p] = t
+                if fixed:
+                    yield _spread([it for it, _ in fixed], [t for _, t in fixed])
+
     def _deepseek_batch(
         self,
         batch_items: List[Dict[str, Any]],
@@ -368,23 +650,58 @@ class TranslateEngine:
         timeout: int,
         *,
         prev_tail: List[Dict[str, Any]] = None,  # NEW
+        next_tail: List[Dict[str, Any]] = None,
+        tm_lookup: bool = True,
+        on_row: Callable[[int, str], None] = None,
+    ) -> List[str]:
+        """Terjemahkan satu batch; cek translation memory dulu, simpan hasil API yang valid.
+        on_row(posisi di batch_items, terjemahan): entri results yang sudah lengkap di respons streaming."""
+        texts = [it["text"] for it in batch_items]
+        out = _tm_lookup(texts, style, target_lang) if tm_lookup else [None] * len(texts)
+        miss = [i for i, t in enumerate(out) if not t]
+        if miss:
+            api_out = self._deepseek_batch_api(
+                [batch_items[i] for i in miss], api_key, style, target_lang,
+                temperature, top_p, timeout, prev_tail=prev_tail, next_tail=next_tail,
+                on_row=(lambda j, t: on_row(miss[j], t)) if on_row else None
+            )
+            for i, t in zip(miss, api_out):
+                out[i] = t
+            _tm_store([texts[i] for i in miss], api_out, style, target_lang)
+        return [t or "" for t in out]
+
+    def _deepseek_batch_api(
+        self,
+        batch_items: List[Dict[str, Any]],
+        api_key: str,
+        style: str,
+        target_lang: str,
+        temperature: float,
+        top_p: float,
+        timeout: int,
+        *,
+        prev_tail: List[Dict[str, Any]] = None,
+        next_tail: List[Dict[str, Any]] = None,
+        on_row: Callable[[int, str], None] = None,
     ) -> List[str]:
         system_prompt = build_system_prompt(style, target_lang)
 
-        # siapkan konteks sebelumnya (opsional)
-        prev_tail = prev_tail or []
-        prev_context = [
-            {
-                "index": it["index"],
-                "timestamp": f'{it["start"]} --> {it["end"]}',
-                "original_text": it["text"],
-            }
-            for it in prev_tail
-        ]
+        # siapkan konteks sebelumnya / sesudahnya (opsional; terjemahan ikut kalau sudah ada)
+        def _ctx(rows):
+            return [
+                {
+                    "index": it["index"],
+                    "timestamp": f'{it["start"]} --> {it["end"]}',
+                    "original_text": it["text"],
+                    **({"translation": it["translation"]} if it.get("translation") else {}),
+                }
+                for it in rows or []
+            ]
 
         user_payload = {
             "target_lang": target_lang,
-            "prev_context": prev_context,  # NEW: hanya referensi, tidak dihitung hasil
+            "prev_context": _ctx(prev_tail),  # NEW: hanya referensi, tidak dihitung hasil
+            **({"next_context": _ctx(next_tail)} if next_tail else {}),
             "items": [
                 {
                     "index": it["index"],
@@ -407,27 +724,106 @@ class TranslateEngine:
         }
         headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
 
+        ctl = get_translate_controller()
         last_err = None
         for attempt in range(1, RETRY_MAX + 1):
             try:
-                r = requests.post(DEEPSEEK_URL, headers=headers, json=req, timeout=timeout or HTTP_TIMEOUT)
-                r.raise_for_status()
-                data = r.json()
-                content = data["choices"][0]["message"]["content"]
+                t0 = time.perf_counter()
+                if on_row and STREAM_ENABLED:
+                    content = self._deepseek_stream(req, headers, timeout, batch_items, target_lang, on_row)
+                else:
+                    post = http_client.post if http_client else requests.post
+                    r = post(DEEPSEEK_URL, headers=headers, json=req, timeout=timeout or HTTP_TIMEOUT)
+                    if r.status_code == 429:
+                        ctl.on_overload("rate_limited")
+                    r.raise_for_status()
+                    data = r.json()
+                    content = data["choices"][0]["message"]["content"]
                 obj = _safe_json_loads(content)
                 if not obj or "results" not in obj or not isinstance(obj["results"], list):
                     raise RuntimeError("Model returned invalid JSON")
 
-                out: List[str] = []
-                for row in obj["results"]:
-                    t = str(row.get("translation", "")).strip()
-                    out.append(t)
-                if len(out) != len(batch_items):
-                    out = (out + [""] * len(batch_items))[: len(batch_items)]
+                rows = [r for r in obj["results"] if isinstance(r, dict)]
+                by_idx = {}
+                for row in rows:
+                    try:
+                        by_idx.setdefault(int(row.get("index")), str(row.get("translation", "")).strip())
+                    except (TypeError, ValueError):
+                        pass
+                want = [int(it["index"]) for it in batch_items]
+                if by_idx and len(by_idx) == len(rows):
+                    # selaraskan per index; index yang hilang = baris gagal (tahap repair)
+                    out = [by_idx.get(k, "") for k in want]
+                    got = sum(1 for k in want if k in by_idx)
+                else:
+                    out = [str(r.get("translation", "")).strip() for r in rows]
+                    got = len(out)
+                    if got != len(batch_items):
+                        out = [""] * len(batch_items)   # posisi tidak bisa dipercaya
+                ctl.on_response(time.perf_counter() - t0, len(batch_items), got)
                 return out
             except Exception as e:
                 last_err = e
+                if is_timeout(e):
+                    ctl.on_overload("timeout")
+                elif getattr(getattr(e, "response", None), "status_code", None) != 429:
+                    ctl.on_error()
                 if attempt < RETRY_MAX:
                     time.sleep(RETRY_BACKOFF * attempt)
         raise RuntimeError(f"DeepSeek request failed: {last_err}")
 
+    def _deepseek_stream(self, req: dict, headers: dict, timeout: int, batch_items: List[Dict[str, Any]],
+                         target_lang: str, on_row: Callable[[int, str], None]) -> str:
+        """
+        Request "stream": true (SSE); tiap entri `results` yang objeknya sudah lengkap langsung
+        ke on_row(posisi, terjemahan). Return isi JSON lengkap (diparse ulang oleh pemanggil).
+        """
+        pos_of = {int(it["index"]): p for p, it in enumerate(batch_items)}
+        check_cjk = not target_lang.startswith(("zh", "ja"))
+        sent = set()
+        parser = JsonResultsStream()
+        with (http_client.stream_post if http_client else partial(requests.post, stream=True))(
+            DEEPSEEK_URL, headers=headers, json=dict(req, stream=True), timeout=timeout or HTTP_TIMEOUT
+        ) as r:
+            if r.status_code == 429:
+                get_translate_controller().on_overload("rate_limited")
+            if r.status_code >= 400 and hasattr(r, "read"):
+                r.read()   # httpx: body error dibaca dulu supaya pesan HTTPStatusError lengkap
+            r.raise_for_status()
+            for delta in iter_deltas(response_lines(r)):
+                for row in parser.feed(delta):
+                    try:
+                        p = pos_of[int(row.get("index"))]
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    if p in sent:
+                        continue   # index dobel: jalur non-streaming juga memakai yang pertama
+                    sent.add(p)
+                    t = str(row.get("translation", "")).strip()
+                    if not is_failed(batch_items[p]["text"], t, check_cjk):
+                        on_row(p, t)
+        return parser.text
+
+
+# ============== Shared engine ==============
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_translate_engine() -> TranslateEngine:
+    """
+    Satu TranslateEngine per proses (executor 8 thread dibagi semua request).
+    Engine tidak menyimpan state per request, jadi aman dipakai bersama.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = TranslateEngine()
+        return _engine
+
+
+def shutdown_translate_engine():
+    global _engine
+    with _engine_lock:
+        eng, _engine = _engine, None
+    if eng is not None:
+        eng.executor.shutdown(wait=False, cancel_futures=True)
@@ -11,18 +11,26 @@ class TTSExportEngine:
         
     async def process(self, session, config: Dict[str, Any], progress_callback: Callable):
         """Run TTS generation and video export"""
+        loop = asyncio.get_event_loop()
+
+        def _emit(pct, msg):
+            # dipanggil dari thread executor → jadwalkan callback di loop server
+            try:
+                asyncio.run_coroutine_threadsafe(progress_callback(session.id, pct, msg), loop)
+            except Exception:
+                pass
         
         def _run_tts_export():
             try:
                 # Import existing dracindub logic
                 from dracindub import (
                     build_entries_with_speakers,
-                    sanitize_text_for_tts,
-                    adjust_to_duration,
+                    tts_segments_pool,
                     prevent_overlap,
-                    chunked_mix,
+                    mix_dubtrack,
                     mux_video,
-                    ffprobe_duration
+                    ffprobe_duration,
+                    get_tts_cache
                 )
                 
                 # Prepare paths
@@ -34,7 +42,6 @@ class TTSExportEngine:
                 
                 # Build entries with speaker info
                 entries = build_entries_with_speakers(srt_id, segjson, spkjson)
-                total_entries = len(entries)
                 
                 # Progress tracking
                 progress_steps = {
@@ -43,84 +50,51 @@ class TTSExportEngine:
                     'export': 10           # 10% for final export
                 }
                 
-                # Step 1: TTS Generation
-                segfiles = []
+                # Step 1: TTS Generation (pool: beberapa request in-flight, urutan & resume tetap)
                 current_progress = 0
-                
-                for i, (idx, t0, t1, text, spk, gender) in enumerate(entries):
-                    dur = max(0.05, t1 - t0)
-                    base = workdir / f"seg_{idx:05d}"
-                    adj_wav = workdir / f"seg_{idx:05d}.wav"
-                    
-                    # Skip if already exists (resume capability)
-                    if adj_wav.exists() and adj_wav.stat().st_size > 0:
-                        seg_dur = ffprobe_duration(adj_wav)
-                        segfiles.append((t0, adj_wav, seg_dur))
-                        continue
-                    
-                    clean_text = sanitize_text_for_tts(text)
-                    
-                    if not clean_text:
-                        # Create silent segment
-                        self._create_silent_audio(adj_wav, dur)
-                    else:
-                        # Generate TTS based on engine
-                        raw_wav = self._generate_tts(
-                            clean_text, gender, base, config
-                        )
-                        
-                        if raw_wav and raw_wav.exists():
-                            # Adjust to target duration
-                            tmp_out = workdir / f"{adj_wav.stem}.tmp.wav"
-                            adjust_to_duration(
-                                raw_wav, dur, tmp_out,
-                                min_atempo=1.2,
-                                max_atempo=config.get('max_atempo', 1.8),
-                                fade=config.get('fade_sec', 0.02)
-                            )
-                            if adj_wav.exists():
-                                adj_wav.unlink()
-                            tmp_out.rename(adj_wav)
-                    
-                    segfiles.append((t0, adj_wav, dur))
-                    
-                    # Update progress
-                    tts_progress = (i + 1) / total_entries * progress_steps['tts_generation']
-                    overall_progress = current_progress + tts_progress
-                    asyncio.create_task(
-                        progress_callback(
-                            session.id, 
-                            int(overall_progress),
-                            f"TTS Generation: {i+1}/{total_entries}"
-                        )
-                    )
+                engine = config.get('tts_engine', 'edge')
+                if engine == 'elevenlabs':
+                    def synth(clean_text, gender, base):
+                        return self._generate_tts(clean_text, gender, base, config)
+                else:
+                    async def synth(clean_text, gender, base):
+                        return await self._generate_edge_tts_async(clean_text, gender, base, config)
+
+                def _on_tts(done, total, idx):
+                    tts_progress = done / max(1, total) * progress_steps['tts_generation']
+                    _emit(int(current_progress + tts_progress), f"TTS Generation: {done}/{total}")
+
+                segfiles = tts_segments_pool(
+                    entries, workdir, synth,
+                    engine=engine,
+                    concurrency=config.get('tts_concurrency') or None,
+                    timeout=config.get('tts_timeout'),
+                    max_atempo=config.get('max_atempo', 1.8),
+                    fade=config.get('fade_sec', 0.02),
+                    on_progress=_on_tts
+                )
                 
                 current_progress += progress_steps['tts_generation']
                 
                 # Step 2: Prevent overlap and prepare mixing
-                asyncio.create_task(
-                    progress_callback(session.id, current_progress, "Preparing audio segments")
-                )
+                _emit(current_progress, "Preparing audio segments")
                 segfiles = prevent_overlap(segfiles, workdir)
                 
                 # Step 3: Mix audio segments
-                asyncio.create_task(
-                    progress_callback(session.id, current_progress + 5, "Mixing audio segments")
-                )
+                _emit(current_progress + 5, "Mixing audio segments")
                 video_dur = ffprobe_duration(video_path)
                 final_wav = workdir / f"{video_path.stem}_dubtrack.wav"
                 
-                chunked_mix(
+                mix_dubtrack(
                     workdir, video_dur, segfiles, final_wav,
+                    backend=config.get('mix_backend', 'memmap'),
                     chunk_size=config.get('mix_chunk', 400)
                 )
                 
                 current_progress += progress_steps['mixing']
                 
                 # Step 4: Mux final video
-                asyncio.create_task(
-                    progress_callback(session.id, current_progress + 5, "Creating final video")
-                )
+                _emit(current_progress + 5, "Creating final video")
                 out_video = video_path.with_name(f"{video_path.stem}_dubbed.mp4")
                 
                 # Prepare args for muxing
@@ -131,16 +105,15 @@ class TTSExportEngine:
                 
                 mux_video(Args(), video_path, final_wav, out_video)
                 
-                asyncio.create_task(
-                    progress_callback(session.id, 100, "Export completed")
-                )
+                _emit(100, "Export completed")
                 
                 return {
                     'success': True,
                     'data': {
                         'output_video': str(out_video),
                         'dub_audio': str(final_wav),
-                        'total_segments': len(segfiles)
+                        'total_segments': len(segfiles),
+                        'tts_cache': get_tts_cache().stats()
                     }
                 }
                 
@@ -148,7 +121,6 @@ class TTSExportEngine:
                 return {'success': False, 'error': str(e)}
         
         # Run in executor
-        loop = asyncio.get_event_loop()
         result = await loop.run_in_executor(None, _run_tts_export)
         return result
     
@@ -193,6 +165,27 @@ class TTSExportEngine:
             print(f"Edge TTS error: {e}")
             return None
     
+    async def _generate_edge_tts_async(self, text: str, gender: str, base_path: Path, config: Dict[str, Any]) -> Path:
+        """Edge TTS versi async (dipakai tts_segments_pool, tanpa asyncio.run per baris)"""
+        try:
+            from dracindub import tts_line_edge_async
+            
+            result = await tts_line_edge_async(
+                text, gender, base_path,
+                config.get('voice_male', 'id-ID-ArdiNeural'),
+                config.get('voice_female', 'id-ID-GadisNeural'),
+                config.get('voice_unknown', 'id-ID-ArdiNeural'),
+                config.get('rate', '+0%'),
+                config.get('volume', '+0%'),
+                config.get('pitch', '+0Hz')
+            )
+            
+            return Path(result) if result else None
+            
+        except Exception as e:
+            print(f"Edge TTS error: {e}")
+            return None
+    
     def _generate_elevenlabs_tts(self, text: str, gender: str, base_path: Path, config: Dict[str, Any]) -> Path:
         """Generate TTS using ElevenLabs"""
         try:
@@ -17,6 +17,10 @@ from api.websockets import websocket_manager
 
 # 🔥 IMPORT ROUTER
 from api.endpoints import router as api_router
+import http_client
+from core.translate import shutdown_translate_engine
+from core.jobs import job_scheduler
+from core.model_workers import model_workers
 
 app = FastAPI(title="Dewa Dracin", version="2.0")
 
@@ -32,6 +36,20 @@ app.add_middleware(
 # 🔥 INCLUDE API ROUTER
 app.include_router(api_router)
 
+# HTTP pool bersama (DeepSeek): buka saat startup, tutup saat shutdown
+@app.on_event("startup")
+async def _startup_http_pool():
+    http_client.init_http_clients()
+    job_scheduler.start(asyncio.get_running_loop())
+    model_workers.start()
+
+@app.on_event("shutdown")
+async def _shutdown_http_pool():
+    shutdown_translate_engine()
+    job_scheduler.stop()
+    model_workers.stop()
+    await http_client.close_http_clients()
+
 # Get the correct base directory
 BASE_DIR = Path(__file__).parent
 FRONTEND_DIR = BASE_DIR.parent / "frontend"
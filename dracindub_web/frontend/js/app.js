@@ -624,14 +624,12 @@ class DracinApp {
 		  body
 		});
 
-		const text = await res.text();
-		if (!res.ok) {
-		  this.showNotification(`Extract failed: ${text}`, 'error');
+		let data = {};
+		try { data = await this.waitJob(res, 'Extract audio'); }
+		catch (e) {
+		  this.showNotification(`Extract failed: ${e.message}`, 'error');
 		  return;
 		}
-
-		let data = {};
-		try { data = JSON.parse(text); } catch {}
 		const iso = data.vocal_isolation || 'unknown';
 		this.showNotification(`Audio extracted (${iso})`, 'success');
 		this.updateProgress(40, 'Audio extracted');
@@ -703,19 +701,15 @@ class DracinApp {
           body,
         });
 
-        const text = await res.text(); // ambil body apa adanya dulu
-
-        if (!res.ok) {
+        let data = {};
+        try { data = await this.waitJob(res, 'Diarization'); }
+        catch (e) {
           // tampilkan pesan error asli dari backend biar gampang debug
-          this.showNotification(`Failed to run diarization: ${text}`, 'error');
-          this.appendLog?.(text);
+          this.showNotification(`Failed to run diarization: ${e.message}`, 'error');
+          this.appendLog?.(e.message);
           return;
         }
 
-        // coba parse JSON respon
-        let data = {};
-        try { data = JSON.parse(text); } catch (_) {}
-
         const segPath = data.segments_path || data.segjson || '';
         const spkPath = data.speakers_path || data.spkjson || '';
 
@@ -731,6 +725,25 @@ class DracinApp {
       }
     }
 
+    // POST yang berat (extract/diarization/TTS/import/preview/export) mengembalikan {job_id}; poll sampai selesai
+    async waitJob(res, label) {
+      const text = await res.text();
+      if (!res.ok) throw new Error(text || `${label} gagal`);
+      let job = {};
+      try { job = JSON.parse(text); } catch {}
+      if (!job?.job_id) return job;   // server lama: hasil langsung
+      for (;;) {
+        await new Promise(r => setTimeout(r, 700));
+        const r = await fetch(`/api/jobs/${encodeURIComponent(job.job_id)}`, { cache: 'no-store' });
+        if (!r.ok) continue;
+        const j = await r.json();
+        if (j.status === 'done') return j.result || {};
+        if (j.status === 'error') throw new Error(j.error || `${label} gagal`);
+        if (j.status === 'cancelled') throw new Error(`${label} dibatalkan`);
+        if (j.status === 'running') this.updateProgress?.(j.progress || 0, `${label}: ${j.message || ''}`);
+      }
+    }
+
     updateProgress(percent, message) {
       const bar   = document.getElementById('progress-bar');
       const pctEl = document.getElementById('progress-percent');
@@ -3028,6 +3041,7 @@ async _edLoad(sessionId) {
 	}));
 
     this._edIndexSeconds();
+    this._edMarkSaved();
 
     // Speakers dari backend; kalau kosong, derive dari rows
     ed.speakers = Array.isArray(data.speakers) && data.speakers.length
@@ -3588,17 +3602,52 @@ _edAutoResizeTextareas(){
   });
 }
 
+// signature field yang disimpan server (untuk diff save inkremental)
+_edRowSig(r) {
+  return JSON.stringify([r.start, r.end, r.translation || "", r.speaker || "", r.gender || "unknown", r.notes || ""]);
+}
+
+_edMarkSaved() {
+  const ed = this.editing;
+  ed.savedSig = new Map((ed.rows || []).map(r => [r.index, this._edRowSig(r)]));
+}
+
+async _edSaveFull() {
+  const ed = this.editing;
+  const res = await fetch(`/api/session/${ed.sessionId}/editing`, {
+    method: 'POST',
+    headers: {'Content-Type':'application/json'},
+    body: JSON.stringify({ rows: ed.rows })
+  });
+  if (!res.ok) throw new Error(await res.text());
+}
+
 async _edSave() {
   const ed = this.editing;
   if (!ed.sessionId) return this.showNotification('No session.', 'warning');
   try {
     this.showLoading('Saving editing…');
-    const res = await fetch(`/api/session/${ed.sessionId}/editing`, {
-      method: 'POST',
-      headers: {'Content-Type':'application/json'},
-      body: JSON.stringify({ rows: ed.rows })
-    });
-    if (!res.ok) throw new Error(await res.text());
+    const saved = ed.savedSig;
+    if (!saved) {
+      await this._edSaveFull();
+    } else {
+      // kirim hanya baris yang berubah + index yang dihapus (PATCH → journal di server)
+      const changed = (ed.rows || []).filter(r => saved.get(r.index) !== this._edRowSig(r))
+        .map(r => ({ index: r.index, start: r.start, end: r.end, translation: r.translation || "",
+                     speaker: r.speaker || null, gender: r.gender || "unknown", notes: r.notes || "" }));
+      const alive = new Set((ed.rows || []).map(r => r.index));
+      const deleted = [...saved.keys()].filter(k => !alive.has(k));
+      if (changed.length || deleted.length) {
+        const res = await fetch(`/api/session/${ed.sessionId}/editing`, {
+          method: 'PATCH',
+          headers: {'Content-Type':'application/json'},
+          body: JSON.stringify({ rows: changed, deleted })
+        });
+        if (res.status === 409) await this._edSaveFull();   // belum ada snapshot di server
+        else if (!res.ok) throw new Error(await res.text());
+      }
+    }
+    this._edMarkSaved();
     this.showNotification('Saved.', 'success');
   } catch (e) {
     this.showNotification(`Save failed: ${e.message || e}`, 'error');
@@ -4604,6 +4653,9 @@ async loadExportTab() {
     return String(x);
   };
 
+  // ---------- JOBS ----------
+  const exWaitJob = (res, label) => this.waitJob(res, label);
+
   // ---------- API MAP ----------
   const exLoadMap = async () => {
     if (!sid()) return;
@@ -4639,11 +4691,7 @@ const exBuildPreviewAudio = async () => {
     headers: {'Content-Type':'application/json'},
     body: JSON.stringify(payload)
   });
-  const text = await res.text();
-  if (!res.ok) throw new Error(text || 'Build preview audio gagal');
-
-  let j = {};
-  try { j = JSON.parse(text); } catch {}
+  const j = await exWaitJob(res, 'Build preview audio');
 
   if (!j?.file) throw new Error('Preview tidak mengembalikan file.');
 
@@ -5187,8 +5235,8 @@ $('ex-load-session').onclick = async () => {
 		method:'POST', headers:{'Content-Type':'application/json'},
 		body: JSON.stringify({ project_dir: prj })
 	  });
-	  const t = await r.text();
-	  if (!r.ok) return this.showNotification(`Import gagal: ${t}`, 'error');
+	  try { await exWaitJob(r, 'Import'); }
+	  catch (e) { return this.showNotification(`Import gagal: ${e.message}`, 'error'); }
 	  this.showNotification('Import OK', 'success');
 	  await exLoadMap();
 	  await reloadRows();
@@ -5342,8 +5390,9 @@ $('ex-load-session').onclick = async () => {
     const r = await fetch(`/api/session/${encodeURIComponent(sid())}/export/build`, {
       method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(body)
     });
-    const j = await r.json().catch(()=>({}));
-    if (!r.ok) return this.showNotification(JSON.stringify(j), 'error');
+    let j;
+    try { j = await exWaitJob(r, 'Export'); }
+    catch (e) { return this.showNotification(e.message, 'error'); }
     this.showNotification('Export OK', 'success');
     const a = $('ex-download');
     a.href = j.output; a.classList.remove('hidden'); a.textContent = 'Open MP4';
@@ -5,6 +5,21 @@ class SessionManager {
         this.currentSessionId = null;
     }
 
+    // Endpoint berat mengembalikan {job_id} (202); poll /api/jobs/{id} sampai selesai → result
+    async waitJob(response, label) {
+        const job = await response.json();
+        if (!job?.job_id) return job;
+        for (;;) {
+            await new Promise(r => setTimeout(r, 700));
+            const r = await fetch(`${this.baseUrl}/jobs/${encodeURIComponent(job.job_id)}`, { cache: 'no-store' });
+            if (!r.ok) continue;
+            const j = await r.json();
+            if (j.status === 'done') return j.result || {};
+            if (j.status === 'error') throw new Error(j.error || `${label} failed`);
+            if (j.status === 'cancelled') throw new Error(`${label} cancelled`);
+        }
+    }
+
     async createSession(videoName, srtName) {
         const formData = new FormData();
         formData.append('video_name', videoName);
@@ -62,7 +77,7 @@ class SessionManager {
             throw new Error(`Failed to extract audio: ${response.statusText}`);
         }
 
-        return await response.json();
+        return await this.waitJob(response, 'Extract audio');
     }
 
     async runDiarization(sessionId, config) {
@@ -82,7 +97,7 @@ class SessionManager {
             throw new Error(`Failed to run diarization: ${response.statusText}`);
         }
 
-        return await response.json();
+        return await this.waitJob(response, 'Diarization');
     }
 
     async runTranslation(sessionId, config) {
@@ -125,7 +140,7 @@ class SessionManager {
             throw new Error(`Failed to start TTS export: ${response.statusText}`);
         }
 
-        return await response.json();
+        return await this.waitJob(response, 'TTS export');
     }
 
     async getSession(sessionId) {
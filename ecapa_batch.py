@@ -0,0 +1,110 @@
+# ecapa_batch.py
+# ------------------------------------------------------------
+# Ekstraksi embedding ECAPA (SpeechBrain) per mini-batch, dipakai oleh
+# dracin_gender, suara dan voiceprints (global link backend + index season).
+# - Segmen diurutkan per panjang lalu dipotong jadi bucket (<= batch_size segmen,
+#   panjang terpanjang <= BUCKET_RATIO x terpendek) → padding antar segmen kecil
+# - Pad kanan dengan nol + panjang relatif (wav_lens) → pooling ECAPA mengabaikan padding
+# - Segmen pendek tetap dipad dulu ke min_samples (center / right) seperti loop lama
+# - Embedding dikembalikan dalam urutan input
+# Env: DRACINDUB_ECAPA_BATCH (default 1 = batching mati: satu segmen per encode_batch, tanpa padding,
+#      identik dengan loop lama). Batching (mis. 16) opt-in: jalankan benchmark dengan model
+#      spkrec-ecapa-voxceleb asli dulu dan aktifkan hanya kalau cosine min ≈ 1.0
+# Benchmark (CPU): python ecapa_batch.py [n_segments] [batch_size=16]
+# ------------------------------------------------------------
+
+import os
+from typing import List, Sequence
+
+import numpy as np
+
+BATCH_SIZE = max(1, int(os.environ.get("DRACINDUB_ECAPA_BATCH") or 1))
+BUCKET_RATIO = 1.1
+EMB_DIM = 192
+
+
+def pad_min(wav_1d, min_samples: int, mode: str = "center"):
+    """Pad nol sampai min_samples ('center' = dracin_gender/suara, 'right' = global link lama)."""
+    import torch.nn.functional as F
+    wav_1d = wav_1d.reshape(-1).float()
+    T = wav_1d.numel()
+    need = max(int(min_samples), 1)
+    if T >= need:
+        return wav_1d
+    pad_total = need - T
+    left = pad_total // 2 if mode == "center" else 0
+    return F.pad(wav_1d.unsqueeze(0), (left, pad_total - left), mode="constant", value=0.0).squeeze(0)
+
+
+def length_buckets(lengths: Sequence[int], batch_size: int, ratio: float = BUCKET_RATIO) -> List[List[int]]:
+    """Index segmen dikelompokkan per panjang (urut naik)."""
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    out, cur = [], []
+    for i in order:
+        if cur and (len(cur) >= batch_size or lengths[i] > ratio * lengths[cur[0]]):
+            out.append(cur)
+            cur = []
+        cur.append(i)
+    if cur:
+        out.append(cur)
+    return out
+
+
+def embed_batch(enc, wavs: Sequence, device="cpu", batch_size: int = 0,
+                min_samples: int = 0, pad_mode: str = "center") -> np.ndarray:
+    """wavs: list tensor 1-D (16 kHz). Return float32 [N, D] (belum dinormalisasi), urutan input."""
+    import torch
+    if not wavs:
+        return np.zeros((0, EMB_DIM), np.float32)
+    segs = [pad_min(w, min_samples, pad_mode) for w in wavs]
+    lens = [int(s.numel()) for s in segs]
+    out = [None] * len(segs)
+    with torch.inference_mode():
+        for idx in length_buckets(lens, batch_size or BATCH_SIZE, BUCKET_RATIO):
+            T = max(lens[i] for i in idx)
+            x = torch.zeros(len(idx), T)
+            for r, i in enumerate(idx):
+                x[r, :lens[i]] = segs[i]
+            rel = torch.tensor([lens[i] / T for i in idx])
+            e = enc.encode_batch(x.to(device), rel.to(device))
+            e = e.reshape(len(idx), -1).detach().cpu().numpy()
+            for r, i in enumerate(idx):
+                out[i] = e[r]
+    return np.stack(out, 0).astype(np.float32)
+
+
+# ---------- Benchmark ----------
+def _bench(n_segments: int = 200, batch_size: int = 16):
+    import time, torch
+    from model_registry import get_ecapa
+    torch.manual_seed(0)
+    enc = get_ecapa("cpu")
+    sr = 16000
+    # campuran panjang segmen diarization: 0.3 .. 6 detik
+    wavs = [torch.randn(int(sr * float(d))) * 0.1
+            for d in torch.empty(n_segments).uniform_(0.3, 6.0)]
+    min_samples = int(1.2 * sr)
+
+    t = time.perf_counter()
+    ref = []
+    with torch.inference_mode():
+        for w in wavs:   # pola lama: satu encode_batch per segmen
+            x = pad_min(w, min_samples).unsqueeze(0)
+            ref.append(enc.encode_batch(x).reshape(-1).cpu().numpy())
+    t_old = time.perf_counter() - t
+
+    t = time.perf_counter()
+    new = embed_batch(enc, wavs, "cpu", batch_size, min_samples)
+    t_new = time.perf_counter() - t
+
+    ref = np.stack(ref)
+    cos = (ref * new).sum(1) / (np.linalg.norm(ref, axis=1) * np.linalg.norm(new, axis=1) + 1e-9)
+    print(f"segments={n_segments} batch={batch_size} torch_threads={torch.get_num_threads()}")
+    print(f"per-segment : {t_old:7.2f}s  ({n_segments / t_old:6.1f} seg/s)")
+    print(f"batched     : {t_new:7.2f}s  ({n_segments / t_new:6.1f} seg/s)  x{t_old / max(t_new, 1e-9):.1f}")
+    print(f"cosine(per-segment, batched): min {cos.min():.5f}  mean {cos.mean():.5f}")
+
+
+if __name__ == "__main__":
+    import sys
+    _bench(*[int(a) for a in sys.argv[1:3]])
@@ -0,0 +1,105 @@
+# embedding_cache.py
+# ------------------------------------------------------------
+# Cache embedding speaker di disk (SQLite, satu file per workspace/outdir).
+# Kunci: (hash isi audio, start_ms, end_ms, model_id). model_id memuat nama model +
+# varian padding (mis. "speechbrain/spkrec-ecapa-voxceleb|pad=right:16000"),
+# jadi embedding dari cara potong berbeda tidak tercampur.
+# - get_or_compute(): lookup semua span sekaligus, compute() hanya dipanggil untuk yang
+#   belum ada (compute boleh memuat model/audio secara lazy) → sweep parameter global
+#   link (link_threshold, samples_per_spk, max_speakers) tidak menghitung ulang ECAPA
+# - Hash audio (blake2b isi file) di-cache per proses per (path, mtime_ns, size)
+# - WAL, satu koneksi per cache + lock (aman dipakai beberapa thread)
+# ------------------------------------------------------------
+
+import hashlib, sqlite3, threading
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+CACHE_NAME = "embeddings.sqlite"
+WHOLE_FILE = (0, -1)   # span untuk embedding satu file utuh (mis. referensi male/female)
+
+_hash_lock = threading.Lock()
+_hash_cache: Dict[str, Tuple[int, int, str]] = {}
+
+
+def audio_hash(path) -> str:
+    p = Path(path)
+    st = p.stat()
+    key = str(p.resolve())
+    with _hash_lock:
+        hit = _hash_cache.get(key)
+        if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            return hit[2]
+    h = hashlib.blake2b(digest_size=16)
+    with p.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _hash_lock:
+        _hash_cache[key] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+
+def span_ms(start: float, end: float) -> Tuple[int, int]:
+    return int(round(float(start) * 1000)), int(round(float(end) * 1000))
+
+
+class EmbeddingCache:
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS emb (
+            audio TEXT, start_ms INTEGER, end_ms INTEGER, model TEXT, dim INTEGER, vec BLOB,
+            PRIMARY KEY (audio, model, start_ms, end_ms))""")
+        self.conn.commit()
+
+    def get_many(self, audio: str, model: str, spans_ms: Sequence[Tuple[int, int]]) -> Dict[Tuple[int, int], np.ndarray]:
+        want = set(spans_ms)
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT start_ms, end_ms, dim, vec FROM emb WHERE audio = ? AND model = ?", (audio, model)
+            ).fetchall()
+        return {(s, e): np.frombuffer(v, dtype=np.float32, count=d).copy()
+                for s, e, d, v in rows if (s, e) in want}
+
+    def put_many(self, audio: str, model: str, items: Dict[Tuple[int, int], np.ndarray]):
+        if not items:
+            return
+        data = [(audio, s, e, model, int(v.size), np.asarray(v, np.float32).tobytes())
+                for (s, e), v in items.items()]
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO emb VALUES (?, ?, ?, ?, ?, ?)", data)
+            self.conn.commit()
+
+    def get_or_compute(self, audio: str, model: str, spans_ms: Sequence[Tuple[int, int]],
+                       compute: Callable[[List[int]], np.ndarray]) -> np.ndarray:
+        """Embedding [N, D] urut spans_ms; compute(index_yang_belum_ada) → array [len, D]."""
+        if not spans_ms:
+            return np.zeros((0, 0), np.float32)
+        have = self.get_many(audio, model, spans_ms)
+        missing = [i for i, k in enumerate(spans_ms) if k not in have]
+        if missing:
+            vecs = compute(missing)
+            new = {spans_ms[i]: np.asarray(v, np.float32) for i, v in zip(missing, vecs)}
+            self.put_many(audio, model, new)
+            have.update(new)
+        return np.stack([have[k] for k in spans_ms], 0)
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+def get_embedding_cache(folder) -> EmbeddingCache:
+    """Satu EmbeddingCache per folder (file <folder>/embeddings.sqlite)."""
+    key = str((Path(folder) / CACHE_NAME).resolve())
+    with _caches_lock:
+        c = _caches.get(key)
+        if c is None:
+            c = _caches[key] = EmbeddingCache(Path(key))
+        return c
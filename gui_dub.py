@@ -1,5 +1,5 @@
 # gui_dub.py — DracinDub GUI (Edge TTS + ElevenLabs TTS, season loader, ref bank, progress, logo/banner)
-import os, sys, json, threading, subprocess, time, queue, shutil
+import os, sys, json, threading, subprocess, time, shutil
 from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, StringVar, BooleanVar, simpledialog
@@ -15,6 +15,7 @@ from deepseek_mt import (
 )
 from deepseek_mt import _postprocess_indonesian as postprocess_indonesian_dubbing
 from gui_tab import build_notebook
+from voiceprints import get_season_index, has_season_index
 
 # Optimasi memory untuk GPU 4GB
 os.environ["PYTORCH_CUDA_ALLOC_CONF"] = "max_split_size_mb:24"
@@ -208,6 +209,13 @@ def tts_line_elevenlabs(text: str, gender: str, base: Path,
     elif gender == "Female": vid = voice_id_f or voice_id_u
     if not api_key: raise RuntimeError("ElevenLabs API key kosong.")
     if not vid: raise RuntimeError("ElevenLabs voice ID belum diisi.")
+    raw = Path(str(base) + "_el_raw.wav")
+    cache = dr.get_tts_cache()
+    key = dr.tts_key("elevenlabs", vid, text, model=model_id or "eleven_multilingual_v2",
+                     stability=float(stability), similarity=float(similarity),
+                     style=float(style), boost=bool(boost))
+    if cache.get(key, raw):
+        return raw
     url = f"https://api.elevenlabs.io/v1/text-to-speech/{vid}"
     headers = {"xi-api-key": api_key, "Accept": "audio/wav"}
     payload = {
@@ -227,10 +235,10 @@ def tts_line_elevenlabs(text: str, gender: str, base: Path,
         except Exception:
             err = r.text
         raise RuntimeError(f"ElevenLabs error {r.status_code}: {err}")
-    raw = Path(str(base) + "_el_raw.wav")
     with raw.open("wb") as f:
         for chunk in r.iter_content(chunk_size=65536):
             if chunk: f.write(chunk)
+    cache.put(key, raw)
     return raw
        
 # ---------- App ----------
@@ -303,9 +311,11 @@ class App:
         self.max_atempo = StringVar(value="1.8")
         self.fade_sec   = StringVar(value="0.02")
         self.mix_chunk  = StringVar(value="400")
+        self.mix_backend = StringVar(value="memmap")
         self.bg_mode    = tk.StringVar(value="center_cut")
         self.replace_audio = BooleanVar(value=False)
         self.tts_timeout = StringVar(value="25")
+        self.tts_concurrency = StringVar(value="0")   # 0 = default per engine
 
         # Edge voices
         self.voice_m = StringVar(value="id-ID-ArdiNeural")
@@ -327,6 +337,7 @@ class App:
         self.state_processing_done = False
         self.srt_orig = None; self.srt_id = None; self.segjson = None; self.spkjson = None
         self.entries = []; self.selected_idx = None
+        self.season_folder = None; self.season_ids = {}   # speaker lokal → voiceprint season (V01, ...)
         self._autosave_enabled = tk.BooleanVar(value=True)
         self._editing_dirty = False; self._autosave_after = None
 
@@ -447,6 +458,7 @@ class App:
         self.tab3_editing = ttk.Frame(nb); nb.add(self.tab3_editing, text="3) Editing")
         top = ttk.Frame(self.tab3_editing); top.pack(fill="x", padx=8, pady=6)
         ttk.Button(top, text="Load Season Folder", command=self.load_season_folder).pack(side="left")
+        ttk.Button(top, text="Index Voiceprints", command=lambda: self._start_bg(self.index_season_voiceprints)).pack(side="left", padx=(6,0))
         ttk.Label(top, text="  Filter Gender").pack(side="left", padx=6)
         self.filter_gender = StringVar(value="All")
         self.cbo_gender = ttk.Combobox(top, textvariable=self.filter_gender, values=["All","Male","Female","Unknown"], width=10)
@@ -550,6 +562,8 @@ class App:
         ttk.Entry(frm, textvariable=self.fade_sec, width=10).grid(row=5, column=3, sticky="w")
         ttk.Label(frm, text="mix_chunk").grid(row=5, column=4, sticky="e")
         ttk.Entry(frm, textvariable=self.mix_chunk, width=10).grid(row=5, column=5, sticky="w")
+        ttk.Label(frm, text="mix_backend").grid(row=6, column=0, sticky="w")
+        ttk.Combobox(frm, textvariable=self.mix_backend, values=list(dr.MIX_BACKENDS), width=10, state="readonly").grid(row=6, column=1, sticky="w")
 
         # ElevenLabs fine controls
         fine = ttk.Frame(self.tab4_export); fine.pack(fill="x", padx=8, pady=(0,6))
@@ -564,6 +578,8 @@ class App:
         ttk.Combobox(row3, textvariable=self.bg_mode, values=["center_cut","mix_low","off"], width=12).pack(side="left")
         ttk.Label(row3, text="TTS timeout (s/seg)").pack(side="left", padx=(12,4))
         ttk.Entry(row3, textvariable=self.tts_timeout, width=5).pack(side="left")
+        ttk.Label(row3, text="TTS paralel").pack(side="left", padx=(12,4))
+        ttk.Entry(row3, textvariable=self.tts_concurrency, width=4).pack(side="left")
         ttk.Button(self.tab4_export, text="Generate TTS & Export", style="success.TButton",
                    command=self.generate_tts_export).pack(pady=6)
                    
@@ -691,6 +707,17 @@ class App:
         data["updated_at"] = int(time.time())
         ov_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
 
+        # 6) Speaker yang SEMUA barisnya kini bergender sama → kunci gender voiceprint season
+        if self.season_folder and self.season_ids and new_gender != "Unknown":
+            touched = {spk for (idx, _, _, _, spk, _) in rows if idx in idcs and spk in self.season_ids}
+            for spk in touched:
+                if all(g == new_gender for (_, _, _, _, s, g) in rows if s == spk):
+                    try:
+                        get_season_index(self.season_folder).set_gender(self.season_ids[spk], new_gender)
+                        self.log(f"[Season] {self.season_ids[spk]} → {new_gender}")
+                    except Exception as e:
+                        self.log(f"[Season] Gagal update voiceprint {self.season_ids[spk]}: {e}")
+
         self._editing_dirty = False
         self.log(f"✅ Mass gender set: {len(idcs)} rows → {new_gender}")
 
@@ -914,7 +941,7 @@ class App:
         self._trans_start()
 
     def _trans_fill_missing(self):
-        """Fill missing translations"""
+        """Repair baris kosong/gagal saja (batch kecil + konteks tetangga), tanpa pass ulang penuh"""
         if not self.trans_entries:
             messagebox.showinfo("Translate", "Load SRT file first")
             return
@@ -925,10 +952,39 @@ class App:
         
         if rep["ok"]:
             messagebox.showinfo("Translate", "✅ All lines translated")
-        else:
-            missing = len(rep["missing_indices"]) + len(rep["empty_indices"])
-            if messagebox.askyesno("Fill Missing", f"Translate {missing} missing lines?"):
-                self._trans_start()
+            return
+        missing = len(rep["missing_indices"]) + len(rep["empty_indices"]) + len(rep["same_as_src_indices"])
+        if not messagebox.askyesno("Fill Missing", f"Repair {missing} missing lines?"):
+            return
+
+        valid, msg = self._trans_validate_api_key()
+        if not valid:
+            messagebox.showerror("DeepSeek", msg)
+            return
+        # baris yang sama dengan sumber ikut di-repair (dikosongkan dulu)
+        current = list(self.trans_lines) + [""] * (len(src_lines) - len(self.trans_lines))
+        for i in rep["same_as_src_indices"]:
+            current[i] = ""
+        self.translate_stop_flag = False
+        self._trans_debug_log(f"🩹 Repair {missing} lines...")
+
+        def runit():
+            try:
+                translate_lines_realtime(
+                    src_lines, self.ds_key.get().strip(),
+                    batch=int(self.ds_batch.get() or "20"), workers=int(self.ds_workers.get() or "1"),
+                    timeout=int(self.ds_timeout.get() or "90"),
+                    cache_file=self.trans_cache_path,
+                    on_progress=self._trans_on_progress, on_chunk_done=self._trans_on_chunk,
+                    translated=current, repair_only=True,
+                )
+                left = sum(1 for t in self.trans_lines if not (t or "").strip())
+                self._trans_log(f"✅ Repair selesai ({left} baris masih kosong)")
+            except Exception as e:
+                if not self.translate_stop_flag:
+                    self._trans_log(f"❌ Repair failed: {e}")
+
+        threading.Thread(target=runit, daemon=True).start()
 
     def _trans_save(self, silent=False):
         """Save translations dan update Tab 3"""
@@ -1439,6 +1495,7 @@ class App:
 
     def _populate_season_list(self, folder: Path):
         self.season_list.delete(0, "end")
+        self.season_folder = folder
         def is_workdir(x: Path):
             return (x.is_dir() and any(x.glob("*.id.srt")) and any(x.glob("*_segments.json")) and any(x.glob("*_speakers.json")))
         candidates = []
@@ -1497,6 +1554,45 @@ class App:
         self.plabel1.config(text=f"Loaded: {work.name}")
         self.pbar1['value'] = 100
 
+        # Episode baru di season yang sudah punya index voiceprint → match di background
+        if (self.season_folder and has_season_index(self.season_folder)
+                and not self.season_ids and any(work.glob("*_16k.wav"))):
+            self._start_bg(lambda: self._index_episode_voiceprints(work))
+
+    # --- Index voiceprint season (speaker lintas episode)
+    def _season_device(self):
+        return "cuda" if self.use_gpu.get() and torch.cuda.is_available() else "cpu"
+
+    def _index_episode_voiceprints(self, work: Path):
+        try:
+            labels = get_season_index(self.season_folder).index_workdir(work, self._season_device())
+        except Exception as e:
+            self.log(f"[Season] Voiceprint gagal untuk {work.name}: {e}")
+            return None
+        self.log(f"[Season] {work.name}: " + ", ".join(
+            f"{sp}→{lab['id']} ({lab['gender']})" for sp, lab in sorted(labels.items())))
+        if self.current_workdir == work and self.srt_id:
+            self.root.after(0, lambda: self.load_table_from_paths(self.srt_id, self.segjson, self.spkjson, None))
+        return labels
+
+    def index_season_voiceprints(self):
+        """Index semua episode di daftar season: speaker yang sama antar episode dapat ID & gender yang sama."""
+        if not self.season_folder:
+            messagebox.showinfo("Season", "Load season folder dulu.")
+            return
+        works = [Path(self.season_list.get(i)) for i in range(self.season_list.size())]
+        works = [w for w in works if any(w.glob("*_16k.wav"))]
+        if not works:
+            messagebox.showinfo("Season", "Tidak ada episode dengan *_16k.wav.")
+            return
+        self.log(f"🎙️ Index voiceprint season: {len(works)} episode...")
+        for i, work in enumerate(works, 1):
+            self._set_p1(int(100 * (i - 1) / len(works)), f"Voiceprint {work.name} ({i}/{len(works)})")
+            self._index_episode_voiceprints(work)
+        st = get_season_index(self.season_folder).stats()
+        self._set_p1(100, "Voiceprint index selesai.")
+        self.log(f"✅ Season index: {st['voiceprints']} voiceprint, {st['episodes']} episode")
+
     # --- Pastikan workdir sinkron dan valid (TAK MENGUBAH ALUR LAMA)
     def _ensure_workdir_consistency(self):
         """
@@ -1545,6 +1641,11 @@ class App:
         self.srt_id, self.segjson, self.spkjson = map(Path, [srt_id, segjson, spkjson])
         entries = dr.build_entries_with_speakers(self.srt_id, self.segjson, self.spkjson)
         self.entries = entries
+        try:
+            spkmap = json.loads(self.spkjson.read_text(encoding="utf-8")).get("speakers", {})
+            self.season_ids = {k: v["season_id"] for k, v in spkmap.items() if isinstance(v, dict) and v.get("season_id")}
+        except Exception:
+            self.season_ids = {}
         spks = sorted({e[4] for e in entries if e[4]})
         self.cbo_speaker["values"] = ["All"] + spks
         self._refill_tree(entries)
@@ -1553,8 +1654,10 @@ class App:
     def _refill_tree(self, entries):
         for row in self.tree.get_children(): self.tree.delete(row)
         for (idx, t0, t1, text, spk, gender) in entries:
+            sid = self.season_ids.get(spk)
             self.tree.insert("", "end", iid=str(idx),
-                             values=(idx, hhmmssms(t0), hhmmssms(t1), spk, gender, text, self._warn_text(text)))
+                             values=(idx, hhmmssms(t0), hhmmssms(t1), f"{spk} [{sid}]" if sid else spk,
+                                     gender, text, self._warn_text(text)))
 
     def apply_filter(self):
         g = self.filter_gender.get(); s = self.filter_speaker.get()
@@ -1654,38 +1757,6 @@ class App:
         self._editing_dirty = False
 
     # ---------- TTS ----------
-    def _tts_edge_timeout(self, clean_text, gender, base, timeout_s):
-        q = queue.Queue()
-        def worker():
-            try:
-                out = dr.tts_line_edge(clean_text, gender, base,
-                                       self.voice_m.get(), self.voice_f.get(), self.voice_u.get(),
-                                       self.rate.get(), self.volume.get(), self.pitch.get())
-                q.put(("ok", out))
-            except Exception as e:
-                q.put(("err", e))
-        threading.Thread(target=worker, daemon=True).start()
-        try: kind, val = q.get(timeout=max(5, timeout_s))
-        except queue.Empty: return None, "timeout"
-        return (val, None) if kind=="ok" else (None, str(val))
-
-    def _tts_eleven_timeout(self, clean_text, gender, base, timeout_s):
-        q = queue.Queue()
-        def worker():
-            try:
-                out = tts_line_elevenlabs(clean_text, gender, base,
-                                          self.el_voice_m.get(), self.el_voice_f.get(), self.el_voice_u.get(),
-                                          self.el_api_key.get(), self.el_model.get(),
-                                          float(self.el_stab.get()), float(self.el_sim.get()), float(self.el_style.get()),
-                                          bool(self.el_boost.get()), timeout=max(5, timeout_s))
-                q.put(("ok", out))
-            except Exception as e:
-                q.put(("err", e))
-        threading.Thread(target=worker, daemon=True).start()
-        try: kind, val = q.get(timeout=max(5, timeout_s+5))
-        except queue.Empty: return None, "timeout"
-        return (val, None) if kind=="ok" else (None, str(val))
-
     def _set_p3(self, pct, msg=None, pulse=False):
         if pulse: self.pbar3.config(mode="indeterminate"); self.pbar3.start(12)
         else: self.pbar3.stop(); self.pbar3.config(mode="determinate"); self.pbar3['value'] = pct
@@ -1749,63 +1820,49 @@ class App:
             video_dur = dr.ffprobe_duration(video)
             segfiles = []
 
-            # ========== TTS per segmen (RESUME-AWARE) ==========
+            # ========== TTS per segmen (POOL, RESUME-AWARE) ==========
             self._set_p4(2, "TTS per segmen .")
-            for i, (idx, t0, t1, text, spk, gender) in enumerate(entries, start=1):
-                dur = max(0.05, t1 - t0)
-                base = work / f"seg_{idx:05d}"
-                adj_wav = work / f"seg_{idx:05d}.wav"
-
-                # ✅ RESUME: jika segmen sudah ada, langsung pakai
-                if adj_wav.exists() and adj_wav.stat().st_size > 0:
-                    try:
-                        seg_dur = dr.ffprobe_duration(adj_wav)
-                    except Exception:
-                        seg_dur = dur
-                    segfiles.append((t0, adj_wav, seg_dur))
-                    self._set_p4(2 + int(78 * i / total), f"Resume TTS {i}/{total}")
-                    continue
-
-                clean = dr.sanitize_text_for_tts(text)
-                raw_wav = None
+            engine = self.tts_engine.get()
+            timeout_s = int(float(self.tts_timeout.get()))
+            if engine == "elevenlabs":
+                el = (self.el_voice_m.get(), self.el_voice_f.get(), self.el_voice_u.get(),
+                      self.el_api_key.get(), self.el_model.get(),
+                      float(self.el_stab.get()), float(self.el_sim.get()), float(self.el_style.get()),
+                      bool(self.el_boost.get()))
+                def synth(clean, gender, base):
+                    return tts_line_elevenlabs(clean, gender, base, *el, timeout=max(5, timeout_s))
+            else:
+                edge = (self.voice_m.get(), self.voice_f.get(), self.voice_u.get(),
+                        self.rate.get(), self.volume.get(), self.pitch.get())
+                async def synth(clean, gender, base):
+                    return await dr.tts_line_edge_async(clean, gender, base, *edge)
+
+            def _on_tts(done, n, idx):
+                self._set_p4(2 + int(78 * done / total), f"TTS {done}/{n}")
+
+            segfiles = dr.tts_segments_pool(
+                entries, work, synth,
+                engine=engine, concurrency=int(self.tts_concurrency.get() or 0) or None,
+                timeout=timeout_s,
+                max_atempo=float(self.max_atempo.get()), fade=float(self.fade_sec.get()),
+                on_progress=_on_tts, log=self.log
+            )
 
-                if not clean:
-                    dr.run(["ffmpeg","-y","-f","lavfi","-i","anullsrc=channel_layout=stereo:sample_rate=48000",
-                            "-t", f"{dur:.3f}", str(adj_wav)])
-                else:
-                    timeout_s = int(float(self.tts_timeout.get()))
-                    if self.tts_engine.get()=="elevenlabs":
-                        raw_wav, err = self._tts_eleven_timeout(clean, gender, base, timeout_s)
-                    else:
-                        raw_wav, err = self._tts_edge_timeout(clean, gender, base, timeout_s)
-
-                    if raw_wav is None:
-                        self.log(f"[WARN] TTS seg#{idx} gagal ({err}), pakai silence.")
-                        dr.run(["ffmpeg","-y","-f","lavfi","-i","anullsrc=channel_layout=stereo:sample_rate=48000",
-                                "-t", f"{dur:.3f}", str(adj_wav)])
-                    else:
-                        tmp_out = work / f"{adj_wav.stem}.tmp.wav"
-                        dr.adjust_to_duration(raw_wav, dur, tmp_out, min_atempo=1.2,
-                                              max_atempo=float(self.max_atempo.get()),
-                                              fade=float(self.fade_sec.get()))
-                        if adj_wav.exists():
-                            adj_wav.unlink()
-                        tmp_out.rename(adj_wav)
-
-                segfiles.append((t0, adj_wav, dur))
-                self._set_p4(2 + int(78 * i / total), f"TTS {i}/{total}")
+            st = dr.get_tts_cache().stats()
+            self.log(f"[TTS cache] hit {st['hits']} / miss {st['misses']} (hit rate {st['hit_rate']:.0%})")
 
             # Prevent overlap (tetap)
             self._set_p4(82, "Prevent overlap .")
             segfiles = dr.prevent_overlap(segfiles, work)
 
             # ========== Mixing (RESUME-AWARE) ==========
-            self._set_p4(86, "Mixing chunks .", pulse=True)
+            self._set_p4(86, f"Mixing ({self.mix_backend.get()}) .", pulse=True)
             final_wav = work / f"{video.stem}_dubtrack.wav"
             if final_wav.exists() and final_wav.stat().st_size > 0:
                 self.log(f"[resume] Skip mixing, pakai {final_wav.name}")
             else:
-                dr.chunked_mix(work, video_dur, segfiles, final_wav, chunk_size=int(self.mix_chunk.get()))
+                dr.mix_dubtrack(work, video_dur, segfiles, final_wav,
+                                backend=self.mix_backend.get(), chunk_size=int(self.mix_chunk.get()))
 
             # Mux video (tetap)
             self._set_p4(96, "Muxing video .", pulse=True)
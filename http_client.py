@@ -0,0 +1,167 @@
+# http_client.py
+# ------------------------------------------------------------
+# Client HTTP bersama (connection pool) untuk panggilan DeepSeek.
+# - Sync: satu httpx.Client per proses (fallback requests.Session kalau httpx tidak ada)
+# - Async: satu httpx.AsyncClient per event loop (AsyncClient terikat ke loop-nya)
+# - Keep-alive, HTTP/2 bila paket `h2` terpasang, ukuran pool & batas per host bisa diatur
+# - stream_post(): respons streaming (SSE) untuk parsing baris terjemahan bertahap (llm_stream)
+# - Lifecycle: init_http_clients() / close_http_clients() dipanggil saat startup/shutdown app
+# Env:
+#   DRACINDUB_HTTP_POOL      total koneksi maksimum (default 32)
+#   DRACINDUB_HTTP_PER_HOST  request bersamaan maksimum per host (default 16)
+#   DRACINDUB_HTTP2          0 untuk mematikan HTTP/2
+# ------------------------------------------------------------
+
+import os, threading, asyncio
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (httpx butuh h2 untuk http2=True)
+    _H2_OK = True
+except ImportError:
+    _H2_OK = False
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+POOL_SIZE = _env_int("DRACINDUB_HTTP_POOL", 32)
+PER_HOST = _env_int("DRACINDUB_HTTP_PER_HOST", 16)
+USE_HTTP2 = _H2_OK and os.getenv("DRACINDUB_HTTP2", "1") != "0"
+
+_lock = threading.Lock()
+_sync_client = None
+_host_sems = {}          # host -> threading.BoundedSemaphore
+_async_clients = {}      # loop -> (httpx.AsyncClient, {host: asyncio.Semaphore})
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc
+
+
+# ---------- Sync ----------
+def get_http_client():
+    """Client sync bersama (thread-safe). httpx.Client atau requests.Session."""
+    global _sync_client
+    with _lock:
+        if _sync_client is None:
+            if httpx is not None:
+                _sync_client = httpx.Client(
+                    http2=USE_HTTP2,
+                    limits=httpx.Limits(max_connections=POOL_SIZE,
+                                        max_keepalive_connections=POOL_SIZE),
+                )
+            else:
+                import requests
+                from requests.adapters import HTTPAdapter
+                sess = requests.Session()
+                adapter = HTTPAdapter(pool_connections=PER_HOST, pool_maxsize=POOL_SIZE)
+                sess.mount("https://", adapter)
+                sess.mount("http://", adapter)
+                _sync_client = sess
+        return _sync_client
+
+
+def post(url: str, **kwargs):
+    """POST lewat client bersama, dibatasi PER_HOST request bersamaan per host."""
+    host = _host(url)
+    with _lock:
+        sem = _host_sems.get(host)
+        if sem is None:
+            sem = _host_sems[host] = threading.BoundedSemaphore(PER_HOST)
+    client = get_http_client()
+    with sem:
+        return client.post(url, **kwargs)
+
+
+@contextmanager
+def stream_post(url: str, **kwargs):
+    """POST streaming (SSE) lewat client bersama; body dibaca bertahap di dalam blok with.
+    Slot per host dipegang sampai stream ditutup."""
+    host = _host(url)
+    with _lock:
+        sem = _host_sems.get(host)
+        if sem is None:
+            sem = _host_sems[host] = threading.BoundedSemaphore(PER_HOST)
+    client = get_http_client()
+    with sem:
+        if httpx is not None:
+            with client.stream("POST", url, **kwargs) as r:
+                yield r
+        else:
+            r = client.post(url, stream=True, **kwargs)
+            try:
+                yield r
+            finally:
+                r.close()
+
+
+# ---------- Async ----------
+def get_async_client():
+    """AsyncClient bersama untuk event loop yang sedang jalan."""
+    if httpx is None:
+        raise RuntimeError("httpx belum terpasang. pip install httpx")
+    loop = asyncio.get_running_loop()
+    with _lock:
+        ent = _async_clients.get(loop)
+        if ent is None or ent[0].is_closed:
+            client = httpx.AsyncClient(
+                http2=USE_HTTP2,
+                limits=httpx.Limits(max_connections=POOL_SIZE,
+                                    max_keepalive_connections=POOL_SIZE),
+            )
+            ent = _async_clients[loop] = (client, {})
+        return ent[0]
+
+
+async def apost(url: str, **kwargs):
+    """POST async lewat client bersama loop ini, dibatasi PER_HOST per host."""
+    client = get_async_client()
+    loop = asyncio.get_running_loop()
+    sems = _async_clients[loop][1]
+    host = _host(url)
+    sem = sems.get(host)
+    if sem is None:
+        sem = sems[host] = asyncio.Semaphore(PER_HOST)
+    async with sem:
+        return await client.post(url, **kwargs)
+
+
+async def aclose_async_client():
+    """Tutup AsyncClient milik loop ini (panggil sebelum loop selesai, mis. akhir asyncio.run)."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        ent = _async_clients.pop(loop, None)
+    if ent is not None:
+        await ent[0].aclose()
+
+
+# ---------- Lifecycle (FastAPI startup/shutdown) ----------
+def init_http_clients():
+    get_http_client()
+    print(f"✅ HTTP pool ready (pool={POOL_SIZE}, per_host={PER_HOST}, http2={USE_HTTP2})")
+
+
+async def close_http_clients():
+    global _sync_client
+    with _lock:
+        client, _sync_client = _sync_client, None
+        _host_sems.clear()
+    if client is not None:
+        try:
+            client.close()
+        except Exception:
+            pass
+    try:
+        await aclose_async_client()
+    except Exception:
+        pass
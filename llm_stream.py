@@ -0,0 +1,138 @@
+# llm_stream.py
+# ------------------------------------------------------------
+# Parsing respons DeepSeek mode streaming ("stream": true, server-sent events) untuk
+# deepseek_mt (format baris "N) terjemahan") dan backend core.translate (JSON object `results`).
+# Baris / entri results yang sudah lengkap langsung diteruskan ke pemanggil (on_chunk_done,
+# event NDJSON `result`) tanpa menunggu seluruh batch selesai digenerate.
+# - iter_deltas / aiter_deltas: baris SSE "data: {...}" → potongan teks delta, berhenti di [DONE]
+# - LineStream: gabungkan delta → baris teks yang sudah ditutup newline
+# - JsonResultsStream: gabungkan delta → dict entri `"results": [...]` yang kurung kurawalnya sudah tutup
+# - Teks lengkap (.text) tetap diparse ulang dengan jalur non-streaming → hasil akhir identik
+# Env: DRACINDUB_TRANSLATE_STREAM=0 untuk kembali ke respons utuh ("stream": false)
+# ------------------------------------------------------------
+
+import json, os, re
+from typing import AsyncIterable, Iterable, Iterator, List, AsyncIterator
+
+STREAM_ENABLED = os.environ.get("DRACINDUB_TRANSLATE_STREAM", "1") != "0"
+
+_RESULTS = re.compile(r'"results"\s*:\s*\[')
+
+
+def _sse_delta(line: str):
+    """Satu baris SSE → teks delta ("" kalau bukan data), None untuk [DONE]."""
+    line = (line or "").strip()
+    if not line.startswith("data:"):
+        return ""
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return None
+    try:
+        choice = json.loads(data)["choices"][0]
+    except (ValueError, KeyError, IndexError, TypeError):
+        return ""
+    return (choice.get("delta") or {}).get("content") or ""
+
+
+def iter_deltas(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        d = _sse_delta(line.decode("utf-8") if isinstance(line, bytes) else line)
+        if d is None:
+            return
+        if d:
+            yield d
+
+
+async def aiter_deltas(lines: AsyncIterable[str]) -> AsyncIterator[str]:
+    async for line in lines:
+        d = _sse_delta(line.decode("utf-8") if isinstance(line, bytes) else line)
+        if d is None:
+            return
+        if d:
+            yield d
+
+
+def response_lines(resp) -> Iterable[str]:
+    """Iterator baris dari response streaming httpx (iter_lines) atau requests (stream=True)."""
+    if hasattr(resp, "iter_content"):
+        return resp.iter_lines(decode_unicode=True)
+    return resp.iter_lines()
+
+
+class LineStream:
+    """Delta → baris lengkap (dipisah newline); sisa terakhir keluar lewat close()."""
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._tail = ""
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def feed(self, delta: str) -> List[str]:
+        self._parts.append(delta)
+        buf = self._tail + delta
+        *done, self._tail = buf.split("\n")
+        return done
+
+    def close(self) -> List[str]:
+        tail, self._tail = self._tail, ""
+        return [tail] if tail.strip() else []
+
+
+class JsonResultsStream:
+    """Delta → dict tiap entri array `results` begitu objeknya lengkap (string & escape diperhitungkan)."""
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = -1        # posisi scan di dalam array results (-1 = array belum ketemu)
+        self._depth = 0
+        self._start = 0
+        self._in_str = False
+        self._esc = False
+        self._closed = False
+
+    @property
+    def text(self) -> str:
+        return self._buf
+
+    def feed(self, delta: str) -> List[dict]:
+        self._buf += delta
+        if self._pos < 0:
+            m = _RESULTS.search(self._buf)
+            if not m:
+                return []
+            self._pos = m.end()
+        rows = []
+        buf = self._buf
+        i = self._pos
+        while i < len(buf) and not self._closed:
+            c = buf[i]
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == "\\":
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+            elif c == '"':
+                self._in_str = True
+            elif c == "{":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif c == "}" and self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        row = json.loads(buf[self._start:i + 1])
+                    except ValueError:
+                        row = None
+                    if isinstance(row, dict):
+                        rows.append(row)
+            elif c == "]" and self._depth == 0:
+                self._closed = True
+            i += 1
+        self._pos = i
+        return rows
@@ -0,0 +1,153 @@
+# model_registry.py
+# ------------------------------------------------------------
+# Registry model per proses: pyannote speaker-diarization + SpeechBrain ECAPA.
+# - Dimuat sekali per (model, device), lalu dipakai ulang oleh semua entry point:
+#   dracin_gender.main, suara.DracinGenderApp, backend core.speaker_link (model worker)
+# - Cache offline: snapshot HF disalin ke DRACINDUB_MODEL_CACHE (default <repo>/models_cache).
+#   Setelah fetch pertama (file penanda .complete), load langsung dari folder lokal tanpa
+#   network call. Pipeline pyannote dimuat dari config.yaml lokal yang menunjuk ke
+#   checkpoint segmentation/embedding lokal (cara "offline use" pyannote 3.x)
+# - Thread-safe: lock per key (model berbeda bisa dimuat paralel), double-checked
+# - Metrik: model_stats() → {key: {load_s, loaded_at, hits, source}}
+# ------------------------------------------------------------
+
+import os, threading, time
+from pathlib import Path
+from typing import Dict, Optional
+
+CACHE_DIR = Path(os.environ.get("DRACINDUB_MODEL_CACHE") or Path(__file__).resolve().parent / "models_cache")
+
+DIARIZATION_REPO = "pyannote/speaker-diarization-3.1"
+ECAPA_REPO = "speechbrain/spkrec-ecapa-voxceleb"
+
+_MARKER = ".complete"
+
+_models: Dict[tuple, object] = {}
+_stats: Dict[str, dict] = {}
+_locks: Dict[tuple, threading.Lock] = {}
+_guard = threading.Lock()
+_snap_lock = threading.Lock()
+
+
+# ---------- snapshot lokal ----------
+def _local_dir(repo_id: str) -> Path:
+    return CACHE_DIR / repo_id.replace("/", "--")
+
+
+def has_local(repo_id: str) -> bool:
+    return (_local_dir(repo_id) / _MARKER).exists()
+
+
+def local_snapshot(repo_id: str, token: Optional[str] = None) -> Path:
+    """Folder snapshot lokal; download (sekali) hanya kalau belum lengkap."""
+    d = _local_dir(repo_id)
+    if (d / _MARKER).exists():
+        return d
+    with _snap_lock:
+        if not (d / _MARKER).exists():
+            from huggingface_hub import snapshot_download
+            d.mkdir(parents=True, exist_ok=True)
+            snapshot_download(
+                repo_id,
+                local_dir=str(d),
+                local_dir_use_symlinks=False,   # copy, bukan symlink (Windows)
+                token=token or False,           # tanpa token → anonymous (hindari token expired)
+            )
+            (d / _MARKER).write_text(time.strftime("%Y-%m-%d %H:%M:%S"), encoding="utf-8")
+    return d
+
+
+def _pyannote_offline_config(token: Optional[str]) -> Path:
+    """config.yaml pipeline dengan path segmentation/embedding diarahkan ke checkpoint lokal."""
+    import yaml
+    root = local_snapshot(DIARIZATION_REPO, token)
+    cfg_path = root / "config.offline.yaml"
+    if cfg_path.exists():
+        return cfg_path
+    data = yaml.safe_load((root / "config.yaml").read_text(encoding="utf-8"))
+    params = data["pipeline"]["params"]
+    for key in ("segmentation", "embedding"):
+        ref = params.get(key)
+        if isinstance(ref, str) and "/" in ref and not Path(ref).exists():
+            ckpt = local_snapshot(ref, token) / "pytorch_model.bin"
+            if not ckpt.exists():
+                raise FileNotFoundError(f"{ref}: pytorch_model.bin tidak ada")
+            params[key] = str(ckpt)
+    tmp = cfg_path.with_suffix(".tmp")
+    tmp.write_text(yaml.safe_dump(data, sort_keys=False), encoding="utf-8")
+    os.replace(tmp, cfg_path)
+    return cfg_path
+
+
+# ---------- registry ----------
+def _key_lock(key: tuple) -> threading.Lock:
+    with _guard:
+        lk = _locks.get(key)
+        if lk is None:
+            lk = _locks[key] = threading.Lock()
+        return lk
+
+
+def _get(key: tuple, loader):
+    name = "/".join(map(str, key))
+    m = _models.get(key)
+    if m is None:
+        with _key_lock(key):
+            m = _models.get(key)
+            if m is None:
+                t = time.perf_counter()
+                m, source = loader()
+                dt = time.perf_counter() - t
+                _models[key] = m
+                _stats[name] = {"load_s": round(dt, 3), "loaded_at": time.time(), "hits": 0, "source": source}
+                print(f"✅ Model {name} loaded in {dt:.1f}s ({source})")
+                return m
+    with _guard:
+        _stats[name]["hits"] += 1
+    return m
+
+
+def get_diarization_pipeline(hf_token: Optional[str] = None, device="cpu"):
+    """pyannote Pipeline speaker-diarization-3.1, sudah dipindah ke device."""
+    def load():
+        from pyannote.audio import Pipeline
+        try:
+            pipe, source = Pipeline.from_pretrained(str(_pyannote_offline_config(hf_token))), "local"
+        except Exception as e:
+            print(f"[models] pyannote offline load gagal, fallback hub: {e}")
+            pipe, source = Pipeline.from_pretrained(DIARIZATION_REPO, use_auth_token=hf_token), "hub"
+        try:
+            import torch
+            pipe.to(torch.device(str(device)))
+        except Exception:
+            # beberapa build tidak mendukung .to(device); tetap jalan di CPU
+            pass
+        return pipe, source
+    return _get(("pyannote", str(device)), load)
+
+
+def get_ecapa(device="cpu"):
+    """SpeechBrain EncoderClassifier spkrec-ecapa-voxceleb."""
+    def load():
+        from speechbrain.inference.speaker import EncoderClassifier
+        run_opts = {"device": str(device)}
+        try:
+            d = local_snapshot(ECAPA_REPO)
+            return EncoderClassifier.from_hparams(source=str(d), savedir=str(d), run_opts=run_opts), "local"
+        except Exception as e:
+            print(f"[models] ECAPA offline load gagal, fallback hub: {e}")
+            return EncoderClassifier.from_hparams(source=ECAPA_REPO, run_opts=run_opts), "hub"
+    return _get(("ecapa", str(device)), load)
+
+
+def warmup(device="cpu"):
+    """Muat model yang snapshot-nya sudah ada lokal (tanpa network); dipakai saat worker start."""
+    if has_local(ECAPA_REPO):
+        get_ecapa(device)
+    if (_local_dir(DIARIZATION_REPO) / "config.offline.yaml").exists():
+        get_diarization_pipeline(None, device)
+
+
+def model_stats() -> Dict[str, dict]:
+    with _guard:
+        return {k: dict(v) for k, v in _stats.items()}
@@ -0,0 +1,173 @@
+# speaker_index.py
+# ------------------------------------------------------------
+# Index interval segmen diarization untuk menentukan speaker tiap baris SRT.
+# Hasil identik dengan scan linear lama di build_entries_with_speakers:
+# - Ada overlap  → segmen dengan overlap terbesar (seri → urutan pertama di JSON)
+# - Tanpa overlap → segmen dengan gap ujung-ke-ujung terkecil (seri → urutan pertama)
+# Overlap: bisect di array start terurut + prefix-max end → O(log M + k)
+# Gap    : bisect di array start & end terurut                → O(log M)
+# Index di-cache per file segments JSON (path + mtime + size), GUI reload tidak bangun ulang.
+#
+# Benchmark: python speaker_index.py [n_lines] [n_segments]
+# ------------------------------------------------------------
+
+import json, threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import List, Optional
+
+
+class SpeakerIndex:
+    def __init__(self, segs: List[dict]):
+        self.speakers = [s["speaker"] for s in segs]
+        st = [float(s["start"]) for s in segs]
+        en = [float(s["end"]) for s in segs]
+        self._start, self._end = st, en
+
+        # urut by start: untuk cari kandidat overlap
+        order = sorted(range(len(segs)), key=lambda i: st[i])
+        self._s_start = [st[i] for i in order]
+        self._s_end = [en[i] for i in order]
+        self._s_idx = order
+        pm, m = [], float("-inf")
+        for e in self._s_end:
+            m = e if e > m else m
+            pm.append(m)
+        self._s_maxend = pm  # max end di antara segmen [0..j] (urut start)
+
+        # untuk fallback gap: |t0 - end| terkecil & |start - t1| terkecil
+        self._e_order = sorted(range(len(segs)), key=lambda i: en[i])
+        self._e_vals = [en[i] for i in self._e_order]
+        self._b_vals = self._s_start
+        self._b_order = order
+
+    def __len__(self):
+        return len(self.speakers)
+
+    def who(self, t0: float, t1: float) -> Optional[str]:
+        i = self._best_overlap(t0, t1)
+        if i is None:
+            i = self._nearest_gap(t0, t1)
+        return None if i is None else self.speakers[i]
+
+    # ---------- internal ----------
+    def _best_overlap(self, t0, t1):
+        best = None; best_ol = 0.0
+        j = bisect_left(self._s_start, t1) - 1   # start < t1
+        while j >= 0 and self._s_maxend[j] > t0:
+            b0 = self._s_start[j]; b1 = self._s_end[j]
+            if b1 > t0:
+                ol = min(t1, b1) - max(t0, b0)
+                i = self._s_idx[j]
+                if ol > best_ol or (ol == best_ol and best is not None and i < best):
+                    best_ol = ol; best = i
+            j -= 1
+        return best
+
+    def _nearest_gap(self, t0, t1):
+        # gap lama = min(|t0 - end|, |start - t1|) → minimum global ada di tetangga bisect
+        cands = set(self._neighbours(self._e_vals, self._e_order, t0))
+        cands.update(self._neighbours(self._b_vals, self._b_order, t1))
+        best = None; best_gap = 1e9
+        for i in sorted(cands):
+            gap = min(abs(t0 - self._end[i]), abs(self._start[i] - t1))
+            if gap < best_gap:
+                best_gap = gap; best = i
+        return best
+
+    @staticmethod
+    def _neighbours(vals, order, x):
+        """Semua segmen dengan |x - v| minimal di kiri & kanan titik bisect (termasuk seri)."""
+        n = len(vals)
+        out = []
+        k = bisect_left(vals, x)
+        for rng in (range(k - 1, -1, -1), range(k, n)):
+            best = None
+            for j in rng:
+                d = abs(x - vals[j])
+                if best is None or d <= best:
+                    best = d
+                    out.append(order[j])
+                else:
+                    break
+        return out
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def load_speaker_index(segjson: Path) -> SpeakerIndex:
+    """SpeakerIndex untuk file *_segments.json, di-cache selama file tidak berubah."""
+    segjson = Path(segjson)
+    st = segjson.stat()
+    key = (str(segjson.resolve()), st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        idx = _cache.get(key)
+    if idx is None:
+        segs = json.loads(segjson.read_text(encoding="utf-8"))["segments"]
+        idx = SpeakerIndex(segs)
+        with _cache_lock:
+            for k in [k for k in _cache if k[0] == key[0]]:
+                del _cache[k]
+            _cache[key] = idx
+    return idx
+
+
+# ---------- Micro-benchmark ----------
+def _who_speaks_linear(segs, t0, t1):
+    """Logika lama (scan semua segmen) — referensi untuk cek hasil identik."""
+    best = None; best_ol = 0.0; best_gap = 1e9
+    for seg in segs:
+        a0, a1 = t0, t1
+        b0, b1 = seg["start"], seg["end"]
+        ol = max(0.0, min(a1, b1) - max(a0, b0))
+        if ol > best_ol:
+            best_ol = ol; best = seg["speaker"]; best_gap = 0.0
+        elif ol == 0.0:
+            gap = min(abs(a0 - b1), abs(b0 - a1))
+            if gap < best_gap:
+                best_gap = gap; best = seg["speaker"]
+    return best
+
+
+def _bench(n_lines: int = 5000, n_segs: int = 20000, seed: int = 0):
+    import random, time
+    rnd = random.Random(seed)
+    dur = n_segs * 1.5
+    segs = []
+    for _ in range(n_segs):
+        a = round(rnd.uniform(0, dur), 3)
+        segs.append({"start": a, "end": round(a + rnd.uniform(0.2, 6.0), 3),
+                     "speaker": f"SPEAKER_{rnd.randrange(12):02d}"})
+    lines = []
+    for _ in range(n_lines):
+        a = round(rnd.uniform(-5, dur + 5), 3)
+        lines.append((a, round(a + rnd.uniform(0.0, 4.0), 3)))
+    lines += [(s["end"], s["end"] + 0.5) for s in segs[:50]]  # kasus menempel (gap 0)
+
+    t = time.perf_counter()
+    idx = SpeakerIndex(segs)
+    t_build = time.perf_counter() - t
+    t = time.perf_counter()
+    got = [idx.who(a, b) for a, b in lines]
+    t_index = time.perf_counter() - t
+
+    # scan linear O(N×M) lambat sekali → ukur di sampel lalu ekstrapolasi
+    sample = lines[:: max(1, len(lines) // 500)]
+    t = time.perf_counter()
+    ref = [_who_speaks_linear(segs, a, b) for a, b in sample]
+    t_linear = (time.perf_counter() - t) * len(lines) / len(sample)
+    got = [idx.who(a, b) for a, b in sample]
+
+    bad = sum(1 for x, y in zip(got, ref) if x != y)
+    print(f"lines={len(lines)} segments={n_segs}")
+    print(f"linear : {t_linear:8.3f}s (ekstrapolasi dari {len(sample)} baris)")
+    print(f"index  : {t_index:8.3f}s (+ build {t_build:.3f}s)  speedup x{t_linear / max(t_index, 1e-9):.0f}")
+    print("✅ hasil identik" if not bad else f"❌ {bad}/{len(sample)} baris berbeda")
+    return bad
+
+
+if __name__ == "__main__":
+    import sys
+    args = [int(a) for a in sys.argv[1:3]]
+    sys.exit(1 if _bench(*args) else 0)
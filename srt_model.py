@@ -0,0 +1,200 @@
+# srt_model.py
+# ------------------------------------------------------------
+# Model subtitle tunggal untuk semua pembaca SRT (CLI, GUI, web backend).
+# - Parser toleran: SRT bernomor / tanpa nomor (auto = index sebelumnya + 1),
+#   ms pakai ',' atau '.', jam opsional (VTT mm:ss.ttt), BOM, header WEBVTT,
+#   format satu baris "[start --> end] teks" / "start --> end teks", blok tanpa baris kosong
+# - Representasi ringkas: array index / start_ms / end_ms + tabel teks
+# - Cache per file (path, invalidasi mtime_ns + size) dan per isi teks (hash),
+#   jadi parse hanya sekali per perubahan file, bukan per request
+# Benchmark: python srt_model.py [n_cues] [n_requests]
+# ------------------------------------------------------------
+
+import re, hashlib, threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+_TIME = r"(?:(\d{1,2}):)?(\d{1,2}):(\d{2})[,.](\d{1,3})"
+TIME_RE = re.compile(_TIME)
+TIME_LINE_RE = re.compile(_TIME + r"\s*-->\s*" + _TIME)
+_BLANK_SPLIT_RE = re.compile(r"\n[ \t\f\v]*\n")
+
+FILE_CACHE_MAX = 64
+TEXT_CACHE_MAX = 16
+
+
+def _ms(h, m, s, ms) -> int:
+    # digit ms dibaca apa adanya (",5" = 5 ms), sama dengan parser-parser lama
+    return ((int(h or 0) * 3600 + int(m) * 60 + int(s)) * 1000) + int(ms)
+
+
+def ts_to_ms(ts) -> Optional[int]:
+    """'HH:MM:SS,mmm' / 'H:MM:SS.mmm' / 'MM:SS.mmm' → ms; None kalau bukan timestamp."""
+    m = TIME_RE.match(str(ts or "").strip())
+    return _ms(*m.groups()) if m else None
+
+
+def fmt_ts(ms: int) -> str:
+    """ms → 'HH:MM:SS,mmm'."""
+    ms = max(0, int(ms))
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d},{ms % 1000:03d}"
+
+
+def ms_to_s(ms: int) -> float:
+    # detik utuh + pecahan ms (bentuk sama dengan parse_time/_t2s lama → float identik)
+    return (ms // 1000) + (ms % 1000) / 1000.0
+
+
+class Subtitles:
+    """Cue SRT dalam urutan file. index/start_ms/end_ms: array('q'), texts: list[str]."""
+    __slots__ = ("index", "start_ms", "end_ms", "texts")
+
+    def __init__(self):
+        self.index = array("q")
+        self.start_ms = array("q")
+        self.end_ms = array("q")
+        self.texts: List[str] = []
+
+    def _add(self, idx: int, s: int, e: int, text: str):
+        self.index.append(idx); self.start_ms.append(s); self.end_ms.append(e)
+        self.texts.append(text)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int, str]]:
+        """(index, start_ms, end_ms, text) per cue."""
+        return zip(self.index, self.start_ms, self.end_ms, self.texts)
+
+    def start_ts(self, i: int) -> str:
+        return fmt_ts(self.start_ms[i])
+
+    def end_ts(self, i: int) -> str:
+        return fmt_ts(self.end_ms[i])
+
+    def order_by_index(self) -> List[int]:
+        return sorted(range(len(self)), key=self.index.__getitem__)
+
+
+# ---------- Parser ----------
+_stats = {"parses": 0}
+
+def _clean(text: str) -> str:
+    s = (text or "").lstrip("﻿").replace("\r\n", "\n").replace("\r", "\n")
+    if s.lstrip().upper().startswith("WEBVTT"):
+        s = s.lstrip().split("\n", 1)[1] if "\n" in s.lstrip() else ""
+    return s
+
+
+def parse_srt_text(text: str) -> Subtitles:
+    """Parse tanpa cache (pakai load_srt / srt_from_text untuk versi ber-cache)."""
+    _stats["parses"] += 1
+    sub = Subtitles()
+    prev = 0
+    for blk in _BLANK_SPLIT_RE.split(_clean(text)):
+        lines = [ln for ln in blk.split("\n") if ln.strip()]   # isi baris teks tidak diubah
+        marks = [(i, m) for i, ln in enumerate(lines) for m in (TIME_LINE_RE.search(ln),) if m]
+        # satu blok bisa berisi beberapa cue (format satu baris / SRT tanpa baris kosong)
+        for j, (i, m) in enumerate(marks):
+            stop = marks[j + 1][0] if j + 1 < len(marks) else len(lines)
+            if stop < len(lines) and stop - 1 > i and lines[stop - 1].strip().isdigit():
+                stop -= 1                      # nomor cue berikutnya
+            if i > 0 and lines[i - 1].strip().isdigit():
+                idx = int(lines[i - 1])
+            elif j == 0 and lines[0].strip().isdigit():
+                idx = int(lines[0])
+            else:
+                idx = prev + 1
+            g = m.groups()
+            tail = lines[i][m.end():].strip().lstrip("]").strip()   # "[a --> b] teks" / "a --> b teks"
+            body = "\n".join(([tail] if tail else []) + lines[i + 1:stop]).strip()
+            sub._add(idx, _ms(*g[:4]), _ms(*g[4:]), body)
+            prev = idx
+    return sub
+
+
+# ---------- Cache ----------
+_lock = threading.Lock()
+_file_cache: "OrderedDict[str, tuple]" = OrderedDict()   # path -> (mtime_ns, size, Subtitles)
+_text_cache: "OrderedDict[str, Subtitles]" = OrderedDict()  # hash isi -> Subtitles
+
+
+def load_srt(path) -> Subtitles:
+    """Subtitles untuk file; parse ulang hanya kalau mtime/size berubah. File tidak ada → kosong."""
+    p = Path(path)
+    try:
+        st = p.stat()
+    except OSError:
+        return Subtitles()
+    key = str(p.resolve())
+    with _lock:
+        hit = _file_cache.get(key)
+        if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            _file_cache.move_to_end(key)
+            return hit[2]
+    sub = parse_srt_text(p.read_text(encoding="utf-8-sig", errors="ignore"))
+    with _lock:
+        _file_cache[key] = (st.st_mtime_ns, st.st_size, sub)
+        _file_cache.move_to_end(key)
+        while len(_file_cache) > FILE_CACHE_MAX:
+            _file_cache.popitem(last=False)
+    return sub
+
+
+def srt_from_text(text: str) -> Subtitles:
+    """Subtitles untuk isi SRT (mis. upload/form), di-cache per hash isi."""
+    key = hashlib.blake2b((text or "").encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+    with _lock:
+        sub = _text_cache.get(key)
+        if sub is not None:
+            _text_cache.move_to_end(key)
+            return sub
+    sub = parse_srt_text(text)
+    with _lock:
+        _text_cache[key] = sub
+        while len(_text_cache) > TEXT_CACHE_MAX:
+            _text_cache.popitem(last=False)
+    return sub
+
+
+def parse_count() -> int:
+    return _stats["parses"]
+
+
+# ---------- Benchmark ----------
+def _bench(n_cues: int = 5000, n_requests: int = 50):
+    import os, tempfile, time
+    lines = []
+    for i in range(1, n_cues + 1):
+        a = i * 2000
+        lines.append(f"{i}\n{fmt_ts(a)} --> {fmt_ts(a + 1500)}\nBaris subtitle nomor {i}\n")
+    with tempfile.TemporaryDirectory() as td:
+        p = Path(td) / "bench.srt"
+        p.write_text("\n".join(lines), encoding="utf-8")
+
+        t = time.perf_counter()
+        for _ in range(n_requests):
+            parse_srt_text(p.read_text(encoding="utf-8-sig"))  # pola lama: baca + regex tiap request
+        t_old = time.perf_counter() - t
+
+        before = parse_count()
+        t = time.perf_counter()
+        for r in range(n_requests):
+            if r == n_requests // 2:  # satu perubahan file di tengah
+                p.write_text("\n".join(lines) + "\n", encoding="utf-8")
+                os.utime(p, None)
+            sub = load_srt(p)
+        t_new = time.perf_counter() - t
+        parses = parse_count() - before
+
+    print(f"cues={n_cues} requests={n_requests} (1 perubahan file)")
+    print(f"parse per request : {t_old:7.3f}s  ({n_requests} parse)")
+    print(f"load_srt (cache)  : {t_new:7.3f}s  ({parses} parse)  x{t_old / max(t_new, 1e-9):.0f}")
+    assert len(sub) == n_cues and parses == 2
+
+
+if __name__ == "__main__":
+    import sys
+    _bench(*[int(a) for a in sys.argv[1:3]])
@@ -13,10 +13,12 @@ import torch.nn.functional as F
 import torchaudio
 import numpy as np
 
-from pyannote.audio import Pipeline
-from speechbrain.inference.speaker import EncoderClassifier
 from torch.serialization import add_safe_globals
 
+from model_registry import get_diarization_pipeline, get_ecapa, ECAPA_REPO
+from ecapa_batch import embed_batch
+from embedding_cache import get_embedding_cache, audio_hash, span_ms, WHOLE_FILE
+
 # Allowlist classes used in pyannote checkpoints
 import omegaconf
 add_safe_globals([omegaconf.listconfig.ListConfig, torch.torch_version.TorchVersion])
@@ -88,10 +90,7 @@ class ECAPAEmbedder:
     def __init__(self, device: torch.device, min_sec: float = 1.2, sr: int = 16000):
         self.device = device
         self.min_samples = int(min_sec * sr)
-        self.enc = EncoderClassifier.from_hparams(
-            source="speechbrain/spkrec-ecapa-voxceleb",
-            run_opts={"device": str(device)}
-        )
+        self.enc = get_ecapa(device)
         self.sr = sr
 
     @torch.inference_mode()
@@ -110,6 +109,27 @@ class ECAPAEmbedder:
         emb = self.enc.encode_batch(x).squeeze(0).squeeze(0)
         return emb.detach().cpu().numpy()
 
+    def embed_many(self, wavs) -> np.ndarray:
+        return embed_batch(self.enc, wavs, self.device, min_samples=self.min_samples, pad_mode="center")
+
+    def model_id(self) -> str:
+        return f"{ECAPA_REPO}|pad=center:{self.min_samples}"
+
+    def embed_spans(self, cache, audio_path, wav, spans) -> np.ndarray:
+        """Span (detik) dari audio_path lewat cache di disk; hanya yang belum ada yang di-encode."""
+        keys = [span_ms(a, b) for a, b in spans]
+        return cache.get_or_compute(
+            audio_hash(audio_path), self.model_id(), keys,
+            lambda idx: self.embed_many([slice_wav(wav, self.sr, *spans[i]) for i in idx]),
+        )
+
+    def embed_file(self, cache, path) -> np.ndarray:
+        """Satu file utuh (referensi male/female) lewat cache di disk."""
+        return cache.get_or_compute(
+            audio_hash(path), self.model_id(), [WHOLE_FILE],
+            lambda idx: [self(load_wav(Path(path), target_sr=self.sr, mono=True)[0].to(self.device))],
+        )[0]
+
 # ---------- Main GUI Application ----------
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
@@ -308,14 +328,7 @@ class DracinGenderApp:
             self.progress_queue.put(("status", "Running diarization..."))
             
             # Diarization
-            pipeline = Pipeline.from_pretrained(
-                "pyannote/speaker-diarization-3.1", 
-                use_auth_token=self.hf_token.get()
-            )
-            try:
-                pipeline.to(device)
-            except Exception:
-                pass
+            pipeline = get_diarization_pipeline(self.hf_token.get(), device)
             
             diar = pipeline({"audio": self.audio_path.get()})
             
@@ -331,10 +344,9 @@ class DracinGenderApp:
             # Embedding
             embedder = ECAPAEmbedder(device=device, min_sec=1.2, sr=16000)
             
-            mref_wav, _ = load_wav(Path(self.male_ref_path.get()), target_sr=16000, mono=True)
-            fref_wav, _ = load_wav(Path(self.female_ref_path.get()), target_sr=16000, mono=True)
-            mref_emb = embedder(mref_wav.to(device))
-            fref_emb = embedder(fref_wav.to(device))
+            emb_cache = get_embedding_cache(self.output_dir.get())
+            mref_emb = embedder.embed_file(emb_cache, self.male_ref_path.get())
+            fref_emb = embedder.embed_file(emb_cache, self.female_ref_path.get())
             
             # Aggregate by speaker
             from collections import defaultdict
@@ -344,13 +356,16 @@ class DracinGenderApp:
             for spk in by_spk:
                 by_spk[spk].sort(key=lambda x: (x["end"] - x["start"]), reverse=True)
             
+            picks = [(spk, s) for spk, lst in by_spk.items() for s in lst[: max(1, self.top_n.get())]]
+            pick_embs = embedder.embed_spans(emb_cache, self.audio_path.get(), wav,
+                                             [(s["start"], s["end"]) for _, s in picks])
+            embs_by = defaultdict(list)
+            for (spk, _), e in zip(picks, pick_embs):
+                embs_by[spk].append(e)
+
             speakers = {}
-            for spk, lst in by_spk.items():
-                picks = lst[: max(1, self.top_n.get())]
-                embs = []
-                for s in picks:
-                    ch = slice_wav(wav, 16000, s["start"], s["end"])
-                    embs.append(embedder(ch.to(device)))
+            for spk in by_spk:
+                embs = embs_by[spk]
                 spk_emb = embs[0] if len(embs) == 1 else np.mean(np.stack(embs, 0), 0)
                 
                 sm = cos_sim(spk_emb, mref_emb)
@@ -0,0 +1,91 @@
+# token_budget.py
+# ------------------------------------------------------------
+# Packing batch terjemahan berdasarkan estimasi token (bukan jumlah baris).
+# Baris subtitle panjangnya 2 karakter s/d satu paragraf: batch 20 baris bisa
+# melewati max_tokens (respons terpotong → baris kosong) atau justru sangat kecil.
+# - Estimasi token ala tokenizer DeepSeek: 1 karakter CJK ≈ 0.6 token, karakter lain ≈ 0.3 token
+# - Output per baris: terjemahan Indonesia ≈ 1.0 token per karakter CJK sumber
+#   (≈ 1.2x token untuk sumber non-CJK) + overhead format:
+#     "lines" (deepseek_mt, satu baris teks per baris)        → +2 token
+#     "json"  (core.translate, echo index/timestamp/original) → +30 token + token original_text
+# - TokenPacker.take(): ambil baris terdepan selama estimasi output <= budget
+#   (max_tokens x SAFETY) dan input (termasuk prev_tail konteks) <= INPUT_BUDGET;
+#   dibatasi juga oleh max_lines (batch size dari controller AIMD). Minimal 1 baris.
+# - stats(): efisiensi packing (rata-rata isi budget output per request)
+# Env: DRACINDUB_TOKEN_SAFETY (default 0.8), DRACINDUB_INPUT_BUDGET (default 6000)
+# ------------------------------------------------------------
+
+import os, re, threading
+from typing import Sequence, Tuple
+
+SAFETY = float(os.environ.get("DRACINDUB_TOKEN_SAFETY") or 0.8)
+INPUT_BUDGET = int(os.environ.get("DRACINDUB_INPUT_BUDGET") or 6000)
+DEFAULT_MAX_TOKENS = 4096   # default max_tokens deepseek-chat kalau request tidak mengisi
+
+_CJK = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+_FORMATS = {"lines": 2, "json": 30}
+
+
+def estimate_tokens(text: str) -> int:
+    text = text or ""
+    cjk = len(_CJK.findall(text))
+    return int(cjk * 0.6 + (len(text) - cjk) * 0.3) + 1
+
+
+def line_cost(text: str, fmt: str = "lines") -> Tuple[int, int]:
+    """(token input, token output) satu baris sumber."""
+    text = text or ""
+    cjk = len(_CJK.findall(text))
+    tin = estimate_tokens(text)
+    tout = int(cjk * 1.0 + (len(text) - cjk) * 0.36) + 1 + _FORMATS[fmt]
+    if fmt == "json":
+        tout += tin   # original_text ikut di-echo di results
+    return tin + _FORMATS[fmt], tout
+
+
+class TokenPacker:
+    def __init__(self, max_tokens: int = DEFAULT_MAX_TOKENS, fmt: str = "lines",
+                 input_budget: int = INPUT_BUDGET, safety: float = SAFETY):
+        self.fmt = fmt
+        self.budget = max(1, int(int(max_tokens) * safety))
+        self.input_budget = max(1, int(input_budget))
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._lines = 0
+        self._out = 0
+        self._full = 0      # request yang berhenti karena budget token (bukan max_lines / habis)
+
+    def take(self, texts: Sequence[str], max_lines: int, context: Sequence[str] = ()) -> int:
+        """Jumlah baris terdepan `texts` untuk satu request; context = teks prev_tail."""
+        tin = sum(line_cost(t, self.fmt)[0] for t in context)
+        tout = 0
+        n = 0
+        by_budget = False
+        for t in texts[:max(1, int(max_lines))]:
+            ci, co = line_cost(t, self.fmt)
+            if n and (tout + co > self.budget or tin + ci > self.input_budget):
+                by_budget = True
+                break
+            tin += ci
+            tout += co
+            n += 1
+        if n:
+            with self._lock:
+                self._requests += 1
+                self._lines += n
+                self._out += tout
+                self._full += by_budget
+        return n
+
+    def stats(self) -> dict:
+        with self._lock:
+            r = max(1, self._requests)
+            return {
+                "requests": self._requests,
+                "lines": self._lines,
+                "avg_lines": round(self._lines / r, 2),
+                "budget_tokens": self.budget,
+                "avg_output_tokens": round(self._out / r, 1),
+                "fill": round(self._out / (r * self.budget), 3),   # efisiensi packing
+                "budget_bound": self._full,
+            }
@@ -0,0 +1,245 @@
+# translate_control.py
+# ------------------------------------------------------------
+# Controller adaptif (AIMD) untuk request terjemahan DeepSeek, dipakai bersama oleh
+# deepseek_mt.translate_lines_realtime dan backend core.translate (_translate_items_with_deepseek).
+# - Concurrency: naik aditif (+1/concurrency per respons sukses ≈ +1 per "putaran"),
+#   turun multiplikatif (x0.5) saat 429 / timeout. Maksimal satu kali turun per cooldown
+#   (≈ latency rata-rata) supaya satu ledakan 429 dari request paralel tidak memotong berkali-kali
+# - Batch size: turun x0.5 kalau jumlah baris respons tidak sama dengan input,
+#   naik +1 per respons yang jumlah barisnya pas
+# - Satu controller per proses (sinyal 429 / latency dari endpoint DeepSeek yang sama);
+#   tiap job memakai view job(batch, workers) dengan batas sendiri:
+#   concurrency job = min(workers, concurrency bersama), batch job = min(batch, batch bersama)
+#   → knob job adalah batas atas sungguhan, job lain tidak bisa menimpanya
+#   (batas atas concurrency bersama: DRACINDUB_TRANSLATE_MAX_WORKERS, default 8)
+# - State dipertahankan selama proses hidup (hasil tuning tidak hilang antar job)
+# - Slot async (aslot) dibangunkan lewat loop.call_soon_threadsafe saat slot dilepas, tanpa polling
+# - State live: snapshot() → endpoint GET /api/translate/controller
+# ------------------------------------------------------------
+
+import asyncio, os, threading, time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+MAX_WORKERS = max(1, int(os.environ.get("DRACINDUB_TRANSLATE_MAX_WORKERS") or 8))
+MIN_BATCH = 2
+DECREASE = 0.5
+
+
+def is_timeout(exc: BaseException) -> bool:
+    """Timeout httpx / requests / asyncio."""
+    return isinstance(exc, (TimeoutError, asyncio.TimeoutError)) or "timeout" in type(exc).__name__.lower()
+
+
+class JobLimits:
+    """View controller untuk satu job: knob batch/workers job ini = batas atas sungguhan."""
+
+    def __init__(self, ctl: "AIMDController", batch: int, workers: int):
+        self._ctl = ctl
+        self.max_batch = max(1, int(batch))
+        self.max_workers = min(max(1, int(workers)), ctl.max_workers)
+        self.in_flight = 0
+
+    def batch_size(self) -> int:
+        return min(self.max_batch, self._ctl.batch_size())
+
+    def limit(self) -> int:
+        return min(self.max_workers, self._ctl.limit())
+
+    def try_acquire(self) -> bool:
+        return self._ctl.try_acquire(self)
+
+    def release(self):
+        self._ctl.release(self)
+
+    @contextmanager
+    def slot(self):
+        self._ctl.acquire(self)
+        try:
+            yield self
+        finally:
+            self._ctl.release(self)
+
+    @asynccontextmanager
+    async def aslot(self):
+        await self._ctl.aacquire(self)
+        try:
+            yield self
+        finally:
+            self._ctl.release(self)
+
+    def snapshot(self) -> dict:
+        snap = self._ctl.snapshot()
+        snap["job"] = {"max_workers": self.max_workers, "max_batch": self.max_batch,
+                       "limit": self.limit(), "batch_size": self.batch_size(), "in_flight": self.in_flight}
+        return snap
+
+
+class AIMDController:
+    def __init__(self, batch: int = 20, workers: int = 1, max_workers: int = MAX_WORKERS):
+        self._cv = threading.Condition()
+        self._waiters = []                      # (loop, future) milik aslot yang menunggu slot
+        self.max_workers = max(1, int(max_workers))
+        self.max_batch = max(1, int(batch))
+        self.concurrency = float(min(max(1, int(workers)), self.max_workers))
+        self.batch = float(self.max_batch)
+        self.in_flight = 0
+        self.latency: Optional[float] = None   # EWMA detik per request sukses
+        self._last_cut = 0.0
+        self._tuned = False                     # sudah pernah menyesuaikan diri dari sinyal API
+        self.counts = {"ok": 0, "rate_limited": 0, "timeout": 0, "mismatch": 0, "error": 0}
+        self.events = deque(maxlen=50)          # (ts, event, concurrency, batch)
+
+    # ---------- knob ----------
+    def job(self, batch: int, workers: int) -> JobLimits:
+        """
+        Batas per job. Sebelum ada sinyal dari API, knob job jadi titik awal state bersama;
+        setelah tuning, state bersama tidak disentuh (batch bersama hanya bisa naik sampai
+        knob batch terbesar yang pernah dipakai).
+        """
+        lim = JobLimits(self, batch, workers)
+        with self._cv:
+            if not self._tuned:
+                self.concurrency = max(self.concurrency, float(lim.max_workers))
+                self.batch = max(self.batch, float(lim.max_batch))
+            self.max_batch = max(self.max_batch, lim.max_batch)
+            self._wake()
+        return lim
+
+    @property
+    def min_batch(self) -> int:
+        return min(MIN_BATCH, self.max_batch)
+
+    def batch_size(self) -> int:
+        with self._cv:
+            return max(self.min_batch, int(self.batch))
+
+    def limit(self) -> int:
+        with self._cv:
+            return max(1, int(self.concurrency))
+
+    # ---------- slot concurrency ----------
+    def _free(self, lim: Optional[JobLimits]) -> bool:
+        if self.in_flight >= max(1, int(self.concurrency)):
+            return False
+        return lim is None or lim.in_flight < lim.max_workers
+
+    def _take(self, lim: Optional[JobLimits]):
+        self.in_flight += 1
+        if lim is not None:
+            lim.in_flight += 1
+
+    def _wake(self):
+        # dipanggil dengan _cv dipegang: bangunkan thread (slot) dan coroutine (aslot)
+        self._cv.notify_all()
+        waiters, self._waiters = self._waiters, []
+        for loop, fut in waiters:
+            loop.call_soon_threadsafe(lambda f=fut: f.done() or f.set_result(None))
+
+    def try_acquire(self, lim: Optional[JobLimits] = None) -> bool:
+        with self._cv:
+            if self._free(lim):
+                self._take(lim)
+                return True
+            return False
+
+    def acquire(self, lim: Optional[JobLimits] = None):
+        with self._cv:
+            while not self._free(lim):
+                self._cv.wait()
+            self._take(lim)
+
+    async def aacquire(self, lim: Optional[JobLimits] = None):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cv:
+                if self._free(lim):
+                    self._take(lim)
+                    return
+                fut = loop.create_future()
+                self._waiters.append((loop, fut))
+            await fut
+
+    def release(self, lim: Optional[JobLimits] = None):
+        with self._cv:
+            self.in_flight = max(0, self.in_flight - 1)
+            if lim is not None:
+                lim.in_flight = max(0, lim.in_flight - 1)
+            self._wake()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield self
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        await self.aacquire()
+        try:
+            yield self
+        finally:
+            self.release()
+
+    # ---------- sinyal dari API ----------
+    def _event(self, name: str):
+        self.events.append((round(time.time(), 3), name, round(self.concurrency, 2), int(self.batch)))
+
+    def on_response(self, latency: float, expected: int, got: int):
+        """Respons HTTP 200 yang berhasil di-parse; expected/got = jumlah baris input/output."""
+        with self._cv:
+            self.counts["ok"] += 1
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            self.concurrency = min(float(self.max_workers), self.concurrency + 1.0 / self.concurrency)
+            if got != expected:
+                self.counts["mismatch"] += 1
+                self.batch = max(float(self.min_batch), self.batch * DECREASE)
+                self._tuned = True
+                self._event(f"mismatch {got}/{expected}")
+            else:
+                self.batch = min(float(self.max_batch), self.batch + 1)
+            self._wake()
+
+    def on_overload(self, kind: str):
+        """kind: 'rate_limited' (HTTP 429) atau 'timeout'."""
+        with self._cv:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+            now = time.monotonic()
+            if now - self._last_cut >= max(1.0, self.latency or 1.0):
+                self._last_cut = now
+                self.concurrency = max(1.0, self.concurrency * DECREASE)
+                self._tuned = True
+                self._event(kind)
+
+    def on_error(self):
+        with self._cv:
+            self.counts["error"] += 1
+
+    def snapshot(self) -> dict:
+        with self._cv:
+            return {
+                "concurrency": round(self.concurrency, 2),
+                "limit": max(1, int(self.concurrency)),
+                "in_flight": self.in_flight,
+                "max_workers": self.max_workers,
+                "batch_size": max(self.min_batch, int(self.batch)),
+                "max_batch": self.max_batch,
+                "latency_s": round(self.latency, 3) if self.latency is not None else None,
+                "counts": dict(self.counts),
+                "events": list(self.events),
+            }
+
+
+_controller: Optional[AIMDController] = None
+_controller_lock = threading.Lock()
+
+def get_translate_controller() -> AIMDController:
+    """Satu controller per proses (endpoint DeepSeek yang sama); batas per job lewat .job(batch, workers)."""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AIMDController(MIN_BATCH, 1)
+        return _controller
@@ -0,0 +1,78 @@
+# translate_dedup.py
+# ------------------------------------------------------------
+# Dedup baris sumber per episode sebelum terjemahan DeepSeek (deepseek_mt & backend core.translate).
+# Subtitle drama Tiongkok mengulang baris pendek terus-menerus ("是", "走吧", "陛下", efek suara);
+# tiap string unik cukup dikirim SEKALI, hasilnya disebar ke semua index yang sama.
+# - Key: _normalize_for_compare(_preprocess_chinese_text(teks)) → sama dengan teks yang
+#   benar-benar dikirim ke API (tag/kurung/koma/spasi dibuang)
+# - Representative = kemunculan pertama yang belum diterjemahkan (konteks batch/repair-nya yang dipakai)
+# - Index yang key-nya sudah punya terjemahan (cache / TM / isi editor) langsung diisi tanpa API
+# - Baris dengan key kosong (mis. hanya "(笑)") tidak digabung
+# - stats(): lines / unique / reused / saved (baris API yang dihemat)
+# ------------------------------------------------------------
+
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+
+def dedup_key(text: str) -> str:
+    # import lokal: deepseek_mt sendiri meng-import modul ini
+    from deepseek_mt import _normalize_for_compare, _preprocess_chinese_text
+    return _normalize_for_compare(_preprocess_chinese_text(text or ""))
+
+
+class DedupPlan:
+    """
+    texts: teks sumber per index; todo: index yang perlu diterjemahkan (urut);
+    known: {index: terjemahan} yang sudah ada — dipakai ulang untuk index todo dengan key sama.
+    """
+
+    def __init__(self, texts: Sequence[str], todo: Iterable[int],
+                 known: Optional[Mapping[int, str]] = None):
+        keys: Dict[int, str] = {}
+
+        def key(k: int) -> str:
+            if k not in keys:
+                keys[k] = dedup_key(texts[k])
+            return keys[k]
+
+        known_by_key: Dict[str, str] = {}
+        for k, t in (known or {}).items():
+            if t and t.strip() and key(k):
+                known_by_key.setdefault(key(k), t)
+
+        self.todo = list(todo)
+        self.reps: List[int] = []
+        self.dups: Dict[int, List[int]] = {}
+        self.reused: List[Tuple[int, str]] = []
+        rep_of: Dict[str, int] = {}
+        for k in self.todo:
+            kk = key(k)
+            if kk and kk in known_by_key:
+                self.reused.append((k, known_by_key[kk]))
+            elif kk and kk in rep_of:
+                self.dups[rep_of[kk]].append(k)
+            else:
+                if kk:
+                    rep_of[kk] = k
+                    self.dups[k] = []
+                self.reps.append(k)
+
+    @property
+    def saved(self) -> int:
+        return len(self.todo) - len(self.reps)
+
+    def expand(self, pairs: Iterable[Tuple[int, str]]) -> List[Tuple[int, str]]:
+        """[(rep, terjemahan)] → ditambah (duplikat, terjemahan) untuk tiap duplikat rep."""
+        out = []
+        for k, t in pairs:
+            out.append((k, t))
+            out.extend((d, t) for d in self.dups.get(k, ()))
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "lines": len(self.todo),
+            "unique": len(self.reps),
+            "reused": len(self.reused),
+            "saved": self.saved,   # baris yang tidak dikirim ke API
+        }
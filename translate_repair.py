@@ -0,0 +1,47 @@
+# translate_repair.py
+# ------------------------------------------------------------
+# Tahap repair per baris untuk terjemahan DeepSeek (deepseek_mt & backend core.translate).
+# Baris yang gagal (respons kurang baris, kosong, masih berisi CJK) dikumpulkan dari SEMUA
+# batch setelah pass utama, lalu dikirim ulang sendiri-sendiri dalam batch kecil bersama
+# baris tetangganya sebagai konteks — baris yang sudah bagus tidak dibayar ulang.
+# - REPAIR_BATCH baris gagal per request (index berdekatan dikelompokkan)
+# - CONTEXT baris tetangga di kiri & kanan (sumber + terjemahan yang sudah ada)
+# - REPAIR_ROUNDS putaran; baris yang tetap gagal dibiarkan kosong
+# ------------------------------------------------------------
+
+import re
+from typing import Callable, List, Sequence, Tuple
+
+REPAIR_BATCH = 4
+REPAIR_ROUNDS = 2
+CONTEXT = 2
+
+_CJK = re.compile(r"[\u4e00-\u9fff]")
+
+
+def is_failed(src: str, tr: str, check_cjk: bool = True) -> bool:
+    """Terjemahan kosong / masih mengandung karakter Chinese (check_cjk=False untuk target zh/ja)."""
+    tr = (tr or "").strip()
+    return not tr or (check_cjk and bool(_CJK.search(tr)))
+
+
+def repair_groups(failed: Sequence[int], size: int = REPAIR_BATCH, gap: int = CONTEXT) -> List[List[int]]:
+    """Index gagal (urut) → grup <= size; index yang berjarak <= gap masuk grup yang sama
+    (konteks tetangganya tumpang tindih), selain itu grup baru."""
+    out: List[List[int]] = []
+    for k in sorted(set(failed)):
+        if out and len(out[-1]) < size and k - out[-1][-1] <= gap:
+            out[-1].append(k)
+        else:
+            out.append([k])
+    return out
+
+
+def neighbours(group: Sequence[int], n: int, get: Callable[[int], Tuple[str, str]],
+               width: int = CONTEXT) -> Tuple[list, list]:
+    """Konteks (before, after): baris tetangga di luar grup, get(k) → (sumber, terjemahan)."""
+    inside = set(group)
+    lo, hi = group[0], group[-1]
+    before = [get(k) for k in range(max(0, lo - width), lo) if k not in inside]
+    after = [get(k) for k in range(hi + 1, min(n, hi + 1 + width)) if k not in inside]
+    return before, after
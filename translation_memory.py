@@ -0,0 +1,160 @@
+# translation_memory.py
+# ------------------------------------------------------------
+# Translation memory (SQLite, WAL) dipakai lintas episode & session.
+# Key = (sumber ter-normalisasi, style/mode, target_lang, model, prompt version)
+# - Lookup massal per batch (IN (...)), store massal setelah API sukses
+# - WAL + busy_timeout → aman dibaca banyak worker/proses sekaligus
+# - Koneksi per thread (sqlite3 tidak boleh dibagi antar thread)
+# Env:
+#   DRACINDUB_TM_DB   path file sqlite (default ~/.cache/dracindub/translation_memory.sqlite3)
+#   DRACINDUB_TM=off  nonaktifkan
+# ------------------------------------------------------------
+
+import os, re, time, sqlite3, hashlib, threading, unicodedata
+from pathlib import Path
+from typing import List, Optional, Tuple, Iterable
+
+DEFAULT_TM_DB = Path.home() / ".cache" / "dracindub" / "translation_memory.sqlite3"
+_IN_CHUNK = 500  # batas parameter per query IN (...)
+
+
+def normalize_source(text: str) -> str:
+    """Normalisasi teks sumber untuk key TM (NFKC, spasi dirapikan)."""
+    s = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def prompt_fingerprint(*parts) -> str:
+    """Hash pendek isi prompt → otomatis versi baru kalau prompt/glosarium berubah."""
+    h = hashlib.sha1("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return h[:12]
+
+
+class TranslationMemory:
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            c.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = c
+        return c
+
+    def _init_schema(self):
+        self._conn().execute(
+            """CREATE TABLE IF NOT EXISTS tm (
+                   src TEXT NOT NULL,
+                   style TEXT NOT NULL,
+                   lang TEXT NOT NULL,
+                   model TEXT NOT NULL,
+                   prompt_ver TEXT NOT NULL,
+                   translation TEXT NOT NULL,
+                   hits INTEGER NOT NULL DEFAULT 0,
+                   created_at REAL NOT NULL,
+                   updated_at REAL NOT NULL,
+                   PRIMARY KEY (src, style, lang, model, prompt_ver)
+               ) WITHOUT ROWID"""
+        )
+
+    # ---------- API ----------
+    def lookup_many(self, sources: List[str], *, style: str, target_lang: str,
+                    model: str, prompt_version: str) -> List[Optional[str]]:
+        """Return list sejajar `sources`: terjemahan bila hit, None bila miss."""
+        keys = [normalize_source(s) for s in sources]
+        uniq = sorted({k for k in keys if k})
+        found = {}
+        if uniq:
+            c = self._conn()
+            for a in range(0, len(uniq), _IN_CHUNK):
+                part = uniq[a:a + _IN_CHUNK]
+                q = ("SELECT src, translation FROM tm WHERE style=? AND lang=? AND model=? AND prompt_ver=? "
+                     f"AND src IN ({','.join('?' * len(part))})")
+                for src, tr in c.execute(q, (style, target_lang, model, prompt_version, *part)):
+                    found[src] = tr
+            if found:
+                try:
+                    c.executemany(
+                        "UPDATE tm SET hits=hits+1 WHERE src=? AND style=? AND lang=? AND model=? AND prompt_ver=?",
+                        [(k, style, target_lang, model, prompt_version) for k in found]
+                    )
+                except sqlite3.OperationalError:
+                    pass  # counter hit tidak penting; jangan gagalkan lookup saat DB sibuk
+        out = [found.get(k) if k else None for k in keys]
+        with self._lock:
+            n_hit = sum(1 for t in out if t is not None)
+            self.hits += n_hit
+            self.misses += len(out) - n_hit
+        return out
+
+    def store_many(self, pairs: Iterable[Tuple[str, str]], *, style: str, target_lang: str,
+                   model: str, prompt_version: str):
+        """Simpan (sumber, terjemahan) yang valid. Terjemahan kosong diabaikan."""
+        now = time.time()
+        rows = []
+        for src, tr in pairs:
+            k = normalize_source(src); tr = (tr or "").strip()
+            if k and tr:
+                rows.append((k, style, target_lang, model, prompt_version, tr, now, now))
+        if not rows:
+            return
+        c = self._conn()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            c.executemany(
+                """INSERT INTO tm (src, style, lang, model, prompt_ver, translation, hits, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)
+                   ON CONFLICT(src, style, lang, model, prompt_ver)
+                   DO UPDATE SET translation=excluded.translation, updated_at=excluded.updated_at""",
+                rows
+            )
+            c.execute("COMMIT")
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self.stores += len(rows)
+
+    def stats(self) -> dict:
+        try:
+            entries = self._conn().execute("SELECT COUNT(*) FROM tm").fetchone()[0]
+        except sqlite3.Error:
+            entries = -1
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "db": str(self.db_path),
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+_tm = None
+_tm_lock = threading.Lock()
+
+def get_translation_memory() -> Optional[TranslationMemory]:
+    """Singleton per proses; None kalau dinonaktifkan atau DB tidak bisa dibuka."""
+    global _tm
+    if (os.getenv("DRACINDUB_TM") or "").lower() in ("0", "off", "false", "no"):
+        return None
+    with _tm_lock:
+        if _tm is None:
+            try:
+                _tm = TranslationMemory(Path(os.getenv("DRACINDUB_TM_DB") or DEFAULT_TM_DB))
+            except Exception as e:
+                print(f"⚠️ Translation memory nonaktif: {e}")
+                return None
+        return _tm
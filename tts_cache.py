@@ -0,0 +1,158 @@
+# tts_cache.py
+# ------------------------------------------------------------
+# Cache global audio TTS mentah (content-addressed), dipakai lintas
+# session/workdir/rerun. Key = sha256(engine, voice, setting, teks).
+# - File disimpan sebagai <root>/<kk>/<key>.wav (wav 48k stereo hasil mp3_to_wav)
+# - Eviction LRU berbasis mtime (di-touch tiap hit), batas ukuran total
+# - Statistik hit/miss per proses
+# Env:
+#   DRACINDUB_TTS_CACHE     folder cache (default ~/.cache/dracindub/tts)
+#   DRACINDUB_TTS_CACHE_MB  batas ukuran MB (default 2048, 0 = nonaktif)
+# ------------------------------------------------------------
+
+import os, json, shutil, hashlib, threading
+from pathlib import Path
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "dracindub" / "tts"
+DEFAULT_CACHE_MB = 2048
+
+
+def tts_key(engine: str, voice: str, text: str, **settings) -> str:
+    """Hash stabil untuk (engine, voice, setting model/prosodi, teks tersanitasi)."""
+    payload = {
+        "engine": engine,
+        "voice": voice or "",
+        "text": " ".join((text or "").split()),
+        "settings": {k: settings[k] for k in sorted(settings)},
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.enabled = self.max_bytes > 0
+        self._lock = threading.Lock()
+        self._index = None   # OrderedDict key -> size (urutan LRU: paling lama di depan)
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    # ---------- internal ----------
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.wav"
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        items = []
+        if self.root.exists():
+            for p in self.root.glob("*/*.wav"):
+                try:
+                    st = p.stat()
+                    items.append((st.st_mtime, p.stem, st.st_size))
+                except OSError:
+                    pass
+        items.sort()
+        self._index = OrderedDict((k, sz) for _, k, sz in items)
+        self._total = sum(sz for _, _, sz in items)
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._index:
+            key, sz = self._index.popitem(last=False)
+            self._total -= sz
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+            self.evictions += 1
+
+    # ---------- API ----------
+    def get(self, key: str, dst: Path) -> bool:
+        """Copy audio cache ke dst kalau ada. Return True bila hit."""
+        if not self.enabled:
+            return False
+        src = self._path(key)
+        with self._lock:
+            self._load_index()
+            if not src.exists():
+                self._index.pop(key, None)
+                self.misses += 1
+                return False
+            try:
+                shutil.copyfile(src, dst)
+                os.utime(src, None)
+            except OSError:
+                self.misses += 1
+                return False
+            if key in self._index:
+                self._index.move_to_end(key)
+            else:
+                sz = src.stat().st_size
+                self._index[key] = sz
+                self._total += sz
+            self.hits += 1
+            return True
+
+    def put(self, key: str, src: Path):
+        """Simpan audio hasil synth ke cache (atomic), lalu jaga batas ukuran."""
+        if not self.enabled:
+            return
+        try:
+            src = Path(src)
+            if not src.exists() or src.stat().st_size == 0:
+                return
+            dst = self._path(key)
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dst.with_name(f"{dst.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+        except OSError as e:
+            print(f"⚠️ TTS cache put gagal: {e}")
+            return
+        with self._lock:
+            self._load_index()
+            sz = dst.stat().st_size
+            self._total += sz - self._index.pop(key, 0)
+            self._index[key] = sz
+            self.stores += 1
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._load_index()
+            total = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "dir": str(self.root),
+                "entries": len(self._index),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_tts_cache() -> TTSCache:
+    """Singleton per proses (dibagi CLI, web backend, GUI)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            root = Path(os.getenv("DRACINDUB_TTS_CACHE") or DEFAULT_CACHE_DIR)
+            try:
+                mb = float(os.getenv("DRACINDUB_TTS_CACHE_MB", DEFAULT_CACHE_MB))
+            except ValueError:
+                mb = DEFAULT_CACHE_MB
+            _cache = TTSCache(root, int(mb * 1024 * 1024))
+        return _cache
@@ -0,0 +1,369 @@
+# voiceprints.py
+# ------------------------------------------------------------
+# Voiceprint speaker = centroid embedding ECAPA per speaker.
+# - speaker_centroids(): sampel segmen terpanjang per speaker → embedding (lewat cache
+#   <workdir>/embeddings.sqlite) → centroid ternormalisasi. Dipakai global link per episode
+#   (backend core.speaker_link) dan index season (gui_dub, tab Editing)
+# - SeasonIndex: index voiceprint lintas episode, file <season>/season_voiceprints.{json,npz}
+#   * tiap episode menyimpan centroid speaker lokalnya (member) + voiceprint season-nya
+#   * voiceprint = rata-rata member berbobot durasi; gender per voiceprint
+#     (gender hasil edit manual dikunci, selain itu mayoritas berbobot dari member)
+#   * episode baru: satu matmul [speaker lokal x voiceprint] → nearest neighbour exact;
+#     cos >= threshold → voiceprint lama, selain itu voiceprint baru (nomor V kosong terkecil)
+#   * audio / centroid speaker episode berubah (fingerprint: speaker + centroid + bobot, mis. setelah
+#     diarization ulang) → member lama episode itu dibuang, lalu di-match ulang
+#   * voiceprint yang tidak punya member lagi dibuang (tidak ikut stats / matching)
+# ------------------------------------------------------------
+
+import hashlib, io, json, os, threading, time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ecapa_batch import EMB_DIM, embed_batch
+from embedding_cache import audio_hash, get_embedding_cache, span_ms
+from model_registry import ECAPA_REPO
+
+ECAPA_MODEL_ID = f"{ECAPA_REPO}|pad=right:16000"
+INDEX_NAME = "season_voiceprints"
+MATCH_THRESHOLD = 0.75   # cos centroid lintas episode (lebih longgar dari link dalam episode 0.86)
+GENDERS = ("Male", "Female", "Unknown")
+
+
+# ---------- embedding & centroid per episode ----------
+def extract_embeddings_ecapa(wav16k_path, time_spans, device='auto'):
+    """Embedding ternormalisasi per span; lewat cache <workdir>/embeddings.sqlite
+    (model & audio hanya dimuat kalau ada span yang belum pernah dihitung)."""
+    time_spans = list(time_spans)
+    if not time_spans:
+        return np.zeros((0, EMB_DIM), np.float32)
+
+    def compute(idx):
+        import torch, torchaudio
+        from model_registry import get_ecapa
+        dev = ('cuda' if torch.cuda.is_available() else 'cpu') if device == 'auto' else device
+        classifier = get_ecapa(dev)   # sekali per proses (cache offline models_cache/)
+
+        wav, sr = torchaudio.load(str(wav16k_path))
+        if sr != 16000:
+            wav = torchaudio.functional.resample(wav, sr, 16000)
+            sr = 16000
+        wav = wav.mean(dim=0) if wav.shape[0] > 1 else wav[0]
+
+        chunks = []
+        for start, end in (time_spans[i] for i in idx):
+            s = max(0, int(start * sr)); e = min(wav.shape[0], int(end * sr))
+            chunks.append(wav[s:max(s, e)])
+        # segmen < 1 detik dipad kanan ke 1 detik (sama dengan loop lama), lalu mini-batch
+        return embed_batch(classifier, chunks, dev, min_samples=sr, pad_mode="right")
+
+    wav_path = Path(wav16k_path)
+    cache = get_embedding_cache(wav_path.parent)
+    embs = cache.get_or_compute(audio_hash(wav_path), ECAPA_MODEL_ID,
+                                [span_ms(a, b) for a, b in time_spans], compute)
+    return embs / (np.linalg.norm(embs, axis=1, keepdims=True) + 1e-8)
+
+def parse_time(t):
+    if isinstance(t, (int, float)): return float(t)
+    if isinstance(t, str):
+        t = t.strip()
+        if not t: return 0.0
+        p = t.replace(',', '.').split(':')
+        try:
+            if len(p) == 3: return int(p[0])*3600 + int(p[1])*60 + float(p[2])
+            if len(p) == 2: return int(p[0])*60 + float(p[1])
+            return float(p[0])
+        except Exception: return 0.0
+    return 0.0
+
+def safe_speaker_key(seg):
+    for k in ('speaker','spk','spkid','spk_id','label'):
+        if k in seg: return k
+    return None
+
+def gather_samples(segments, samples_per_spk=8, min_dur=1.0):
+    by = {}
+    for s in segments:
+        k = safe_speaker_key(s)
+        if not k: continue
+        sp = s[k]
+        st = parse_time(s.get('start', 0)); en = parse_time(s.get('end', st))
+        if en - st < min_dur: continue
+        by.setdefault(sp, []).append((st, en, en-st))
+    for sp, lst in by.items():
+        lst.sort(key=lambda x: x[2], reverse=True)
+        by[sp] = [(a,b) for a,b,_ in lst[:samples_per_spk]]
+    return by
+
+def speaker_centroids(segments, wav16k_path, samples_per_spk=8, min_dur=1.0,
+                      device='auto') -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """(speaker urut total durasi sampel turun, centroid [n, D] (baris NaN = tanpa embedding), durasi [n]).
+    Satu load audio + satu batch untuk sampel semua speaker."""
+    samples = gather_samples(segments, samples_per_spk=samples_per_spk, min_dur=min_dur)
+    local_spks = list(samples.keys())
+    if not local_spks:
+        return [], np.zeros((0, EMB_DIM)), np.zeros(0)
+
+    spans = [sp_span for sp in local_spks for sp_span in samples[sp]]
+    all_e = extract_embeddings_ecapa(wav16k_path, spans, device=device)
+    centroids, k = {}, 0
+    for sp in local_spks:
+        e = all_e[k:k + len(samples[sp])]; k += len(samples[sp])
+        if e.shape[0] == 0: continue
+        c = e.mean(axis=0); c = c / (np.linalg.norm(c) + 1e-8)
+        centroids[sp] = c
+
+    dur_by = {sp: sum(b-a for a,b in samples[sp]) for sp in local_spks}   # bobot: total durasi sampel
+    order = sorted(local_spks, key=lambda x: dur_by.get(x, 0), reverse=True)
+    cents = np.full((len(order), all_e.shape[1] if all_e.size else EMB_DIM), np.nan)
+    for r, sp in enumerate(order):
+        if sp in centroids:
+            cents[r] = centroids[sp]
+    return order, cents, np.array([float(dur_by.get(sp, 0.0)) for sp in order])
+
+
+# ---------- index season ----------
+def _norm_gender(g) -> str:
+    g = str(g or "").strip().capitalize()
+    return g if g in GENDERS else "Unknown"
+
+
+def _fingerprint(speakers: Sequence[str], cents: np.ndarray, weights: Sequence[float]) -> str:
+    """Hash input episode (speaker lokal + centroid + bobot); berubah kalau diarization/segmen berubah."""
+    h = hashlib.sha1("\x1f".join(map(str, speakers)).encode("utf-8"))
+    h.update(np.round(np.nan_to_num(np.asarray(cents, float)), 4).astype(np.float32).tobytes())
+    h.update(np.round(np.asarray(weights, float), 3).tobytes())
+    return h.hexdigest()[:16]
+
+
+class SeasonIndex:
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self.json_path = self.folder / f"{INDEX_NAME}.json"
+        self.npz_path = self.folder / f"{INDEX_NAME}.npz"
+        self.lock = threading.RLock()
+        self.voices: List[dict] = []            # {"id", "gender", "locked"}
+        self.episodes: Dict[str, dict] = {}     # key → {"audio", "fp", "speakers": {lokal: {"voice", "sim"}}}
+        self.members: List[dict] = []           # {"episode", "speaker", "voice", "w", "gender"} (baris M)
+        self.M = np.zeros((0, EMB_DIM), np.float32)   # centroid member
+        self.V = np.zeros((0, EMB_DIM), np.float32)   # voiceprint ternormalisasi
+        self._load()
+
+    # ----- persistence -----
+    def _load(self):
+        if not (self.json_path.exists() and self.npz_path.exists()):
+            return
+        try:
+            meta = json.loads(self.json_path.read_text(encoding="utf-8"))
+            with np.load(self.npz_path) as z:
+                M = z["members"].astype(np.float32)
+            if len(M) != len(meta.get("members", [])):
+                raise ValueError("jumlah member json/npz tidak sama")
+        except Exception as e:
+            print(f"⚠️ Season index {self.json_path.name} diabaikan: {e}")
+            return
+        self.voices = meta.get("voices", [])
+        self.episodes = meta.get("episodes", {})
+        self.members = meta.get("members", [])
+        self.M = M.reshape(len(M), -1) if len(M) else np.zeros((0, EMB_DIM), np.float32)
+        self._prune()
+        self._rebuild()
+
+    def save(self):
+        with self.lock:
+            buf = io.BytesIO()
+            np.savez(buf, members=self.M.astype(np.float32))
+            meta = {"updated_at": int(time.time()), "voices": self.voices,
+                    "episodes": self.episodes, "members": self.members}
+            # npz dulu, json terakhir (json yang menentukan isi index)
+            for path, data in ((self.npz_path, buf.getvalue()),
+                               (self.json_path, json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8"))):
+                tmp = path.with_name(path.name + ".tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, path)
+
+    # ----- voiceprint -----
+    def _rebuild(self):
+        """V & gender voiceprint dari member (dipanggil setiap member berubah)."""
+        n = len(self.voices)
+        D = self.M.shape[1] if self.M.size else EMB_DIM
+        acc = np.zeros((n, D))
+        votes = np.zeros((n, 2))   # bobot durasi Male / Female
+        if self.members:
+            vi = np.array([m["voice"] for m in self.members], int)
+            w = np.array([m["w"] for m in self.members], float) + 1e-8
+            np.add.at(acc, vi, self.M * w[:, None])
+            for m, wm in zip(self.members, w):
+                g = _norm_gender(m.get("gender"))
+                if g != "Unknown":
+                    votes[m["voice"], GENDERS.index(g)] += wm
+        self.V = (acc / (np.linalg.norm(acc, axis=1, keepdims=True) + 1e-8)).astype(np.float32)
+        for v, rec in enumerate(self.voices):
+            if not rec.get("locked"):
+                rec["gender"] = GENDERS[int(np.argmax(votes[v]))] if votes[v].any() else "Unknown"
+
+    def _prune(self):
+        """Buang voiceprint tanpa member; index voice di member & episode dipetakan ulang."""
+        used = sorted({m["voice"] for m in self.members})
+        if len(used) == len(self.voices):
+            return
+        remap = {old: new for new, old in enumerate(used)}
+        self.voices = [self.voices[i] for i in used]
+        for m in self.members:
+            m["voice"] = remap[m["voice"]]
+        for ep in self.episodes.values():
+            for a in ep.get("speakers", {}).values():
+                a["voice"] = remap[a["voice"]]
+
+    def _new_voice_id(self) -> str:
+        taken = {rec["id"] for rec in self.voices}
+        n = 1
+        while f"V{n:02d}" in taken:
+            n += 1
+        return f"V{n:02d}"
+
+    def _voice_index(self, voice_id: str) -> int:
+        for i, rec in enumerate(self.voices):
+            if rec["id"] == voice_id:
+                return i
+        raise KeyError(voice_id)
+
+    def match(self, cents: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest voiceprint per centroid: (index voiceprint [n] (-1 = tidak ada), cos [n])."""
+        cents = np.asarray(cents, float)
+        n = len(cents)
+        if n == 0 or not len(self.voices):
+            return np.full(n, -1), np.full(n, -np.inf)
+        ok = np.isfinite(cents).all(axis=1)
+        S = np.nan_to_num(cents) @ self.V.T       # keduanya ternormalisasi → cosine
+        best = S.argmax(axis=1)
+        sim = S[np.arange(n), best]
+        best[~ok] = -1
+        sim[~ok] = -np.inf
+        return best, sim
+
+    def set_gender(self, voice_id: str, gender: str):
+        """Gender manual → dikunci (tidak lagi ikut mayoritas member)."""
+        with self.lock:
+            rec = self.voices[self._voice_index(voice_id)]
+            rec["gender"] = _norm_gender(gender)
+            rec["locked"] = rec["gender"] != "Unknown"
+            if not rec["locked"]:
+                self._rebuild()
+            self.save()
+
+    # ----- episode -----
+    def episode_key(self, workdir) -> str:
+        work = Path(workdir).resolve()
+        try:
+            return work.relative_to(self.folder.resolve()).as_posix() or "."
+        except ValueError:
+            return str(work)
+
+    def episode_labels(self, key: str) -> Dict[str, dict]:
+        """{speaker lokal: {"id", "gender", "sim"}} untuk episode yang sudah di-index."""
+        with self.lock:
+            ep = self.episodes.get(key) or {}
+            out = {}
+            for sp, m in ep.get("speakers", {}).items():
+                rec = self.voices[m["voice"]]
+                out[sp] = {"id": rec["id"], "gender": rec.get("gender", "Unknown"), "sim": m.get("sim")}
+            return out
+
+    def _drop_episode(self, key: str):
+        keep = [i for i, m in enumerate(self.members) if m["episode"] != key]
+        if len(keep) != len(self.members):
+            self.members = [self.members[i] for i in keep]
+            self.M = self.M[keep]
+        self.episodes.pop(key, None)
+
+    def assign_episode(self, key: str, audio: str, speakers: Sequence[str], cents: np.ndarray,
+                       weights: Sequence[float], genders: Optional[Dict[str, str]] = None,
+                       threshold: float = MATCH_THRESHOLD) -> Dict[str, dict]:
+        """Match speaker lokal episode ke voiceprint season (buat baru kalau tidak ada yang cukup mirip)."""
+        genders = genders or {}
+        fp = _fingerprint(speakers, cents, weights)
+        with self.lock:
+            ep = self.episodes.get(key)
+            if ep and ep.get("audio") == audio and ep.get("fp") == fp:
+                return self.episode_labels(key)
+            self._drop_episode(key)
+            self._prune()
+            self._rebuild()
+
+            best, sim = self.match(cents)
+            assigned, rows = {}, []
+            for r, sp in enumerate(speakers):
+                if not np.isfinite(cents[r]).all():
+                    continue
+                if best[r] >= 0 and sim[r] >= threshold:
+                    v = int(best[r])
+                else:
+                    v = len(self.voices)
+                    self.voices.append({"id": self._new_voice_id(), "gender": "Unknown", "locked": False})
+                assigned[sp] = {"voice": v, "sim": round(float(sim[r]), 4) if np.isfinite(sim[r]) else None}
+                self.members.append({"episode": key, "speaker": sp, "voice": v,
+                                     "w": float(weights[r]), "gender": _norm_gender(genders.get(sp))})
+                rows.append(np.asarray(cents[r], np.float32))
+            if rows:
+                self.M = np.concatenate([self.M.reshape(-1, len(rows[0])), np.stack(rows)], axis=0)
+            self.episodes[key] = {"audio": audio, "fp": fp, "speakers": assigned}
+            self._rebuild()
+            self.save()
+            return self.episode_labels(key)
+
+    def index_workdir(self, workdir, device='auto', threshold: float = MATCH_THRESHOLD,
+                      samples_per_spk: int = 8, min_dur: float = 1.0) -> Dict[str, dict]:
+        """Index satu workdir episode (*_16k.wav + *_segments.json + *_speakers.json terbaru),
+        lalu tulis season_id / gender ke *_speakers.json episode itu."""
+        work = Path(workdir)
+        newest = lambda pat: max(work.glob(pat), key=lambda p: p.stat().st_mtime)
+        wav, seg_path, spk_path = newest("*_16k.wav"), newest("*_segments.json"), newest("*_speakers.json")
+
+        seg = json.loads(seg_path.read_text(encoding="utf-8"))
+        segments = seg.get("segments") if isinstance(seg, dict) else seg
+        spk_obj = json.loads(spk_path.read_text(encoding="utf-8"))
+        spkmap = spk_obj.get("speakers", {}) if isinstance(spk_obj, dict) else {}
+        spkmap = spkmap if isinstance(spkmap, dict) else {}
+
+        spks, cents, dur = speaker_centroids(segments or [], wav, samples_per_spk, min_dur, device)
+        labels = self.assign_episode(self.episode_key(work), audio_hash(wav), spks, cents, dur,
+                                     {sp: (spkmap.get(sp) or {}).get("gender") for sp in spks}, threshold)
+
+        changed = False
+        for sp, lab in labels.items():
+            info = spkmap.setdefault(sp, {})
+            upd = {"season_id": lab["id"]}
+            if lab["gender"] != "Unknown":
+                upd["gender"] = lab["gender"]
+            if any(info.get(k) != v for k, v in upd.items()):
+                info.update(upd)
+                changed = True
+        for sp, info in spkmap.items():
+            # speaker tanpa sampel lagi: season_id lama bisa menunjuk voiceprint yang sudah dibuang/dipakai ulang
+            if sp not in labels and isinstance(info, dict) and info.pop("season_id", None):
+                changed = True
+        if changed:
+            spk_path.write_text(json.dumps({"speakers": spkmap}, ensure_ascii=False, indent=2), encoding="utf-8")
+        return labels
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"voiceprints": len(self.voices), "episodes": len(self.episodes), "members": len(self.members)}
+
+
+_indexes: Dict[str, SeasonIndex] = {}
+_indexes_lock = threading.Lock()
+
+def has_season_index(folder) -> bool:
+    return (Path(folder) / f"{INDEX_NAME}.json").exists()
+
+def get_season_index(folder) -> SeasonIndex:
+    """Satu SeasonIndex per folder season."""
+    key = str(Path(folder).resolve())
+    with _indexes_lock:
+        idx = _indexes.get(key)
+        if idx is None:
+            idx = _indexes[key] = SeasonIndex(Path(key))
+        return idx